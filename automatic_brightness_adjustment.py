@@ -49,6 +49,7 @@ import datetime
 from datetime import datetime, timedelta, timezone
 import json
 import methods
+import discovery
 from methods import read_data, write_data, loadConfig
 from pathlib import Path
 # ------------------------------------------------------------------------------------------------------------
@@ -81,7 +82,7 @@ COMMANDS = {
 "input_source_status" : list (b"\x55\xAA\x00\x32\xFE\x00\x00\x00\x00\x00\x00\x00\x22\x00\x00\x02\x01\x00\xAA\x56"), #check is input source selection is manual or automatic
 "current_input_source" : list (b"\x55\xAA\x00\x32\xFE\x00\x00\x00\x00\x00\x00\x00\x23\x00\x00\x02\x01\x00\xAB\x56"), #verify/select the current input source (only on models different from MCTRL300),
 "input_source_port" : list (b"\x55\xAA\x00\x32\xFE\x00\x00\x00\x00\x00\x00\x00\x4D\x00\x00\x02\x01\x00\xD5\x56"), # NEEDS CHECKING 
-"check_DVI_signal" : list (b"\x55\xAA\x00\x16\xFE\x00\x00\x00\x00\x00\x00\x00\x17\x00\x00\x02\x01\x00\x83\x56 "), #DVI signal checking
+"check_DVI_signal" : list (b"\x55\xAA\x00\x16\xFE\x00\x00\x00\x00\x00\x00\x00\x17\x00\x00\x02\x01\x00\x83\x56"), #DVI signal checking
 "check_auto_bright" : list (b"\x55\xAA\x00\x5B\xFE\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x0A\x01\x00\xB9\x56"), #check brightness mode, whether ALS is ENABLED or DISABLED
 "check_ALS_direct" : list (b"\x55\xAA\x00\x5B\xFE\x00\x00\x00\x00\x00\x00\x00\x0F\x00\x00\x02\x02\x00\xC1\x56"), # ALS checking
 "check_ALS_function" : list (b"\x55\xAA\x00\x15\xFE\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x06\x05\x00\x75\x56"),
@@ -408,45 +409,29 @@ def search_devices(): # Searches for all sender cards connected to each USB port
     logger.info("Found {} serial ports".format(len(ports)))
     device_found = 0
     valid_ports = []
-    for port, desc, hwid in sorted(ports):
-         logger.info("Searching sender card on port: " + port)
-         ser.port = port
-         try: 
-               ser.open()
-         except Exception as e:
-               logger.error(str(e))
-         if ser.isOpen():
-               logger.info("{} opened".format(port)) # remove at production
-               try:
-                  ser.flushInput() # flush input buffer, discarding all its contents
-                  ser.flushOutput() # flush output buffer, aborting current output and discard all that is in buffer
-                  ser.write (COMMANDS["connection"]) # send CONNECTION command to check whether any devices are connected
-                  logger.debug("Sending command: " + ' '.join('{:02X}'.format(a) for a in COMMANDS["connection"]))
-                  time.sleep (sleep_time) # allow some time for the device to respond        
-                  if ser.inWaiting()>0: # there should be something at the serial input
-                     response = ser.read(size=ser.inWaiting()) # read all the data available
-                     rx_data = list(response)
-                     logger.debug("Received data:"+' '.join('{:02X}'.format(a) for a in rx_data))
-                     if check_response(rx_data):                        
-                        if (rx_data[18]!=0 or rx_data [19]!=0): # if ACKNOWLEDGE data is not equal to zero then a device is connected
-                              # **********************************************************
-                              # status[port] = {} 
-                              # status[port]["lastUpdated"] = last_updated
-                              # status[port]["connectedControllers"] = device_found
-                              # status[port]["targetPort"] = port
-                              # status[port]["controllerDescription"] = desc
-                              # status[port]["controllerHardware"] = hwid
-                              # **********************************************************
-                              device_found =  device_found + 1
-                              connected_port = port
-                              valid_ports.append(port)
-                              logger.info("Device found on port: {} | {} | {}".format(port, desc, hwid))                       
-                        else:
-                              logger.info("Device not connected")
-               except Exception as e1:
-                  logger.error("Error communicating with device: " + str(e1))
-               ser.close()
-               logger.info("{} closed".format(port)) # remove at production?
+    ports = discovery.candidate_ports(ports, LOGGER_NAME)
+    replies = discovery.probe_ports(ports, ser.baudrate, COMMANDS["connection"], sleep_time, LOGGER_NAME) # probe all ports at once
+    for port, desc, hwid in ports:
+       response = replies.get(port)
+       if response: # there should be something at the serial input
+          rx_data = list(response)
+          logger.debug("Received data:"+' '.join('{:02X}'.format(a) for a in rx_data))
+          if check_response(rx_data):                        
+             if (rx_data[18]!=0 or rx_data [19]!=0): # if ACKNOWLEDGE data is not equal to zero then a device is connected
+                   # **********************************************************
+                   # status[port] = {} 
+                   # status[port]["lastUpdated"] = last_updated
+                   # status[port]["connectedControllers"] = device_found
+                   # status[port]["targetPort"] = port
+                   # status[port]["controllerDescription"] = desc
+                   # status[port]["controllerHardware"] = hwid
+                   # **********************************************************
+                   device_found =  device_found + 1
+                   connected_port = port
+                   valid_ports.append(port)
+                   logger.info("Device found on port: {} | {} | {}".format(port, desc, hwid))                       
+             else:
+                   logger.info("Device not connected")
     logger.info("Found {} device(s)".format(device_found))
     return device_found, valid_ports
 
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-import serial, sys, os, time, logging, datetime, json, methods, asyncio
+import serial, sys, os, time, logging, datetime, json, methods, transport, baud_cache, discovery, broker_client, asyncio, receiver_search, topology_cache, live_status, frame_builder
 from serial import SerialException
 import serial.tools.list_ports
 from sys import platform
@@ -21,8 +21,14 @@ class base:
       self.device_found = 0
       self.valid_ports = 0
       self.ser = None
+      self.link = None
+      self.broker = None
       self.config_panel = {}
       self.baudrates = []
+      self.topology = {}
+      self.shared_replies = None # {request: reply} while checks share their reads, see main_monitor.py
+      self.live = None # live_status.bin mapped, see live_record()
+      self.leased_ports = None # ports leased from the local server; None: every port of the host
       self._logger_name = "display_status"
    if platform == "linux":
       dir = "/data/opt/LEDMonitoring"
@@ -42,6 +48,10 @@ class base:
    LOG_FILE = "debug.log" 
    MODEL_6XX = "MSD600/MCTRL600/MCTRL610/MCTRL660"
 
+   @property
+   def LOGGER_NAME(self): # logger of the check, as used by the check scripts
+      return self._logger_name
+
    # EXIT CODES
    GOOD = 0
    WARNING = 1
@@ -50,17 +60,34 @@ class base:
    async def communicate_with_server(self, callback):
       self.logger = methods.get_logger(self._logger_name,self.LOG_FILE,self.FORMATTER,self.LOGGER_SCHEDULE,self.LOGGER_INTERVAL,self.LOGGER_BACKUPS) # Set up the logging  
       self.logger.info("ESTABLISHING CONNECTION WITH LOCAL SERVER QUEUE")
-      reader, writer = await asyncio.open_connection("127.0.0.1",8888)
+      reader, writer = await asyncio.open_connection(broker_client.HOST, broker_client.PORT)
       if not reader and not writer:
          self.logger.error("COULD NOT ESTABLISH CONNECTION WITH 127.0.0.1 ON PORT 8888")
-      writer.write(f"{self._logger_name}".encode())
+      ports = self.lease_ports()
+      # a serial broker lists its ports, a queue server answers START once the ports named are free (all of them if none)
+      writer.write(" ".join(["PORTS", self._logger_name] + ports).encode() + b"\n")
       await writer.drain()
       self.logger.info("AWAITING PERMISSION TO USE COM PORTS FROM LOCAL SERVER")
       self.data = await reader.read(1024)
-      if not self.data.decode().strip() == "START":
+      broker_ports = broker_client.parse_ports(self.data.decode())
+      if broker_ports is None and not self.data.decode().strip() == "START":
+         # a queue server without port leases only knows the bare script name: ask again the old way, for every port
+         self.logger.warning("Local server did not take the port lease request ({!r}), asking for every port".format(self.data.decode().strip()))
+         writer.close()
+         reader, writer = await asyncio.open_connection(broker_client.HOST, broker_client.PORT)
+         writer.write(f"{self._logger_name}".encode())
+         await writer.drain()
+         self.data = await reader.read(1024)
+         ports = []
+      if broker_ports is not None:
+         self.logger.info("SERIAL BROKER FOUND, SENDER CARDS ON {}".format(broker_ports))
+         self.broker = broker_client.BrokerClient(reader, writer, broker_ports, self._logger_name)
+      elif not self.data.decode().strip() == "START":
          self.logger.error("Could not make connection with localserver to access com port")
          self.session_handler(writer,reader)
          exit()
+      else:
+         self.leased_ports = ports or None
       self.logger.info(f"PERMISSION TO USE COM PORT GRANTED STARTING {self._logger_name} SCRIPT")
       await callback(reader, writer) #callback is the method passed to run after permission is granted   
       async def iter_connected_receivers(self):
@@ -83,13 +110,25 @@ class base:
             for lan_value in range(total_lan_ports):
                   receiver_index = 0
                   while True:
-                     if not self.get_receiver_connected(serial_port, receiver_index, lan_value):
+                     if not await self.get_receiver_connected(serial_port, receiver_index, lan_value):
                         break
                      yield serial_port, lan_value, receiver_index
                      receiver_index += 1
 
             self.ser.close()
-   async def initialize_program(self):      
+   def lease_ports(self):
+   # ---------------------------------------------------------------------------------------
+   # SERIAL PORTS TO ASK THE LOCAL SERVER FOR
+   # The sender card ports already found, else the port selected, else the ports sender
+   # cards were found on last time (topology_cache.json). [] asks for every port, e.g.
+   # on the first run, when discovery has to probe them all.
+   # ---------------------------------------------------------------------------------------
+      if self.valid_ports:
+         return sorted(self.valid_ports)
+      if self.ser is not None and self.ser.port:
+         return [self.ser.port]
+      return sorted(topology_cache.load(self._logger_name))
+   async def initialize_program(self, reader=None, writer=None): # reader, writer: local server connection, passed by the check scripts (unused)
       self.logger = methods.get_logger(self._logger_name,self.LOG_FILE,self.FORMATTER,self.LOGGER_SCHEDULE,self.LOGGER_INTERVAL,self.LOGGER_BACKUPS) # Set up the logging
       self.logger.info("*********************************************************************************************************************************************")
       self.logger.info(f"Starting check {self._logger_name}")
@@ -100,6 +139,7 @@ class base:
       sleep_time = float(self.config["sleepTime"])
       self.flash_wait_time = float(self.config["flashWaitTime"])
       self.data = read_data(self.STATUS_FILE,self._logger_name)
+      self.topology = topology_cache.load(self._logger_name) # receiver cards found on each LAN port last time
       self.status = {} # Initialise variable to store status data\
       self.modules_ok = True # assume all modules are ok to start off
       self.number_of_modules = self.config["modules"]
@@ -109,9 +149,22 @@ class base:
       else:
          self.config_panel = self.config['default']
       
-      for baudrate in self.baudrates:
-         self.ser = methods.setupSerialPort(baudrate,self._logger_name) # Initialise serial port
-         self.device_found, self.valid_ports = self.search_devices()
+      if self.broker is not None: # the broker owns the ports and has already found the sender cards
+         self.valid_ports = self.broker.ports
+         self.device_found = len(self.valid_ports)
+         for port in self.valid_ports:
+            self.status[port] = {"targetPort": port}
+         self.ser = broker_client.RemotePort(self.valid_ports[0] if self.valid_ports else None)
+      else:
+         ports = serial.tools.list_ports.comports()
+         baudrate_cache = baud_cache.load(self._logger_name)
+         for baudrate in baud_cache.preferred_order(self.baudrates, ports, baudrate_cache): # cached baudrates first
+            self.ser = methods.setupSerialPort(baudrate,self._logger_name) # Initialise serial port
+            self.device_found, self.valid_ports = self.search_devices()
+            if self.valid_ports:
+               if baud_cache.remember(baudrate_cache, ports, self.valid_ports, baudrate):
+                  baud_cache.save(baudrate_cache, self._logger_name)
+               break
 
          #Validate device found on player
       if not self.valid_ports:
@@ -124,46 +177,38 @@ class base:
       self.logger.info("Found {} serial ports".format(len(ports)))
       device_found = 0
       valid_ports = []
-      for port, desc, hwid in sorted(ports):
-         self.logger.info("Searching sender card on port: " + port)
-         self.ser.port = port
-         try: 
-            self.ser.open()
-         except Exception as e:
-            self.logger.error(str(e))
-         if self.ser.isOpen():
-            self.logger.info("{} opened".format(port)) # remove at production
-            try:
-               self.ser.flushInput() # flush input buffer, discarding all its contents
-               self.ser.flushOutput() # flush output buffer, aborting current output and discard all that is in buffer
-               self.ser.write (connection) # send CONNECTION command to check whether any devices are connected
-               self.logger.debug("Sending command: " + ' '.join('{:02X}'.format(a) for a in connection))
-               time.sleep (self.sleep_time) # allow some time for the device to respond        
-               if self.ser.inWaiting()>0: # there should be something at the serial input
-                  response = self.ser.read(size=self.ser.inWaiting()) # read all the data available
-                  rx_data = list(response)
-                  self.logger.debug("Received data:"+' '.join('{:02X}'.format(a) for a in rx_data))
-                  if self.check_response(rx_data):                        
-                     if (rx_data[18]!=0 or rx_data [19]!=0): # if ACKNOWLEDGE data is not equal to zero then a device is connected
-                           # **********************************************************
-                           self.status[port] = {} 
-                           #status[port]["lastUpdated"] = last_updated
-                           self.status[port]["connectedControllers"] = device_found
-                           self.status[port]["targetPort"] = port
-                           self.status[port]["controllerDescription"] = desc
-                           self.status[port]["controllerHardware"] = hwid
-                           # **********************************************************
-                           device_found =  device_found + 1
-                           self.connected_port = port
-                           valid_ports.append(port)
-                           self.logger.info("Device found on port: {} | {} | {}".format(port, desc, hwid))                       
-                     else:
-                           self.logger.info("Device not connected")
-            except Exception as e1:
-               self.logger.error("Error communicating with device: " + str(e1))
-            self.ser.close()
-            self.logger.info("{} closed".format(port)) # remove at production?
+      ports = discovery.candidate_ports(ports, self._logger_name)
+      if self.leased_ports is not None: # only the ports leased may be probed, other checks may be using the rest
+         ports = [(port, desc, hwid) for port, desc, hwid in ports if port in self.leased_ports]
+      replies = discovery.probe_ports(ports, self.ser.baudrate, connection, self.sleep_time, self._logger_name) # probe all ports at once
+      for port, desc, hwid in ports:
+         response = replies.get(port)
+         if response: # there should be something at the serial input
+            rx_data = list(response)
+            self.logger.debug("Received data:"+' '.join('{:02X}'.format(a) for a in rx_data))
+            if self.check_response(rx_data):                        
+               if (rx_data[18]!=0 or rx_data [19]!=0): # if ACKNOWLEDGE data is not equal to zero then a device is connected
+                     # **********************************************************
+                     self.status[port] = {} 
+                     #status[port]["lastUpdated"] = last_updated
+                     self.status[port]["connectedControllers"] = device_found
+                     self.status[port]["targetPort"] = port
+                     self.status[port]["controllerDescription"] = desc
+                     self.status[port]["controllerHardware"] = hwid
+                     # **********************************************************
+                     device_found =  device_found + 1
+                     self.connected_port = port
+                     valid_ports.append(port)
+                     self.logger.info("Device found on port: {} | {} | {}".format(port, desc, hwid))                       
+               else:
+                     self.logger.info("Device not connected")
       self.logger.info("Found {} device(s)".format(device_found))
+      missing = sorted(set(self.leased_ports or []) - set(valid_ports))
+      if missing:
+         # forget the sender cards that have gone, so the next run leases (and probes) every port again if need be
+         self.logger.warning("No sender card on leased port(s) {}".format(" ".join(missing)))
+         if [port for port in missing if self.topology.pop(port, None) is not None]:
+            topology_cache.save(self.topology, self._logger_name)
       return device_found, valid_ports
    def check_response(self, received_data):
       self.logger = logging.getLogger(self._logger_name)
@@ -201,25 +246,85 @@ class base:
       with open("monitor_log.log", "w") as log:
             log.writelines(f"{monitor_message}={alarm}")
       exit()
+   async def monitoring_log_outputs(self, alarms, reader, writer):
+      # Output of several checks run in one pass: alarms is {monitor_message: exit_status}, one line each in monitor_log.log
+      try:
+         await self.session_handler(writer,reader)
+         self.logger.info("checks completed successfully")
+      except Exception as e:
+         self.logger.error(f"Error sending completion message: {e}")
+      with open("monitor_log.log", "w") as log:
+            log.writelines(f"{monitor_message}={exit_status}\n" for monitor_message, exit_status in alarms.items())
+      exit()
    async def session_handler(self, writer, reader):
       writer.write(b"Done")
       await writer.drain()
       await reader.read(1024)
       writer.close()
       await writer.wait_closed()
-   def get_receiver_connected(self, port, receiver_index_value, lan_value):
+   async def transact(self, frame, timeout=None):
+   # ---------------------------------------------------------------------------------------
+   # SEND A COMMAND WITHOUT BLOCKING THE EVENT LOOP
+   # asyncio counterpart of transport.transact() for the current serial port
+   # While shared_replies is set, a read already answered is not sent again, so checks
+   # run in one pass share the frames they have in common.
+   # ---------------------------------------------------------------------------------------
+      key = self.shared_reply_key(frame)
+      if key is not None and key in self.shared_replies:
+         return self.shared_replies[key]
+      reply = await self.send(frame, timeout)
+      if key is not None and reply:
+         self.shared_replies[key] = reply
+      return reply
+   def shared_reply_key(self, frame):
+      # Requests are told apart by everything but their serial number and checksum; writes are never shared
+      if self.shared_replies is None or frame[transport.DIRECTION_OFFSET] == transport.WRITE:
+         return None
+      return bytes(frame[transport.SERIAL_NUMBER_OFFSET + 1:-2])
+   async def send(self, frame, timeout=None):
+      if self.broker is not None:
+         return await self.broker.transact(self.ser.port, frame, self.sleep_time if timeout is None else timeout)
+      if self.link is None or self.link.ser is not self.ser:
+         self.link = transport.AsyncLink(self.ser, self.sleep_time, self._logger_name)
+      return await self.link.transact(frame, self.sleep_time if timeout is None else timeout)
+   def live_record(self, port, lan_value=None, receiver_index_value=None):
+   # ---------------------------------------------------------------------------------------
+   # LATEST VALUES PUBLISHED BY display_status.py (see live_status.py)
+   # The sender card record, or the receiver card record with lan_value and
+   # receiver_index_value; None if it is older than "live_status_max_age" seconds in
+   # config.json (0 or missing: never used), so the check reads the hardware instead.
+   # ---------------------------------------------------------------------------------------
+      max_age = self.config.get("live_status_max_age", 0)
+      if not max_age:
+         return None
+      if self.live is None or self.live.replaced():
+         if self.live is not None:
+            self.live.close()
+         self.live = live_status.Segment.open()
+         if self.live is None:
+            return None
+      if lan_value is None:
+         record = self.live.sender(port)
+      else:
+         record = self.live.receiver(port, lan_value, receiver_index_value)
+      if record is None or time.time() - record["time"] > max_age:
+         return None
+      self.logger.debug(f"Live status of {port} ({time.time() - record['time']:.0f}s old): {record}")
+      return record
+   async def get_receiver_connected(self, port, receiver_index_value, lan_value):
    # ---------------------------------------------------------------------------------------
    # CHECK CONNECTION TO RECEIVER CARD
+   # Sent through transact(), so it works on a serial port and over the serial broker alike
    # ---------------------------------------------------------------------------------------   
       logger = logging.getLogger(self._logger_name)
-      check_receiver_model [7] = lan_value
-      check_receiver_model [8] = receiver_index_value
-      check_receiver_model_send = methods.checksum (check_receiver_model)
-      self.ser.write (check_receiver_model_send)
-      time.sleep (1) 
-      inWaiting = self.ser.inWaiting()
-      if inWaiting>0:
-         response = self.ser.read(size=inWaiting)
+      if not 0 <= receiver_index_value < receiver_search.MAX_RECEIVERS: # FFFFH is the broadcast address, not a receiver card
+         return False
+      check_receiver_model_send = bytearray(check_receiver_model) # a copy, the template is shared
+      check_receiver_model_send[frame_builder.LAN_PORT_OFFSET] = lan_value
+      frame_builder.WORD.pack_into(check_receiver_model_send, frame_builder.RECEIVER_INDEX_OFFSET, receiver_index_value) # both bytes, little endian
+      check_receiver_model_send = methods.checksum(check_receiver_model_send)
+      response = await self.transact(check_receiver_model_send, 1)
+      if response:
          rx_data = list(response)
          self.logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if self.check_response(rx_data):
@@ -230,3 +335,15 @@ class base:
          self.logger.warning("No data available at the input buffer")
          receiver_card_found = False
       return receiver_card_found
+   async def count_receivers(self, port, lan_value):
+   # ---------------------------------------------------------------------------------------
+   # NUMBER OF RECEIVER CARDS ON A LAN PORT (receiver cards 0 .. n-1), see receiver_search.py
+   # Only the end of the chain is checked when the count is known from the last scan.
+   # ---------------------------------------------------------------------------------------
+      mode = self.config.get("receiver_discovery", receiver_search.SEARCH)
+      count = await receiver_search.count_receivers_async(lambda index: self.get_receiver_connected(port, index, lan_value), mode=mode,
+                                                          expected=topology_cache.expected(self.topology, port, lan_value))
+      self.logger.info("{} receiver card(s) connected to LAN port {} of {}".format(count, lan_value, port))
+      if topology_cache.remember(self.topology, port, lan_value, count):
+         topology_cache.save(self.topology, self._logger_name)
+      return count
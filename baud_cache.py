@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# BAUDRATE CACHE
+# Remembers the baudrate each sender card answered on, keyed by the serial number of its USB adapter.
+#
+# DESCRIPTION
+# - Discovery sweeps every configured baudrate and probes every serial port at each rate until sender cards
+#   answer, which costs a full probe timeout per port per rate.
+# - The USB serial number (SER=... in the pyserial hwid string) identifies a controller whichever /dev/ttyUSBx
+#   or COMx it enumerates as. The baudrate that worked last time is stored in baudrate_cache.json, next to
+#   status.json, and tried first; the remaining rates are only swept when the cached one finds nothing.
+# - Discovery stops at the first baudrate any sender card answers on. serial_broker.py, which serves every
+#   sender card of the host, then looks for the others at their cached baudrates and opens each port at its own.
+#------------------------------------------------------------------------------------------------------------
+import re
+from methods import read_cache, write_data
+
+CACHE_FILE = "baudrate_cache.json"
+SERIAL_NUMBER = re.compile(r"SER=(\S+)")
+
+def usb_serial_number(hwid):
+   match = SERIAL_NUMBER.search(hwid or "")
+   return match.group(1) if match else None
+
+def load(logger_name):
+   return read_cache(CACHE_FILE, logger_name)
+
+def save(cache, logger_name):
+   write_data(CACHE_FILE, cache, logger_name)
+
+def preferred_order(baudrates, ports, cache):
+# ---------------------------------------------------------------------------------------
+# Configured baudrates, those cached for the controllers currently plugged in first.
+# ports: list of (port, desc, hwid) as returned by serial.tools.list_ports.comports()
+# ---------------------------------------------------------------------------------------
+   cached = [cache.get(usb_serial_number(hwid)) for port, desc, hwid in ports]
+   return sorted(baudrates, key=lambda baudrate: -cached.count(baudrate)) # stable, ties keep config order
+
+def remember(cache, ports, valid_ports, baudrate):
+   # Record the baudrate of every sender card found; returns True if the cache changed
+   changed = False
+   for port, desc, hwid in ports:
+      serial_number = usb_serial_number(hwid)
+      if port in valid_ports and serial_number and cache.get(serial_number) != baudrate:
+         cache[serial_number] = baudrate
+         changed = True
+   return changed
+
+def baudrate_for(cache, hwid, default):
+   # Cached baudrate of the controller with this hwid string, default if it has none
+   return cache.get(usb_serial_number(hwid), default)
+
+def other_baudrates(cache, ports, found, baudrate):
+   # Cached baudrates, other than the one discovery used, of the controllers plugged in on ports where no sender card was found
+   cached = {baudrate_for(cache, hwid, None) for port, desc, hwid in ports if port not in found}
+   return sorted(cached - {None, baudrate})
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# SERIAL BROKER CLIENT
+# Client side of the serial broker protocol (see serial_broker.py) used by the monitoring checks.
+#
+# DESCRIPTION
+# - The broker listens on 127.0.0.1:8888, keeps the sender card ports open and discovered, and runs the
+#   request frames sent to it in priority order. A check connected to it needs no serial port of its own.
+# - The protocol is line based text, one request and one reply per line:
+#       PORTS <client name> [port ...]   -> PORTS <port> <port> ...
+#       SEND <port> <frame hex> <timeout> [priority]
+#                                        -> REPLY <reply hex>  (REPLY with no data on timeout)
+#                                        -> ERROR <message>
+#       Done                             -> BYE
+# - "PORTS <client name> [port ...]" doubles as the lease request of the plain port queue server (the ports
+#   the check will use), which answers START instead, so a check can tell which of the two it is talking to
+#   from the first reply. The broker ignores the ports.
+#------------------------------------------------------------------------------------------------------------
+import asyncio
+import logging
+
+HOST = "127.0.0.1"
+PORT = 8888
+ENCODING = "ascii"
+
+class BrokerError(Exception):
+   pass
+
+def encode_frame(frame):
+   return bytes(frame).hex().upper()
+
+def decode_frame(text):
+   return bytes.fromhex(text)
+
+class BrokerClient:
+# ---------------------------------------------------------------------------------------
+# Sends request frames to the broker over an open connection.
+# ports: sender card ports announced by the broker in its PORTS reply.
+# Requests on one connection are sent one at a time; run several checks (connections)
+# to have the broker interleave them.
+# ---------------------------------------------------------------------------------------
+   def __init__(self, reader, writer, ports, logger_name):
+      self.reader = reader
+      self.writer = writer
+      self.ports = ports
+      self.logger = logging.getLogger(logger_name)
+      self.lock = asyncio.Lock()
+
+   async def request(self, line):
+      async with self.lock:
+         self.writer.write((line + "\n").encode(ENCODING))
+         await self.writer.drain()
+         reply = (await self.reader.readline()).decode(ENCODING).strip()
+      if not reply:
+         raise BrokerError("Connection to serial broker lost")
+      return reply
+
+   async def transact(self, port, frame, timeout, priority=None):
+      # Reply frame from the sender card on `port`, b"" if it did not answer within `timeout`
+      line = "SEND {} {} {}".format(port, encode_frame(frame), float(timeout))
+      if priority is not None:
+         line += " {}".format(int(priority))
+      reply = await self.request(line)
+      keyword, _, data = reply.partition(" ")
+      if keyword == "REPLY":
+         return decode_frame(data)
+      raise BrokerError(data or reply)
+
+def parse_ports(reply):
+   # Ports listed in a PORTS reply, None if the reply is anything else (e.g. START)
+   words = reply.split()
+   if words and words[0] == "PORTS":
+      return words[1:]
+   return None
+
+class RemotePort:
+# ---------------------------------------------------------------------------------------
+# Stands in for the serial port object of a check connected to the broker.
+# The broker owns the real port, so opening, closing and flushing are no-ops; `port`
+# selects which sender card base.transact() addresses.
+# ---------------------------------------------------------------------------------------
+   def __init__(self, port=None):
+      self.port = port
+      self.is_open = True
+
+   @property
+   def name(self):
+      return self.port
+
+   def isOpen(self):
+      return self.is_open
+
+   def open(self):
+      self.is_open = True
+
+   def close(self):
+      self.is_open = False
+
+   def flushInput(self):
+      pass
+
+   def flushOutput(self):
+      pass
@@ -13,7 +13,7 @@ async def check_brightness(reader, writer):
       base_script.ser.flushOutput() #flush output buffer, aborting current output and discard all that is in buffer
       base_script.logger.info("Opened device on port: " + base_script.ser.name) # remove at production
       # Retrieve parameters from sender cards
-      brightness_value, exit_code = get_display_brightness(base_script.ser.port) 
+      brightness_value, exit_code = await get_display_brightness(base_script.ser.port) 
       base_script.ser.close() #closing 
       base_script.logger.info("Writing to JSON file")
       base_script.logger.info("{} closed".format(base_script.ser.is_open)) # remove at production?
@@ -35,23 +35,28 @@ async def check_brightness(reader, writer):
 
 
    base_script.logger.info ("EXIT CODE: {}, {}".format(exit_code, message))
+   return exit_code, message
 
     
 #################################################################################################
 
-def get_display_brightness(port):
+async def get_display_brightness(port):
 # ---------------------------------------------------------------------------------------
 # SCREEN BRIGHTNESS SETTINGS
 # This needs to be on a per receiver card basis or global?
 # ---------------------------------------------------------------------------------------
    
    base_script.logger.info("Getting current screen brightness...[TO CHECK]")
+   live = base_script.live_record(port)
+   if live is not None and live["brightnessLevel"] >= 0: # just read by display_status.py
+      brightness = live["brightnessLevel"]
+      base_script.logger.info("Global Brightness (live status): {}% ".format(round(100*brightness/255)))
+      base_script.status[port]["brightnessLevelPC"] = round(100*brightness/255)
+      base_script.status[port]["brightnessLevel"] = brightness
+      return base_script.status[port]["brightnessLevelPC"], base_script.GOOD
    display_brightness_send = methods.checksum(display_brightness)
-   base_script.logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in display_brightness_send))
-   base_script.ser.write (display_brightness_send)
-   time.sleep (base_script.sleep_time)
-   if base_script.ser.inWaiting()>0:
-      response = base_script.ser.read(size=base_script.ser.inWaiting())
+   response = await base_script.transact(display_brightness_send, base_script.sleep_time)
+   if response:
       rx_data = list(response)
       base_script.logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if base_script.check_response(rx_data):
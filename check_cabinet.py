@@ -50,16 +50,16 @@ async def main(reader, writer):
             base_script.logger.info("=============================================================================================================================================")
             base_script.logger.info ("Connecting to receiver number: {}".format(no_of_receiver_cards+1))    
             try:     
-               if not get_receiver_connected(base_script.ser.port, no_of_receiver_cards,lan_value):
+               if not await get_receiver_connected(base_script.ser.port, no_of_receiver_cards,lan_value):
                   base_script.ser.close()
                   break
                # RETRIEVE PARAMETERS FROM RECEIVER CARDS
                # ---------------------------------------
-               get_receiver_card_model(base_script.ser.port,no_of_receiver_cards,lan_value) #not necessary 
-               get_receiver_card_firmware(base_script.ser.port,no_of_receiver_cards,lan_value) #not necessary 
-               display_on = get_cabinet_kill_mode(base_script.ser.port,no_of_receiver_cards,lan_value) and display_on
+               await get_receiver_card_model(base_script.ser.port,no_of_receiver_cards,lan_value) #not necessary 
+               await get_receiver_card_firmware(base_script.ser.port,no_of_receiver_cards,lan_value) #not necessary 
+               display_on = await get_cabinet_kill_mode(base_script.ser.port,no_of_receiver_cards,lan_value) and display_on
                no_of_receiver_cards += 1
-               receiver_card_found = get_receiver_connected(base_script.ser.port,no_of_receiver_cards,lan_value)
+               receiver_card_found = await get_receiver_connected(base_script.ser.port,no_of_receiver_cards,lan_value)
             except Exception as e:
                pass
    if(not display_on):
@@ -90,22 +90,24 @@ async def main(reader, writer):
     
 # ------------------------------------------------------------------------------------------------------------
 # FUNCTION DEFINITIONS
-def get_cabinet_kill_mode(port, receiver_index_value, lan_value):
+async def get_cabinet_kill_mode(port, receiver_index_value, lan_value):
 #-------------------------------------------------------------------------
 # CHECK KILL MODE (CABINET STATUS)
 # This is essentially information about whether the display is ON or OFF
 #-------------------------------------------------------------------------
    logger = logging.getLogger(base_script.LOGGER_NAME)
    logger.info("Getting cabinet kill mode (on/off)")
+   live = base_script.live_record(port, lan_value, receiver_index_value)
+   if live is not None and live["cabinet_on"] >= 0: # just read by display_status.py
+      kill = "On" if live["cabinet_on"] else "Off"
+      logger.info ("Cabinet Operating Status (Kill mode, live status): "+ kill.upper())
+      base_script.status[port]["receiverCard"][receiver_index_value]["kill"]=kill
+      return kill == "On"
    kill_mode[7] = lan_value
    kill_mode[8] = receiver_index_value
    kill_mode_send = methods.checksum(kill_mode)
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in kill_mode_send))
-   base_script.ser.write (kill_mode_send)
-   time.sleep (base_script.sleep_time)
-   inWaiting = base_script.ser.inWaiting()
-   if inWaiting>0:
-      response = base_script.ser.read(size=inWaiting)
+   response = await base_script.transact(kill_mode_send, base_script.sleep_time)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       rx_data_18 = rx_data[18]
@@ -131,44 +133,22 @@ def get_cabinet_kill_mode(port, receiver_index_value, lan_value):
          cabinet_on = False
    base_script.status[port]["receiverCard"][receiver_index_value]["kill"]=kill
    return cabinet_on
-def get_receiver_connected(port, receiver_index_value, lan_value):
+async def get_receiver_connected(port, receiver_index_value, lan_value):
 # ---------------------------------------------------------------------------------------
-# CHECK CONNECTION TO RECEIVER CARD
+# CHECK CONNECTION TO RECEIVER CARD (both bytes of the receiver index, see base_monitoring.py)
 # ---------------------------------------------------------------------------------------   
-   base_script.logger = logging.getLogger(base_script.LOGGER_NAME)
-   check_receiver_model [7] = lan_value
-   check_receiver_model [8] = receiver_index_value
-   check_receiver_model_send = methods.checksum (check_receiver_model)
-   base_script.ser.write (check_receiver_model_send)
-   time.sleep (1) 
-   inWaiting = base_script.ser.inWaiting()
-   if inWaiting>0:
-      response = base_script.ser.read(size=inWaiting)
-      rx_data = list(response)
-      base_script.logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
-      if base_script.check_response(rx_data):
-         receiver_card_found = True
-      else:
-         receiver_card_found = False          
-   else:
-      base_script.logger.warning("No data available at the input buffer")
-      receiver_card_found = False
-   return receiver_card_found
+   return await base_script.get_receiver_connected(port, receiver_index_value, lan_value)
 
  
-def get_receiver_card_model(port,receiver_index_value, lan_value):
+async def get_receiver_card_model(port,receiver_index_value, lan_value):
    logger = logging.getLogger(base_script.LOGGER_NAME)
    logger.info("Getting receiver card model")
    check_receiver_model[7] = lan_value
    check_receiver_model[8] = receiver_index_value
    check_receiver_model_send = methods.checksum (check_receiver_model)
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_receiver_model_send))
-   base_script.ser.write (check_receiver_model_send)
-   time.sleep (base_script.sleep_time)
-   inWaiting = base_script.ser.inWaiting()
-   if inWaiting>0:
+   response = await base_script.transact(check_receiver_model_send, base_script.sleep_time)
+   if response:
       base_script.status[port]["receiverCard"][receiver_index_value]={}
-      response = base_script.ser.read(size=inWaiting)
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       rx_data_18 = rx_data[18]
@@ -201,7 +181,7 @@ def get_receiver_card_model(port,receiver_index_value, lan_value):
       receiver_card_found = False
    return
 
-def get_receiver_card_firmware(port, receiver_index_value, lan_value):
+async def get_receiver_card_firmware(port, receiver_index_value, lan_value):
 # ---------------------------------------------------------------------------------------
 # RECEIVER CARD FW VERSION
 # ---------------------------------------------------------------------------------------  
@@ -210,12 +190,8 @@ def get_receiver_card_firmware(port, receiver_index_value, lan_value):
    check_receiver_fw [7] = lan_value
    check_receiver_fw [8] = receiver_index_value
    check_receiver_fw_send = methods.checksum (check_receiver_fw)
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_receiver_fw_send))
-   base_script.ser.write (check_receiver_fw_send)
-   time.sleep (base_script.sleep_time)
-   inWaiting = base_script.ser.inWaiting()
-   if inWaiting>0:
-      response = base_script.ser.read(size=inWaiting)
+   response = await base_script.transact(check_receiver_fw_send, base_script.sleep_time)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       rx_data_18 = rx_data[18]
@@ -7,7 +7,7 @@ async def check_dvi(reader, writer):
    output = []
 
    # Retrieve parameters from sender cards
-   DVI = get_DVI_signal_status(base_script.ser.port)
+   DVI = await get_DVI_signal_status(base_script.ser.port)
 
    if DVI != "Valid":  # Check if a video input on DVI is valid
          message = "DVI SIGNAL MISSING" 
@@ -22,7 +22,8 @@ async def check_dvi(reader, writer):
       
    # TODO: Include checks for brightness >0. This should be a WARNING.
    base_script.logger.info(f"EXIT CODE: {exit_code}, {message}")
-def get_DVI_signal_status(port):
+   return exit_code, message
+async def get_DVI_signal_status(port):
 # ---------------------------------------------------------------------------------------
 # DVI SIGNAL CHECK
 # Device: Sending Card
@@ -32,11 +33,14 @@ def get_DVI_signal_status(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(base_script.LOGGER_NAME)
    logger.info("Getting DVI signal")
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_DVI_signal))
-   base_script.ser.write (check_DVI_signal)
-   time.sleep (base_script.sleep_time)
-   if base_script.ser.inWaiting()>0:
-      response = base_script.ser.read(size=base_script.ser.inWaiting())
+   live = base_script.live_record(port)
+   if live is not None and live["DVI"] in live_status.DVI_SIGNAL: # just read by display_status.py
+      DVI_valid = live_status.DVI_SIGNAL[live["DVI"]]
+      base_script.status[port]["DVISignal"] = DVI_valid
+      logger.info("DVI signal (live status): "+ DVI_valid)
+      return (DVI_valid)
+   response = await base_script.transact(check_DVI_signal, base_script.sleep_time)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if base_script.check_response(rx_data):
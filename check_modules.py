@@ -10,10 +10,11 @@ async def check_modules(no_of_receiver_cards, lan_value):
    # ---------------------------------------
    # RETRIEVE PARAMETERS FROM RECEIVER CARDS
    # ---------------------------------------
-   get_receiver_card_model(base_script.serial_port, no_of_receiver_cards, lan_value) #not necessary 
-   get_receiver_card_firmware(base_script.serial_port, no_of_receiver_cards, lan_value) #not necessary 
+   await get_receiver_card_model(base_script.serial_port, no_of_receiver_cards, lan_value) #not necessary 
+   await get_receiver_card_firmware(base_script.serial_port, no_of_receiver_cards, lan_value) #not necessary 
 
-   number_of_modules, modules_ok = get_module_status(base_script.serial_port,  base_script.modules_ok,no_of_receiver_cards,lan_value) #required
+   number_of_modules, modules_ok = await get_module_status(base_script.serial_port,  base_script.modules_ok,no_of_receiver_cards,lan_value) #required
+   module_status_info[no_of_receiver_cards] = {'module_status': modules_ok, 'detected_modules': number_of_modules}
    #TODO: log each receiving card module information !
    if modules_ok:
       base_script.logger.info(f"Receiver {no_of_receiver_cards} MODULES FOUND: {number_of_modules} EXPECTED: {expected_modules}")
@@ -37,8 +38,9 @@ async def check_modules(no_of_receiver_cards, lan_value):
       exit_code = base_script.GOOD
       base_script.logger.info(f"{monitor_message}=0")
       base_script.logger.info(f"modules_output={message}")
+   return exit_code, message
 #################################################################################################
-def get_module_status(port,  modules_ok,receiver_index_value, lan_value):
+async def get_module_status(port,  modules_ok,receiver_index_value, lan_value):
 #-----------------------------------------------------------------
    logger = logging.getLogger(base_script.LOGGER_NAME)
    logger.info("Getting module status")
@@ -56,9 +58,7 @@ def get_module_status(port,  modules_ok,receiver_index_value, lan_value):
    # Assumption for now is that N=4 (this value may be stored in config.json) and DG=1. Therefore:
    # L = 4 * (22+2*1) = 4 * (24) = 96 = 0x60 --> check_module_status [16] = 96
    check_module_status_send = methods.checksum(check_module_status)
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_module_status_send))
-   base_script.ser.write(check_module_status_send)
-   time.sleep(base_script.sleep_time)
+   response = await base_script.transact(check_module_status_send, base_script.sleep_time)
    modules_ok = True
    # ------------------------------------------------------------------------------------------------
    # Read length of payload data received - payload will contain info for all N modules.
@@ -67,8 +67,7 @@ def get_module_status(port,  modules_ok,receiver_index_value, lan_value):
    # (X22) and (X23) represent cable detection --> These should both be 0 - any other value means an error
    # 
    # ------------------------------------------------------------------------------------------------
-   if base_script.ser.inWaiting()>0:
-         response = base_script.ser.read(size=base_script.ser.inWaiting())
+   if response:
          rx_data = list (response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          #number_of_modules = int(rx_data[16]/4)
@@ -112,19 +111,15 @@ def get_module_status(port,  modules_ok,receiver_index_value, lan_value):
          base_script.status[port]["receiverCard"][receiver_index_value]["module"]="N/A"
    return (base_script.number_of_modules,modules_ok)
 #################################################################################################
-def get_receiver_card_model(port,receiver_index_value, lan_value):
+async def get_receiver_card_model(port,receiver_index_value, lan_value):
    logger = logging.getLogger(base_script.LOGGER_NAME)
    logger.info("Getting receiver card model")
    check_receiver_model[7] = lan_value
    check_receiver_model[8] = receiver_index_value
    check_receiver_model_send = methods.checksum (check_receiver_model)
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_receiver_model_send))
-   base_script.ser.write (check_receiver_model_send)
-   time.sleep (base_script.sleep_time)
-   inWaiting = base_script.ser.inWaiting()
-   if inWaiting>0:
+   response = await base_script.transact(check_receiver_model_send, base_script.sleep_time)
+   if response:
       base_script.status[port]["receiverCard"][receiver_index_value]={}
-      response = base_script.ser.read(size=inWaiting)
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       rx_data_18 = rx_data[18]
@@ -157,7 +152,7 @@ def get_receiver_card_model(port,receiver_index_value, lan_value):
       receiver_card_found = False
    return
 
-def get_receiver_card_firmware(port, receiver_index_value, lan_value):
+async def get_receiver_card_firmware(port, receiver_index_value, lan_value):
 # ---------------------------------------------------------------------------------------
 # RECEIVER CARD FW VERSION
 # ---------------------------------------------------------------------------------------
@@ -167,12 +162,8 @@ def get_receiver_card_firmware(port, receiver_index_value, lan_value):
    check_receiver_fw [7] = lan_value
    check_receiver_fw [8] = receiver_index_value
    check_receiver_fw_send = methods.checksum (check_receiver_fw)
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_receiver_fw_send))
-   base_script.ser.write (check_receiver_fw_send)
-   time.sleep (base_script.sleep_time)
-   inWaiting = base_script.ser.inWaiting()
-   if inWaiting>0:
-      response = base_script.ser.read(size=inWaiting)
+   response = await base_script.transact(check_receiver_fw_send, base_script.sleep_time)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       rx_data_18 = rx_data[18]
@@ -45,17 +45,13 @@ async def main(reader, writer):
          if not base_script.ser.is_open:
             time.sleep(0.05)
             base_script.ser.open()
-         while receiver_card_found != False: 
-            base_script.logger.info("=============================================================================================================================================")
-            base_script.logger.info ("Connecting to receiver number: {}".format(no_of_receiver_cards+1))    
-            try:     
-               if not get_receiver_connected(base_script.ser.port, no_of_receiver_cards,lan_value):
-                  base_script.ser.close()
-                  break
-               no_of_receiver_cards += 1
-               total_receiver_cards_found += 1
-            except Exception as e:
-               print("")
+         base_script.logger.info("=============================================================================================================================================")
+         try:
+            no_of_receiver_cards = await base_script.count_receivers(base_script.ser.port, lan_value)
+            total_receiver_cards_found += no_of_receiver_cards
+         except Exception as e:
+            print("")
+         base_script.ser.close()
    if total_receiver_cards_found != total_receiver_cards: 
       message, exit_code = f"NO of receiver cards {total_receiver_cards_found} EXPECTED {total_receiver_cards}", base_script.CRITICAL
       base_script.logger.error(f"{monitor_message}=1")
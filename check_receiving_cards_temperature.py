@@ -5,7 +5,7 @@ base_script = base()
 async def check_receiving_cards_temperature(port, no_of_receiver_cards, lan_value):
    monitor_message = "receiving_card_temperature"
    temperature_per_receiving_card =[]
-   temp_valid, temperature, voltage_valid, voltage, monitoring_card = get_receiver_temp_voltage(no_of_receiver_cards, lan_value)                  
+   temp_valid, temperature, voltage_valid, voltage, monitoring_card = await get_receiver_temp_voltage(no_of_receiver_cards, lan_value)                  
    if temp_valid and voltage_valid:
       _status = 0;  
       base_script.logger.info (f"Temperature: {temperature}")                
@@ -38,9 +38,10 @@ async def check_receiving_cards_temperature(port, no_of_receiver_cards, lan_valu
       base_script.logger.info(f"receiving_cards_temperature_output={message}")
 
    base_script.logger.info ("EXIT CODE: {}, {}".format(exit_code, message))
+   return exit_code, message
           
 #Get receiving card gets one parameter (receiving_card) that represent the physical receiving card found per sender card
-def get_receiver_temp_voltage(receiver_index_value, lan_value):
+async def get_receiver_temp_voltage(receiver_index_value, lan_value):
 # ---------------------------------------------------------------------------------------
 # CHECK TEMPERATURE, VOLTAGE & MONITORING
 # Retrieve data for receiver cards
@@ -60,14 +61,15 @@ def get_receiver_temp_voltage(receiver_index_value, lan_value):
    global logger
    logger = logging.getLogger(base_script.LOGGER_NAME)
    logger.info("Getting receiver card monitoring, temperature and voltage")
+   live = base_script.live_record(base_script.ser.port, lan_value, receiver_index_value)
+   if live is not None and None not in (live["temperature"], live["voltage"]) and live["monitoring_card"] >= 0: # just read by display_status.py
+      logger.info("Temperature (live status): {:.1f}°C, Voltage: {:.1f}V".format(live["temperature"], live["voltage"]))
+      return "Yes", live["temperature"], "Yes", live["voltage"], "Yes" if live["monitoring_card"] else "No"
    check_monitoring [7] = lan_value
    check_monitoring [8] = receiver_index_value
    check_monitoring_send = methods.checksum (check_monitoring)
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_monitoring_send))
-   base_script.ser.write(check_monitoring_send)
-   time.sleep(base_script.sleep_time)
-   if base_script.ser.inWaiting()>0:
-         response = base_script.ser.read(size=base_script.ser.inWaiting())
+   response = await base_script.transact(check_monitoring_send, base_script.sleep_time)
+   if response:
          rx_data = list (response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if base_script.check_response(rx_data):
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# CHECK SCHEDULE
+# Runs each receiver card check at its own cadence rather than on every scan.
+#
+# DESCRIPTION
+# - "check_cadence" in config.json gives, per check, the number of seconds between two runs on the same receiver
+#   card (0, or a check not listed, = every scan), e.g. kill mode every scan, temperature and voltage every
+#   5 minutes and module status hourly. The checks are named after their commands in display_status.py.
+# - The last run of every check on every receiver card is stored in check_schedule.json, next to status.json,
+#   as {"<serial port>": {"<LAN port>": {"<receiver card>": {"<check>": {"last_run", "status", "value"}}}}},
+#   where status holds the values the check wrote into the receiver card's status.json entry and value the
+#   result it returned.
+# - Each scan only runs the checks that are due. The stored results of the others fill in status.json and the
+#   display verdict. Delete check_schedule.json to run every check on the next scan.
+#------------------------------------------------------------------------------------------------------------
+import time
+from methods import read_cache, write_data
+
+CACHE_FILE = "check_schedule.json"
+
+def load(logger_name):
+   return read_cache(CACHE_FILE, logger_name)
+
+def save(schedule, logger_name):
+   write_data(CACHE_FILE, schedule, logger_name)
+
+def receiver_entry(schedule, lan_port, receiver):
+   # Stored runs of one receiver card, within the schedule of one sender card
+   return schedule.setdefault(str(lan_port), {}).setdefault(str(receiver), {})
+
+def due_checks(entry, cadence, checks, now=None):
+   # The checks, in order, that have never run on this receiver card or whose cadence has elapsed
+   now = time.time() if now is None else now
+   return [name for name in checks if name not in entry or now - entry[name]["last_run"] >= float(cadence.get(name, 0))]
+
+def record(entry, name, status, value, now=None):
+   entry[name] = {"last_run": time.time() if now is None else now, "status": status, "value": value}
@@ -9,7 +9,7 @@ check_monitoring = list (b"\x55\xAA\x00\x32\xFE\x00\x01\x00\x00\x00\x00\x00\x00\
 input_source_status = list (b"\x55\xAA\x00\x32\xFE\x00\x00\x00\x00\x00\x00\x00\x22\x00\x00\x02\x01\x00\xAA\x56") #check is input source selection is manual or automatic
 current_input_source = list (b"\x55\xAA\x00\x32\xFE\x00\x00\x00\x00\x00\x00\x00\x23\x00\x00\x02\x01\x00\xAB\x56") #verify/select the current input source (only on models different from MCTRL300)
 input_source_port = list (b"\x55\xAA\x00\x32\xFE\x00\x00\x00\x00\x00\x00\x00\x4D\x00\x00\x02\x01\x00\xD5\x56") # NEEDS CHECKING 
-check_DVI_signal = list (b"\x55\xAA\x00\x16\xFE\x00\x00\x00\x00\x00\x00\x00\x17\x00\x00\x02\x01\x00\x83\x56 ") #DVI signal checking
+check_DVI_signal = list (b"\x55\xAA\x00\x16\xFE\x00\x00\x00\x00\x00\x00\x00\x17\x00\x00\x02\x01\x00\x83\x56") #DVI signal checking
 check_auto_bright = list (b"\x55\xAA\x00\x5B\xFE\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x0A\x01\x00\xB9\x56") #check brightness mode, whether ALS is ENABLED or DISABLED
 check_ALS_direct = list (b"\x55\xAA\x00\x5B\xFE\x00\x00\x00\x00\x00\x00\x00\x0F\x00\x00\x02\x02\x00\xC1\x56") # ALS checking
 check_ALS_function = list (b"\x55\xAA\x00\x15\xFE\x00\x02\x00\x00\x00\x00\x00\x00\x00\x00\x06\x05\x00\x75\x56")
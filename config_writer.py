@@ -48,6 +48,9 @@ from logging.handlers import TimedRotatingFileHandler
 import datetime
 import json
 import methods
+import transport
+import discovery
+import baud_cache
 from methods import read_data, write_data, loadConfig
 import re
 import os
@@ -146,7 +149,9 @@ def main():
         )
     )
 
-    baud_rates_list = [1048576, 115200]
+    ports = serial.tools.list_ports.comports()
+    baudrate_cache = baud_cache.load(LOGGER_NAME)
+    baud_rates_list = baud_cache.preferred_order([1048576, 115200], ports, baudrate_cache) # cached baudrates first
     for i, test_baudrate in enumerate(baud_rates_list):
       my_logger.debug(f"Attempting to search for sender cards on baudrate: {test_baudrate}")
       
@@ -160,6 +165,8 @@ def main():
 
       if valid_ports:
          my_logger.debug(f"Successful connection with baudrate: {test_baudrate}")
+         if baud_cache.remember(baudrate_cache, ports, valid_ports, test_baudrate):
+            baud_cache.save(baudrate_cache, LOGGER_NAME)
          config_data.update({"baudrate": test_baudrate})
          baudrate = test_baudrate
          break
@@ -545,9 +552,7 @@ def get_status_two(port):
    # Assumption for now is that N=4 (this value may be stored in config.json) and DG=1. Therefore:
    # L = 4 * (22+2*1) = 4 * (24) = 96 = 0x60 --> check_module_status [16] = 96
    check_module_status_send = methods.checksum(COMMANDS["check_module_status"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_module_status_send))
-   ser.write(check_module_status_send)
-   time.sleep(sleep_time)
+   response = transport.transact(ser, check_module_status_send, sleep_time, LOGGER_NAME)
    modules_ok = True
 
    # Define signal line mapping for each 16-bit flat cable pair
@@ -577,8 +582,7 @@ def get_status_two(port):
    # (X22) and (X23) represent cable detection --> These should both be 0 - any other value means an error
    # 
    # ------------------------------------------------------------------------------------------------
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   if response:
          rx_data = list (response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          #number_of_modules = int(rx_data[16]/4)
@@ -628,45 +632,29 @@ def search_devices(): # Searches for all sender cards connected to each USB port
     logger.info("Found {} serial ports".format(len(ports)))
     device_found = 0
     valid_ports = []
-    for port, desc, hwid in sorted(ports):
-         logger.info("Searching sender card on port: " + port)
-         ser.port = port
-         try: 
-               ser.open()
-         except Exception as e:
-               logger.error(str(e))
-         if ser.isOpen():
-               logger.info("{} opened".format(port)) # remove at production
-               try:
-                  ser.flushInput() # flush input buffer, discarding all its contents
-                  ser.flushOutput() # flush output buffer, aborting current output and discard all that is in buffer
-                  ser.write (COMMANDS["connection"]) # send CONNECTION command to check whether any devices are connected
-                  logger.debug("Sending command: " + ' '.join('{:02X}'.format(a) for a in COMMANDS["connection"]))
-                  time.sleep (sleep_time) # allow some time for the device to respond        
-                  if ser.inWaiting()>0: # there should be something at the serial input
-                     response = ser.read(size=ser.inWaiting()) # read all the data available
-                     rx_data = list(response)
-                     logger.debug("Received data:"+' '.join('{:02X}'.format(a) for a in rx_data))
-                     if check_response(rx_data):                        
-                        if (rx_data[18]!=0 or rx_data [19]!=0): # if ACKNOWLEDGE data is not equal to zero then a device is connected
-                              # **********************************************************
-                              config_data[port] = {} 
-                              config_data[port]["lastUpdated"] = last_updated
-                              config_data[port]["connectedControllers"] = device_found
-                              config_data[port]["targetPort"] = port
-                              config_data[port]["controllerDescription"] = desc
-                              config_data[port]["controllerHardware"] = hwid
-                              # **********************************************************
-                              device_found =  device_found + 1
-                              connected_port = port
-                              valid_ports.append(port)
-                              logger.info("Device found on port: {} | {} | {}".format(port, desc, hwid))                       
-                        else:
-                              logger.info("Device not connected")
-               except Exception as e1:
-                  logger.error("Error communicating with device: " + str(e1))
-               ser.close()
-               logger.info("{} closed".format(port)) # remove at production?
+    ports = discovery.candidate_ports(ports, LOGGER_NAME)
+    replies = discovery.probe_ports(ports, ser.baudrate, COMMANDS["connection"], sleep_time, LOGGER_NAME) # probe all ports at once
+    for port, desc, hwid in ports:
+       response = replies.get(port)
+       if response: # there should be something at the serial input
+          rx_data = list(response)
+          logger.debug("Received data:"+' '.join('{:02X}'.format(a) for a in rx_data))
+          if check_response(rx_data):                        
+             if (rx_data[18]!=0 or rx_data [19]!=0): # if ACKNOWLEDGE data is not equal to zero then a device is connected
+                   # **********************************************************
+                   config_data[port] = {} 
+                   config_data[port]["lastUpdated"] = last_updated
+                   config_data[port]["connectedControllers"] = device_found
+                   config_data[port]["targetPort"] = port
+                   config_data[port]["controllerDescription"] = desc
+                   config_data[port]["controllerHardware"] = hwid
+                   # **********************************************************
+                   device_found =  device_found + 1
+                   connected_port = port
+                   valid_ports.append(port)
+                   logger.info("Device found on port: {} | {} | {}".format(port, desc, hwid))                       
+             else:
+                   logger.info("Device not connected")
     logger.info("Found {} device(s)".format(device_found))
     return device_found, valid_ports
 
@@ -706,11 +694,8 @@ def get_sender_card_model(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting sender card model")
    sender_model_send = methods.checksum(COMMANDS["sender_model"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in sender_model_send))
-   ser.write (sender_model_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, sender_model_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -744,11 +729,8 @@ def get_sender_card_firmware_version(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting device firmware version")
    sender_firmware_send = methods.checksum(COMMANDS["sender_firmware"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in sender_firmware_send))
-   ser.write (sender_firmware_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, sender_firmware_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -771,11 +753,8 @@ def get_input_source_mode(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting input source mode")
    input_source_status_send = methods.checksum(COMMANDS["input_source_status"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in input_source_status_send))
-   ser.write (input_source_status_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, input_source_status_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -801,11 +780,8 @@ def get_input_source_selected(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting input source port selected")
    current_input_source_send = methods.checksum(COMMANDS["current_input_source"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in current_input_source_send))
-   ser.write (current_input_source_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, current_input_source_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -847,11 +823,8 @@ def get_input_source_status(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting input source status")
    input_source_port_send = methods.checksum(COMMANDS["input_source_port"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in input_source_port_send))
-   ser.write (input_source_port_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, input_source_port_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -901,11 +874,8 @@ def get_DVI_signal_status(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting DVI signal")
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in COMMANDS["check_DVI_signal"]))
-   ser.write (COMMANDS["check_DVI_signal"])
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, COMMANDS["check_DVI_signal"], sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -935,11 +905,8 @@ def get_ALS_mode_status(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting automatic brightness mode")
    check_auto_bright_send = methods.checksum(COMMANDS["check_auto_bright"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_auto_bright_send))
-   ser.write (check_auto_bright_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, check_auto_bright_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -965,12 +932,9 @@ def get_ALS_mode_settings(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting Automatic Brightness Settings...[TO CHECK]")
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in COMMANDS["auto_brightness_settings"]))
    auto_brightness_settings_send = methods.checksum(COMMANDS["auto_brightness_settings"])
-   ser.write (auto_brightness_settings_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, auto_brightness_settings_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1038,11 +1002,8 @@ def get_ambient_light_level_direct(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting ambient light level directly from controller")
    check_ALS_send = methods.checksum(COMMANDS["check_ALS_direct"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_ALS_send))
-   ser.write (check_ALS_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, check_ALS_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1073,22 +1034,16 @@ def get_ambient_light_level_via_function_card(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Refreshing function card register")
    refresh_function_send = methods.checksum(COMMANDS["function_card_refresh_register"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in refresh_function_send))
-   ser.write (refresh_function_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, refresh_function_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
    else:
          logger.warning("No data available at the input buffer")
    logger.info("Getting ambient light level from function card")
    check_ALS_send = methods.checksum(COMMANDS["check_ALS_function"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_ALS_send))
-   ser.write (check_ALS_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, check_ALS_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1113,11 +1068,8 @@ def get_brightness_levels(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting current screen brightness...[TO CHECK]")
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in COMMANDS["get_brightness"]))
-   ser.write (COMMANDS["get_brightness"])
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, COMMANDS["get_brightness"], sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1162,11 +1114,8 @@ def get_cabinet_width(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting cabinet width...")
    check_cabinet_width_send = methods.checksum (COMMANDS["check_cabinet_width"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_cabinet_width_send))
-   ser.write (check_cabinet_width_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, check_cabinet_width_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1187,11 +1136,8 @@ def get_cabinet_height(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting cabinet height...")
    check_cabinet_height_send = methods.checksum (COMMANDS["check_cabinet_height"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_cabinet_height_send))
-   ser.write (check_cabinet_height_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, check_cabinet_height_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1214,10 +1160,8 @@ def get_receiver_connected(port):
    global no_of_receiver_cards
    COMMANDS["check_receiver_model"][8] = no_of_receiver_cards
    check_receiver_model_send = methods.checksum (COMMANDS["check_receiver_model"])
-   ser.write (check_receiver_model_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, check_receiver_model_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1236,11 +1180,8 @@ def get_receiver_card_model(port, sender_output_port):
    logger.info("Getting receiver card model")
    COMMANDS["check_receiver_model"][8] = no_of_receiver_cards
    check_receiver_model_send = methods.checksum (COMMANDS["check_receiver_model"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_receiver_model_send))
-   ser.write (check_receiver_model_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, check_receiver_model_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1288,11 +1229,8 @@ def get_receiver_card_firmware(port, sender_output_port):
    logger.info("Getting receiver card firmware")
    COMMANDS["check_receiver_fw"][8] = no_of_receiver_cards
    check_receiver_fw_send = methods.checksum (COMMANDS["check_receiver_fw"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_receiver_fw_send))
-   ser.write (check_receiver_fw_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, check_receiver_fw_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list(response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
@@ -1328,11 +1266,8 @@ def get_receiver_temp_voltage(port, sender_output_port):
    logger.info("Getting receiver card monitoring, temperature and voltage")
    COMMANDS["check_monitoring"][8] = no_of_receiver_cards
    check_monitoring_send = methods.checksum (COMMANDS["check_monitoring"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_monitoring_send))
-   ser.write(check_monitoring_send)
-   time.sleep(sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, check_monitoring_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list (response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
@@ -1399,11 +1334,8 @@ def get_cabinet_kill_mode(port, sender_output_port):
    logger.info("Getting cabinet kill mode (on/off)")
    COMMANDS["kill_mode"][8] = no_of_receiver_cards
    kill_mode_send = methods.checksum(COMMANDS["kill_mode"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in kill_mode_send))
-   ser.write (kill_mode_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, kill_mode_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list(response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
@@ -1440,11 +1372,8 @@ def get_cabinet_lock_mode(port, sender_output_port):
    logger.info("Getting cabinet lock mode (normal/locked)")
    COMMANDS["lock_mode"][8] = no_of_receiver_cards
    lock_mode_send = methods.checksum(COMMANDS["lock_mode"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in lock_mode_send))
-   ser.write (lock_mode_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, lock_mode_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list(response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
@@ -1478,11 +1407,8 @@ def get_gamma_value(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting cabinet gamma value")
    gamma_value_send = methods.checksum(COMMANDS["gamma_value"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in gamma_value_send))
-   ser.write (gamma_value_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, gamma_value_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list(response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
@@ -1507,11 +1433,8 @@ def get_module_flash(port,  modules_ok):
    logger.info("Sending module flash request and wait")
    COMMANDS["start_check_module_flash"][8] = no_of_receiver_cards
    start_check_module_flash_send = methods.checksum(COMMANDS["start_check_module_flash"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in start_check_module_flash_send))
-   ser.write (start_check_module_flash_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, start_check_module_flash_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list (response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
@@ -1527,12 +1450,9 @@ def get_module_flash(port,  modules_ok):
    logger.info("Getting module flash data")
    COMMANDS["read_back_module_flash"][8] = no_of_receiver_cards
    read_back_module_flash_send = methods.checksum(COMMANDS["read_back_module_flash"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in read_back_module_flash_send))
-   ser.write(read_back_module_flash_send)
-   time.sleep(sleep_time)
+   response = transport.transact(ser, read_back_module_flash_send, sleep_time, LOGGER_NAME)
    modules_ok = True
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   if response:
          rx_data = list (response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          number_of_modules = int(rx_data[16]/4)
@@ -1605,11 +1525,8 @@ def get_ribbon_cable_status(port):
    logger.info("Getting ribbon cable status...[TODO]")
    COMMANDS["ribbon_cable"][8] = no_of_receiver_cards
    ribbon_cable_send = methods.checksum (COMMANDS["ribbon_cable"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in ribbon_cable_send))
-   ser.write(ribbon_cable_send)
-   time.sleep(sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, ribbon_cable_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list (response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
@@ -1647,11 +1564,8 @@ def get_edid(port): #inactive
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting EDID 1.3 register")
    edid_send = methods.checksum(COMMANDS["edid_register"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in edid_send))
-   ser.write (edid_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, edid_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list(response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          #if check_response(rx_data):
@@ -1694,13 +1608,10 @@ def get_receiver_brightness(port, sender_output_port):
     COMMANDS["get_brightness"][8] = no_of_receiver_cards
     get_brightness_send = methods.checksum(COMMANDS["get_brightness"])
     
-    logger.debug("Sending command: " + ' '.join('{:02X}'.format(a) for a in get_brightness_send))
     
-    ser.write(get_brightness_send)
-    time.sleep(sleep_time)
+    response = transport.transact(ser, get_brightness_send, sleep_time, LOGGER_NAME)
 
-    if ser.inWaiting() > 0:
-        response = ser.read(size=ser.inWaiting())
+    if response:
         rx_data = list(response)
         
         logger.debug("Received data: " + ' '.join('{:02X}'.format(a) for a in rx_data))
@@ -1751,11 +1662,8 @@ def get_display_brightness(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting current screen brightness...[TO CHECK]")
    display_brightness_send = methods.checksum(COMMANDS["display_brightness"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in display_brightness_send))
-   ser.write (display_brightness_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, display_brightness_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1790,11 +1698,8 @@ def get_redundant_status(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting redundancy status")
    check_redundancy_send = methods.checksum(COMMANDS["check_redundancy"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_redundancy_send))
-   ser.write (check_redundancy_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, check_redundancy_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1813,11 +1718,8 @@ def get_function_card(port):
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting function card model")
    function_card_model_send = methods.checksum(COMMANDS["check_function_card"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in function_card_model_send))
-   ser.write (function_card_model_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, function_card_model_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1866,11 +1768,8 @@ def get_module_status(port, no_of_modules, sender_output_port):
    COMMANDS["get_status"][17] = first_byte
    COMMANDS["get_status"][16] = response_length
    get_status_send = methods.checksum(COMMANDS["get_status"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in get_status_send))
-   ser.write (get_status_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, get_status_send, sleep_time, LOGGER_NAME)
+   if response:
       logger.debug("Received data size: " + str(len(response)))
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
@@ -2015,9 +1914,7 @@ def get_status_three(port, sender_output_port):
     COMMANDS["check_module_status"][17] = first_byte
 
     check_module_status_send = methods.checksum(COMMANDS["check_module_status"])
-    logger.debug("Sending command: " + ' '.join('{:02X}'.format(a) for a in check_module_status_send))
-    ser.write(check_module_status_send)
-    time.sleep(sleep_time)
+    response = transport.transact(ser, check_module_status_send, sleep_time, LOGGER_NAME)
 
     modules_ok = True
 
@@ -2041,8 +1938,7 @@ def get_status_three(port, sender_output_port):
         15: "D"
     }
 
-    if ser.inWaiting() > 0:
-        response = ser.read(size=ser.inWaiting())
+    if response:
         rx_data = list(response)
         logger.debug("Received data: " + ' '.join('{:02X}'.format(a) for a in rx_data))
 
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# SENDER CARD DISCOVERY
+# Finds the serial ports that have a Novastar sender card attached.
+#
+# DESCRIPTION
+# - search_devices() used to open every serial port in turn, send CONNECTION and wait for a reply, so every
+#   port that is not a controller (e.g. /dev/ttyAMA10 on the Raspberry Pi players) cost a full timeout.
+# - probe_ports() opens every candidate port, sends CONNECTION to all of them at once and collects the
+#   replies as they arrive. Ports that are still silent when the deadline passes are dropped, so a probe
+#   takes at most one timeout however many ports there are.
+# - candidate_ports() filters ports by USB VID:PID before they are opened, using the "port_allowlist" and
+#   "port_denylist" lists in config.json (e.g. ["10C4:EA60"] for CP2102N adapters). With an allowlist, ports
+#   without a USB VID:PID, such as on-board UARTs, are never opened.
+# - Ports listed in "extra_ports" (e.g. the pseudo-terminal of novastar_simulator.py, which the OS does not
+#   report as a serial port) are always probed as well.
+#------------------------------------------------------------------------------------------------------------
+import re
+import time
+import logging
+import methods
+import transport
+
+VID_PID = re.compile(r"VID:PID=([0-9A-Fa-f]{4}):([0-9A-Fa-f]{4})")
+
+def vid_pid(hwid):
+   # "10C4:EA60" from a pyserial hwid string, None for ports that are not USB devices
+   match = VID_PID.search(hwid or "")
+   return "{}:{}".format(*match.groups()).upper() if match else None
+
+def candidate_ports(ports, logger_name):
+# ---------------------------------------------------------------------------------------
+# Ports worth probing for a sender card, sorted by name.
+# ports: list of (port, desc, hwid) as returned by serial.tools.list_ports.comports()
+# ---------------------------------------------------------------------------------------
+   logger = logging.getLogger(logger_name)
+   config = methods.loadConfig(logger_name)
+   allowlist = {entry.upper() for entry in config.get("port_allowlist", [])}
+   denylist = {entry.upper() for entry in config.get("port_denylist", [])}
+   candidates = []
+   for port, desc, hwid in sorted(ports):
+      device = vid_pid(hwid)
+      if allowlist and device not in allowlist:
+         logger.info("Skipping port {} ({}) - not in port allowlist".format(port, device or hwid))
+      elif device in denylist:
+         logger.info("Skipping port {} ({}) - in port denylist".format(port, device))
+      else:
+         candidates.append((port, desc, hwid))
+   listed = {port for port, desc, hwid in candidates}
+   for port in config.get("extra_ports", []):
+      if port not in listed:
+         candidates.append((port, "Extra serial port", "n/a"))
+   return candidates
+
+def probe_ports(ports, baudrate, frame, timeout, logger_name):
+# ---------------------------------------------------------------------------------------
+# Send `frame` to every port at once and return {port: reply} for the ports that
+# answered before the timeout. Every port gets its own serial handle, closed on return.
+# ---------------------------------------------------------------------------------------
+   logger = logging.getLogger(logger_name)
+   number = transport.next_serial_number()
+   request = transport.tag(frame, number)
+   pending = {}
+   for port, desc, hwid in ports:
+      ser = methods.setupSerialPort(baudrate, logger_name)
+      ser.port = port
+      try:
+         ser.open()
+         ser.flushInput() # flush input buffer, discarding all its contents
+         ser.flushOutput() # flush output buffer, aborting current output and discard all that is in buffer
+         logger.debug("Sending command to {}: ".format(port) + ' '.join('{:02X}'.format(a) for a in request))
+         ser.write(request)
+      except Exception as e:
+         logger.error("Error opening serial port {}: {}".format(port, e))
+         ser.close()
+         continue
+      pending[port] = (ser, transport.FrameDecoder(logger_name))
+   opened = [ser for ser, decoder in pending.values()]
+   replies = {}
+   deadline = time.monotonic() + float(timeout)
+   while pending and time.monotonic() < deadline:
+      for port, (ser, decoder) in list(pending.items()):
+         try:
+            waiting = ser.inWaiting()
+            if waiting > 0:
+               decoder.feed(ser.read(size=waiting))
+         except Exception as e:
+            logger.error("Error communicating with device on {}: {}".format(port, e))
+            del pending[port]
+            continue
+         for reply in decoder.frames():
+            if reply[transport.SERIAL_NUMBER_OFFSET] == number:
+               replies[port] = reply
+               del pending[port]
+               break
+      time.sleep(transport.POLL_INTERVAL)
+   for port in pending:
+      logger.info("No reply from {}".format(port))
+   for ser in opened:
+      ser.close()
+   return replies
@@ -45,8 +45,23 @@ import serial.tools.list_ports
 import logging
 from logging.handlers import TimedRotatingFileHandler
 import datetime
+import argparse
+import multiprocessing
 import json
 import methods
+import transport
+import discovery
+import frame_builder
+import read_planner
+import monitoring_block
+import receiver_search
+import topology_cache
+import pipeline_cache
+import check_schedule
+import scan_cursor
+import status_store
+import telemetry_store
+import live_status
 from methods import read_data, write_data, loadConfig
 import re
 import os
@@ -63,6 +78,16 @@ LOGGER_SCHEDULE = 'midnight'
 LOGGER_BACKUPS = 7
 LOGGER_INTERVAL = 1
 
+# MODULE LAYOUT
+# This is to be taken from config.json ("number_of_modules", "data_groups") when setup
+NUMBER_OF_MODULES = 4
+DATA_GROUPS = 4
+
+# RECEIVER CARD QUERIES
+# Read requests sent to every receiver card; these are pipelined when pipeline_window > 1 and merged into block
+# reads when coalesce_gap is set
+RECEIVER_COMMANDS = ["check_receiver_model", "check_receiver_fw", "kill_mode", "get_brightness", "check_monitoring", "lock_mode", "check_module_status"]
+
 # EXIT CODES
 GOOD = 0
 WARNING = 1
@@ -107,18 +132,24 @@ COMMANDS = {
 "get_status" : list (b"\x55\xAA\x00\xC4\xFE\x00\x01\x00\x00\x00\x00\x00\x0A\x00\x00\x0A\x18\x00\x7E\x59"),
 #################################################################################################
 }
+# Immutable, checksummed copies of COMMANDS addressed per LAN port / receiver card (see frame_builder.py)
+FRAMES = frame_builder.FrameBuilder(COMMANDS)
+lan_port = 0 # sender card output the receiver card frames are addressed to
+BROADCAST = 0xFFFF # receiver index addressing every receiver card on a LAN port
 # ------------------------------------------------------------------------------------------------------------
 
 
 
 # ------------------------------------------------------------------------------------------------------------
 # MAIN
-def main():
-    global sleep_time, flash_wait_time, status, ser, last_updated, data
+def main(budget=None):
+    global sleep_time, flash_wait_time, status, status_file, ser, last_updated, data
     global no_of_receiver_cards, receiver_card_found, number_of_modules
-    global flag_module_error, flag_line_error
+    global flag_module_error, flag_line_error, link, coalesce_gap, receiver_discovery, check_cadence, module_flash_broadcast
 
     EXIT_CODE = UNKNOWN  # Define UNKNOWN or import it if necessary
+    scan_started = time.time()
+    deadline = scan_started + budget if budget else None # budgeted scan: no receiver card check is started after it
 
     # Set up the logging
     my_logger = methods.get_logger(
@@ -131,7 +162,14 @@ def main():
     config = loadConfig(LOGGER_NAME)
     sleep_time = config["sleep_time"]
     flash_wait_time = config["flash_wait_time"]
+    pipeline_window = config.get("pipeline_window", 1)
+    coalesce_gap = config.get("coalesce_gap")
+    receiver_discovery = config.get("receiver_discovery", receiver_search.SEARCH)
+    check_cadence = config.get("check_cadence", {})
+    module_flash_broadcast = config.get("module_flash_broadcast", False)
+    priority_scan = config.get("priority_scan", False)
     status = {}
+    status_file = status_store.StatusStore("status.json", status, LOGGER_NAME, config.get("status_compact", False))
     
     last_updated = datetime.datetime.now().strftime("%d/%m/%Y %H:%M")
     
@@ -148,137 +186,90 @@ def main():
     device_found, valid_ports = search_devices()
     
     if (device_found!=0):
-      i=0
       valid_devices = 0
-         # serial_port represents the ports that sender cards are connected to the PC
-      for serial_port in sorted(valid_ports):
-         my_logger.info("*******************    DEVICE {}   *******************".format(i))
-         my_logger.info("Connecting to device on {}".format(serial_port))
-         ser.port = serial_port
-         #Below has been heavily modified for config writer - This will attempt to open the serial port with both Baud Rates. Sucessfuly opening will result in the Baud rate being saved in the config file.
-         
-         try:
-            my_logger.debug(f"Attempting to open serial port: {serial_port} on baudrate: {baudrate}")
-            ser = methods.setupSerialPort(baudrate, LOGGER_NAME)  # Re-initialize serial port with the new baudrate
-            ser.port = serial_port  # Set the serial port to the current valid port
-            ser.open()  # Attempt to open the port
-            
-            if ser.isOpen():
-               my_logger.info(f"Successfully connected on {serial_port} with baudrate {baudrate}")
-               valid_devices = valid_devices + 1
-               status[serial_port] = {}
-               status[serial_port].update({"baudrate": baudrate})
-               status[serial_port]["sender_card_rx_port"]={}
-               try:
-                  ser.flushInput() #flush input buffer, discarding all its contents
-                  ser.flushOutput() #flush output buffer, aborting current output and discard all that is in buffer
-                  my_logger.info("Opened device on port: " + ser.name) # remove at production
-               except Exception as e1:
-                  my_logger.error("Error opening serial port: " + str(e))
-
-            else:
-               my_logger.error("Error communicating with device: " + ser.name)
-               continue
-
-         except Exception as e:
-            my_logger.error(f"Error opening serial port: {serial_port} - {str(e)} on baudrate: {baudrate}")
+      total_reciever_cards = 0
+      display_on = True
+      DVI = None
+      brightness_pc = 0
+      # serial_port represents the ports that sender cards are connected to the PC
+      topology = topology_cache.load(LOGGER_NAME) # receiver cards found on each LAN port last time
+      topology_changed = False
+      windows = pipeline_cache.load(LOGGER_NAME) # sender cards that fell back to one request at a time
+      windows_changed = False
+      window_keys = {serial_port: pipeline_cache.cache_key(status[serial_port].get("controllerHardware")) for serial_port in valid_ports}
+      opened = {serial_port: pipeline_cache.window(windows, window_keys[serial_port], pipeline_window) for serial_port in valid_ports}
+      schedule = check_schedule.load(LOGGER_NAME) # last run of each receiver card check
+      cursors = scan_cursor.load(LOGGER_NAME) # where the last budgeted scan of each sender card stopped
+      cursors_found = dict(cursors)
+      scanned = [] # (serial port, status.json entry, check schedule) of each sender card, for the telemetry history
+      live = live_status.open_writer(max(config["no_of_sender_cards"], len(valid_ports)), config.get("live_status_receivers", 256), LOGGER_NAME) if config.get("live_status", False) else None
+      critical = {}
+      if priority_scan:
+         # Critical checks of every sender card first; a critical verdict is reported before the telemetry is read
+         for i, serial_port in enumerate(sorted(valid_ports)):
+            critical[serial_port] = scan_critical(i, serial_port, baudrate, opened[serial_port], topology_cache.counts(topology, serial_port))
+            status_file.changed(serial_port)
+            if critical[serial_port]["connected"] and critical[serial_port]["pipeline_window"] < opened[serial_port]:
+               # the full scan goes on at the window the critical checks fell back to
+               windows_changed = pipeline_cache.remember(windows, window_keys[serial_port], pipeline_window, opened[serial_port], critical[serial_port]["pipeline_window"]) or windows_changed
+               opened[serial_port] = critical[serial_port]["pipeline_window"]
+         messages = critical_messages(critical.values(), config)
+         if messages:
+            my_logger.info("PROVISIONAL EXIT CODE: {}, {}".format(CRITICAL, "; ".join(messages)))
+            write_verdict(CRITICAL, "; ".join(messages), provisional=True)
+      scans = [(i, serial_port, baudrate, opened[serial_port], topology_cache.counts(topology, serial_port), schedule.get(serial_port, {}),
+                critical[serial_port] if critical.get(serial_port, {}).get("connected") else None,
+                deadline, cursors.get(serial_port) if budget else None) # only a budgeted scan resumes, a full scan starts over
+               for i, serial_port in enumerate(sorted(valid_ports))]
+      scan_workers = min(config.get("scan_workers", 1), len(scans))
+      if scan_workers > 1:
+         # One worker process per sender card; results are merged as each card finishes
+         my_logger.info(f"Scanning {len(scans)} sender cards with {scan_workers} workers")
+         pool = multiprocessing.Pool(scan_workers, init_scan_worker, (config, last_updated))
+         results = pool.imap_unordered(scan_worker, scans)
+      else:
+         pool = None
+         results = map(scan_worker, scans)
+      for result in results:
+         if not result["connected"]:
             continue
-         # -------------------------------------
-         # RETRIEVE PARAMETERS FROM SENDER CARDS
-         # -------------------------------------
-         model = get_sender_card_model(serial_port)
-         get_sender_card_firmware_version(serial_port)
-         get_display_brightness(serial_port)
-         function_card_model = get_function_card(serial_port)
-         if (function_card_model != "N/A"): # this has changed since v104 where only MFN300(B) was contemplated
-               get_ambient_light_level_via_function_card(serial_port)
-         else:
-               get_ambient_light_level_direct(serial_port)
-         get_ALS_mode_status(serial_port)
-         get_ALS_mode_settings(serial_port)
-         DVI = get_DVI_signal_status(serial_port)
-         # ONLY FOR MSD600/MSD600/MCTRL600/MCTRL610
-         if (model == "MSD600/MCTRL600/MCTRL610/MCTRL660"):
-               get_input_source_mode(serial_port)
-               get_input_source_selected(serial_port)
-               get_input_source_status(serial_port)
-         get_cabinet_width(serial_port) # TO CHECK IF THESE SHOULD BE AT CABINET LEVEL
-         get_cabinet_height(serial_port) # TO CHECK IF THESE SHOULD BE AT CABINET LEVEL
-         get_edid(serial_port) #TODO
-         get_redundant_status(serial_port)   
-         #get_test_mode(serial_port) #TODO
-         #get_calibration_mode(serial_port) #TODO
-         # -------------------------------------
-         receiver_card_found = True
-         no_of_receiver_cards = 0
-         total_reciever_cards = 0
-         status[serial_port]["receiverCard"]={}
-         display_on = True
-         ##############################################################################################
-         # CODE BELOW SHOULD BE INSIDE A FOR LOOP
-         # THIS IS TO MAKE SURE EACH PORT OF THE SENDER CARD IS CHECKED
-         # FOR MCTRL600/610 THESE ARE 4 PORTS
-         # FOR MCTRL300 THESE ARE ONLY 2
-         # ANY RECEIVER CARDS CONNECTED TO PORTS 1-4 SHOULD RESPOND WITH DATA - IF NOT, EITHER NOTHING ATTACHED OR ERROR
-         # - Index should be passed into function as parameter
-         # - New command should be created accounting for different data port number
-         ##############################################################################################
-         tx_ports_connected = []
-         if (model == "MSD600/MCTRL600/MCTRL610/MCTRL660"):
-            no_of_rxcardports = 4
-         else:
-            no_of_rxcardports = 2
-         port_range = range(no_of_rxcardports)
-         try:
-            # sender_output_port represents the RJ45 Port on the sender card
-            for sender_output_port in port_range:
-               no_of_receiver_cards = 0
-               status[serial_port]["sender_card_rx_port"][sender_output_port]={}
-               status[serial_port]["sender_card_rx_port"][sender_output_port]["receiverCard"]={}
-               my_logger.debug(f"Port Value: {sender_output_port} - Port Range: {port_range} - Reciever card number: {no_of_receiver_cards}")
-               receiver_card_found = True
-
-               for command_name, command_template in COMMANDS.items():
-                  COMMANDS[command_name][7] = sender_output_port 
-
-               while(receiver_card_found):
-                  my_logger.info("=======================================================================")
-                  my_logger.debug(f"*********** Sender Card Port: {sender_output_port}: Reciever Number: {no_of_receiver_cards} ***********")   
-                  if (not get_receiver_connected(serial_port)):  
-                     my_logger.info(f"Receiver card {no_of_receiver_cards} not connected.")
-                     break
-                  # ---------------------------------------
-                  # RETRIEVE PARAMETERS FROM RECEIVER CARDS
-                  # ---------------------------------------
-                  status[serial_port]["sender_card_rx_port"][sender_output_port]["receiverCard"][no_of_receiver_cards]={}
-
-                  get_receiver_card_model(serial_port, sender_output_port) #not necessary 
-                  get_receiver_card_firmware(serial_port, sender_output_port) #not necessary 
-                  display_on = get_cabinet_kill_mode(serial_port, sender_output_port) #and display_on
-                  brightness_pc, brightness, red, green, blue, vRed = get_receiver_brightness(serial_port, sender_output_port) #required
-                  #get_ribbon_cable_status(serial_port) #required
-                  get_receiver_temp_voltage(serial_port, sender_output_port) #not necessary 
-                  get_cabinet_lock_mode(serial_port, sender_output_port) #required
-                  #get_gamma_value(serial_port) #not necessary
-                  # -------------------------------------
-                  #TESTING
-                  get_module_status(serial_port, sender_output_port)
-                  #################################################################################################
-                  no_of_receiver_cards = no_of_receiver_cards+1
-                  total_reciever_cards = total_reciever_cards + 1
-                  ##############################################################################################
-         except Exception as e:
-            message = f"An error has occurred connecting to the Reciever Card: {str(e)}"
-            ser.close()
-            i += 1
-            EXIT_CODE = WARNING
-
-         my_logger.debug(f"Number of Reciever Cards = {total_reciever_cards}")
+         valid_devices = valid_devices + 1
+         status[result["port"]] = result["status"]
+         status_file.changed(result["port"]) # only this sender card's entry is encoded again
+         if DVI in (None, "Valid"):
+            DVI = result["DVI"]
+         display_on = display_on and result["display_on"]
+         brightness_pc = result["brightness_pc"] if valid_devices == 1 else min(brightness_pc, result["brightness_pc"])
+         number_of_modules = result["number_of_modules"] if valid_devices == 1 else min(number_of_modules, result["number_of_modules"])
+         total_reciever_cards = total_reciever_cards + result["receiver_cards"]
+         for sender_output_port, count in result["receivers_per_lan_port"].items():
+            topology_changed = topology_cache.remember(topology, result["port"], sender_output_port, count) or topology_changed
+         windows_changed = pipeline_cache.remember(windows, window_keys[result["port"]], pipeline_window, opened[result["port"]], result["pipeline_window"]) or windows_changed
+         schedule[result["port"]] = result["check_schedule"]
+         scanned.append((result["port"], result["status"], result["check_schedule"]))
+         if result["cursor"] is not None:
+            cursors[result["port"]] = result["cursor"]
+         else: # walk completed
+            cursors.pop(result["port"], None)
          status.update({"devices":valid_devices})
-         ser.close()
-         i += 1
          my_logger.info("Writing to JSON file")
-         write_data('status.json', status, LOGGER_NAME) # This could go to the end to include EXIT_CODE and output message
+         status_file.write() # This could go to the end to include EXIT_CODE and output message
+         if live is not None and not live.publish(result["port"], result["status"], result["receivers_per_lan_port"]):
+            my_logger.warning(f"No live status slot left for {result['port']}")
+      if pool is not None:
+         pool.close()
+         pool.join()
+      if live is not None:
+         live.close()
+      if topology_changed:
+         topology_cache.save(topology, LOGGER_NAME)
+      if windows_changed:
+         pipeline_cache.save(windows, LOGGER_NAME)
+      check_schedule.save(schedule, LOGGER_NAME)
+      if cursors != cursors_found:
+         scan_cursor.save(cursors, LOGGER_NAME)
+      if config.get("telemetry_history", False):
+         telemetry_store.record_scan(scanned, scan_started, config.get("telemetry_retention"), LOGGER_NAME)
     else:# No devices were found - exit
         message = "NO DEVICE - make sure a valid controller is connected, that the correct baudrate is defined in config.json and ensure the NOVA LCT is not running on the host system"
         EXIT_CODE = CRITICAL
@@ -289,7 +280,7 @@ def main():
     # CHECK ALL PARAMETERS - ALL MUST BE TRUE
     if (valid_devices == config["no_of_sender_cards"] and
       DVI == "Valid" and
-      total_reciever_cards == config["receiver_cards"] and
+      total_reciever_cards == expected_receiver_cards(config, total_reciever_cards) and
       display_on is True and
       modules_ok is True and
       #not flag_module_error and
@@ -312,8 +303,8 @@ def main():
          messages.append("DVI SIGNAL MISSING")
          EXIT_CODE = CRITICAL  # Always set to CRITICAL for this error
 
-      if total_reciever_cards < config["receiver_cards"]:  # Check if all receiver cards present
-         messages.append(f"RECEIVER CARD(S) MISSING - {config['receiver_cards']} EXPECTED, {no_of_receiver_cards} FOUND")
+      if total_reciever_cards < expected_receiver_cards(config, total_reciever_cards):  # Check if all receiver cards present
+         messages.append(f"RECEIVER CARD(S) MISSING - {expected_receiver_cards(config)} EXPECTED, {total_reciever_cards} FOUND")
          EXIT_CODE = CRITICAL  # Always CRITICAL
 
       if display_on is not True:  # Check that all cabinets are on
@@ -344,12 +335,352 @@ def main():
       final_message = "; ".join(messages) if messages else "SYSTEM OK"
 
     my_logger.info("EXIT CODE: {}, {}".format(EXIT_CODE, final_message))
-    status.update({EXIT_CODE : final_message})
-    print (message)
+    print (final_message)
     my_logger.info("Writing to JSON file")
-    write_data('status.json', status, LOGGER_NAME) # This could go to the end to include EXIT_CODE and output message              
+    if priority_scan:
+      write_verdict(EXIT_CODE, final_message, provisional=False) # replaces the provisional verdict, if any
+    else:
+      status.update({EXIT_CODE : final_message})
+      status_file.write() # This could go to the end to include EXIT_CODE and output message              
     return exit (EXIT_CODE)
 
+def expected_receiver_cards(config, found=None):
+   # Receiver cards the display should have ("receiver_cards" in config.json). Without one, found (the count
+   # found, so none is reported missing) or None
+   return config.get("receiver_cards", found)
+
+def critical_messages(results, config):
+# ---------------------------------------------------------------------------------------
+# CRITICAL FINDINGS OF THE PRIORITY SCAN
+# The faults among the critical checks (scan_critical) of every sender card, worded as
+# in the final verdict. An empty list means nothing critical was found.
+# ---------------------------------------------------------------------------------------
+   results = [result for result in results if result["connected"]]
+   messages = []
+   if any(result["DVI"] != "Valid" for result in results):
+      messages.append("DVI SIGNAL MISSING")
+   receiver_cards = sum(sum(result["receivers_per_lan_port"].values()) for result in results)
+   expected = expected_receiver_cards(config, receiver_cards)
+   if receiver_cards < expected:
+      messages.append(f"RECEIVER CARD(S) MISSING - {expected} EXPECTED, {receiver_cards} FOUND")
+   if not all(result["display_on"] for result in results):
+      messages.append("ONE OR MORE CABINETS OFF")
+   if any(isinstance(result["brightness_pc"], int) and result["brightness_pc"] <= 0 for result in results):
+      messages.append("DISPLAY BRIGHTNESS IS 0")
+   return messages
+
+def write_verdict(exit_code, message, provisional):
+# ---------------------------------------------------------------------------------------
+# PRIORITY SCAN VERDICT
+# Writes status.json with the verdict so far ("verdict": "provisional" until the scan has
+# finished) and "display_status=<exit code>" to monitor_log.log, as the monitoring checks
+# write their alarms (base_monitoring.py).
+# ---------------------------------------------------------------------------------------
+   for code in (GOOD, WARNING, CRITICAL, UNKNOWN):
+      status.pop(code, None) # earlier verdict
+   status.update({exit_code: message, "verdict": "provisional" if provisional else "final"})
+   status_file.write()
+   with open("monitor_log.log", "w") as log:
+      log.write(f"display_status={exit_code}\n")
+
+def scan_critical(device_number, serial_port, baudrate, pipeline_window, topology=None):
+# ---------------------------------------------------------------------------------------
+# CRITICAL CHECKS OF ONE SENDER CARD (priority scan)
+# Reads what a critical verdict depends on before any telemetry: the sender card model
+# (number of LAN ports), DVI signal, display brightness, the receiver cards on each LAN
+# port and the kill mode of every receiver card, pipelined. The result is handed to
+# scan_sender_card(), which does not read these again.
+# ---------------------------------------------------------------------------------------
+   global ser, link, no_of_receiver_cards, lan_port
+   my_logger = logging.getLogger(LOGGER_NAME)
+   result = {"port": serial_port, "connected": False}
+   topology = topology or {}
+   my_logger.info("*******************    DEVICE {} (critical checks)   *******************".format(device_number))
+   ser = methods.setupSerialPort(baudrate, LOGGER_NAME)
+   ser.port = serial_port
+   try:
+      ser.open()
+   except Exception as e:
+      my_logger.error(f"Error opening serial port: {serial_port} - {str(e)} on baudrate: {baudrate}")
+      return result
+   link = transport.Pipeline(ser, pipeline_window, sleep_time, LOGGER_NAME)
+   status[serial_port] = {"sender_card_rx_port": {}}
+   model = get_sender_card_model(serial_port)
+   DVI = get_DVI_signal_status(serial_port)
+   brightness_pc, brightness = get_display_brightness(serial_port)
+   receivers_per_lan_port = {}
+   kill_replies = {}
+   display_on = True
+   for lan_port in range(4 if model == "MSD600/MCTRL600/MCTRL610/MCTRL660" else 2):
+      receivers_per_lan_port[lan_port] = receiver_search.count_receivers(lambda index: get_receiver_present(serial_port, index), mode=receiver_discovery,
+                                                                         expected=topology.get(lan_port))
+      kill_replies[lan_port] = link.transact_many([FRAMES.build("kill_mode", lan_port, receiver) for receiver in range(receivers_per_lan_port[lan_port])])
+      receiver_cards = status[serial_port]["sender_card_rx_port"].setdefault(lan_port, {}).setdefault("receiverCard", {})
+      for no_of_receiver_cards, reply in enumerate(kill_replies[lan_port]):
+         receiver_cards[no_of_receiver_cards] = {}
+         display_on = get_cabinet_kill_mode(serial_port, lan_port, reply) and display_on
+   ser.close()
+   result.update({
+      "connected": True,
+      "status": {key: value for key, value in status[serial_port].items() if key != "sender_card_rx_port"},
+      "model": model,
+      "DVI": DVI,
+      "brightness_pc": brightness_pc,
+      "display_on": display_on,
+      "receivers_per_lan_port": receivers_per_lan_port,
+      "kill_mode": kill_replies,
+      "pipeline_window": link.window # 1 if the sender card dropped pipelined requests
+   })
+   return result
+
+def scan_sender_card(device_number, serial_port, baudrate, pipeline_window, topology=None, schedule=None, critical=None,
+                     deadline=None, cursor=None):
+# ---------------------------------------------------------------------------------------
+# SCAN ONE SENDER CARD
+# Opens its own serial handle on serial_port and queries the sender card and every
+# receiver card connected to it. topology holds the receiver card count of each LAN port
+# found by the previous scan (topology_cache.py), schedule the last run of each receiver
+# card check (check_schedule.py); only the checks due are run. critical is the result of
+# scan_critical() for this sender card in a priority scan, whose reads are not repeated.
+# With a deadline (time.time()), no receiver card check is started after it; the check
+# that would have run next is returned as result["cursor"] (scan_cursor.py) and, given
+# back as cursor, is where the next scan starts.
+# Returns the sender card's status.json entry together with the values main() checks the
+# display against.
+# ---------------------------------------------------------------------------------------
+   global ser, link, no_of_receiver_cards, receiver_card_found, number_of_modules, lan_port
+   my_logger = logging.getLogger(LOGGER_NAME)
+   schedule = schedule if schedule is not None else {}
+   result = {"port": serial_port, "connected": False, "receivers_per_lan_port": {}, "check_schedule": schedule, "cursor": None}
+   topology = topology or {}
+   number_of_modules = 0
+   my_logger.info("*******************    DEVICE {}   *******************".format(device_number))
+   my_logger.info("Connecting to device on {}".format(serial_port))
+   ser.port = serial_port
+   #Below has been heavily modified for config writer - This will attempt to open the serial port with both Baud Rates. Sucessfuly opening will result in the Baud rate being saved in the config file.
+
+   try:
+      my_logger.debug(f"Attempting to open serial port: {serial_port} on baudrate: {baudrate}")
+      ser = methods.setupSerialPort(baudrate, LOGGER_NAME)  # Re-initialize serial port with the new baudrate
+      ser.port = serial_port  # Set the serial port to the current valid port
+      ser.open()  # Attempt to open the port
+
+      if ser.isOpen():
+         my_logger.info(f"Successfully connected on {serial_port} with baudrate {baudrate}")
+         status[serial_port] = {}
+         status[serial_port].update({"baudrate": baudrate})
+         status[serial_port]["sender_card_rx_port"]={}
+         try:
+            ser.flushInput() #flush input buffer, discarding all its contents
+            ser.flushOutput() #flush output buffer, aborting current output and discard all that is in buffer
+            my_logger.info("Opened device on port: " + ser.name) # remove at production
+         except Exception as e1:
+            my_logger.error("Error opening serial port: " + str(e))
+
+      else:
+         my_logger.error("Error communicating with device: " + ser.name)
+         return result
+
+   except Exception as e:
+      my_logger.error(f"Error opening serial port: {serial_port} - {str(e)} on baudrate: {baudrate}")
+      return result
+   link = transport.Pipeline(ser, pipeline_window, sleep_time, LOGGER_NAME)
+   # -------------------------------------
+   # RETRIEVE PARAMETERS FROM SENDER CARDS
+   # -------------------------------------
+   if critical is None:
+      model = get_sender_card_model(serial_port)
+   else: # model, DVI signal and display brightness were read by scan_critical()
+      model = critical["model"]
+      status[serial_port].update(critical["status"])
+   get_sender_card_firmware_version(serial_port)
+   if critical is None:
+      get_display_brightness(serial_port)
+   function_card_model = get_function_card(serial_port)
+   if (function_card_model != "N/A"): # this has changed since v104 where only MFN300(B) was contemplated
+         get_ambient_light_level_via_function_card(serial_port)
+   else:
+         get_ambient_light_level_direct(serial_port)
+   get_ALS_mode_status(serial_port)
+   get_ALS_mode_settings(serial_port)
+   DVI = get_DVI_signal_status(serial_port) if critical is None else critical["DVI"]
+   # ONLY FOR MSD600/MSD600/MCTRL600/MCTRL610
+   if (model == "MSD600/MCTRL600/MCTRL610/MCTRL660"):
+         get_input_source_mode(serial_port)
+         get_input_source_selected(serial_port)
+         get_input_source_status(serial_port)
+   get_cabinet_width(serial_port) # TO CHECK IF THESE SHOULD BE AT CABINET LEVEL
+   get_cabinet_height(serial_port) # TO CHECK IF THESE SHOULD BE AT CABINET LEVEL
+   get_edid(serial_port) #TODO
+   get_redundant_status(serial_port)   
+   #get_test_mode(serial_port) #TODO
+   #get_calibration_mode(serial_port) #TODO
+   # -------------------------------------
+   receiver_card_found = True
+   no_of_receiver_cards = 0
+   total_reciever_cards = 0
+   status[serial_port]["receiverCard"]={}
+   display_on = True
+   brightness_pc = 0
+   ##############################################################################################
+   # CODE BELOW SHOULD BE INSIDE A FOR LOOP
+   # THIS IS TO MAKE SURE EACH PORT OF THE SENDER CARD IS CHECKED
+   # FOR MCTRL600/610 THESE ARE 4 PORTS
+   # FOR MCTRL300 THESE ARE ONLY 2
+   # ANY RECEIVER CARDS CONNECTED TO PORTS 1-4 SHOULD RESPOND WITH DATA - IF NOT, EITHER NOTHING ATTACHED OR ERROR
+   # - Index should be passed into function as parameter
+   # - New command should be created accounting for different data port number
+   ##############################################################################################
+   tx_ports_connected = []
+   if (model == "MSD600/MCTRL600/MCTRL610/MCTRL660"):
+      no_of_rxcardports = 4
+   else:
+      no_of_rxcardports = 2
+   port_range = range(no_of_rxcardports)
+   try:
+      # sender_output_port represents the RJ45 Port on the sender card
+      for sender_output_port in port_range:
+         no_of_receiver_cards = 0
+         status[serial_port]["sender_card_rx_port"][sender_output_port]={}
+         status[serial_port]["sender_card_rx_port"][sender_output_port]["receiverCard"]={}
+         my_logger.debug(f"Port Value: {sender_output_port} - Port Range: {port_range} - Reciever card number: {no_of_receiver_cards}")
+         receiver_card_found = True
+
+         lan_port = sender_output_port
+         if critical is not None:
+            receivers_connected = critical["receivers_per_lan_port"][sender_output_port]
+         else:
+            receivers_connected = receiver_search.count_receivers(lambda index: get_receiver_present(serial_port, index), mode=receiver_discovery,
+                                                                  expected=topology.get(sender_output_port))
+         result["receivers_per_lan_port"][sender_output_port] = receivers_connected
+         my_logger.info(f"Sender Card Port: {sender_output_port}: {receivers_connected} receiver card(s) connected")
+
+         for no_of_receiver_cards in range(receivers_connected):
+            my_logger.info("=======================================================================")
+            my_logger.debug(f"*********** Sender Card Port: {sender_output_port}: Reciever Number: {no_of_receiver_cards} ***********")   
+            # ---------------------------------------
+            # RETRIEVE PARAMETERS FROM RECEIVER CARDS
+            # ---------------------------------------
+            receiver_status = status[serial_port]["sender_card_rx_port"][sender_output_port]["receiverCard"][no_of_receiver_cards]={}
+            receiver_schedule = check_schedule.receiver_entry(schedule, sender_output_port, no_of_receiver_cards)
+            due = check_schedule.due_checks(receiver_schedule, check_cadence, RECEIVER_COMMANDS)
+            if cursor is not None: # resumed scan: the checks before the cursor were run by the last one
+               due = [name for name in due if (sender_output_port, no_of_receiver_cards, RECEIVER_COMMANDS.index(name)) >= scan_cursor.position(cursor, RECEIVER_COMMANDS)]
+            if result["cursor"] is None and due and out_of_time(deadline):
+               result["cursor"] = scan_cursor.cursor_at(sender_output_port, no_of_receiver_cards, due[0])
+               my_logger.info(f"Scan budget used up, the next scan starts at LAN port {sender_output_port}, receiver card {no_of_receiver_cards} ({due[0]})")
+            if result["cursor"] is not None: # out of time, results of earlier scans are used from here on
+               due = []
+            # replies already read by scan_critical() count as a run of their check
+            known = {"kill_mode": critical["kill_mode"][sender_output_port][no_of_receiver_cards]} if critical is not None else {}
+            due += [name for name in known if name not in due]
+            reads = [name for name in due if name not in known]
+            # prefetched when pipelining or coalescing, or so that reads inside the monitoring block come from its reply
+            replies = prefetch_receiver_data(serial_port, reads) if reads and (link.window > 1 or coalesce_gap is not None or "check_monitoring" in reads) else {}
+            replies.update(known)
+            checks = {
+               "check_receiver_model": get_receiver_card_model, #not necessary 
+               "check_receiver_fw": get_receiver_card_firmware, #not necessary 
+               "kill_mode": get_cabinet_kill_mode,
+               "get_brightness": get_receiver_brightness, #required
+               "check_monitoring": get_receiver_temp_voltage, #not necessary 
+               "lock_mode": get_cabinet_lock_mode, #required
+               "check_module_status": get_module_status,
+            }
+            #get_gamma_value(serial_port) #not necessary
+            values = {}
+            for command_name in RECEIVER_COMMANDS:
+               if command_name in due and command_name not in replies and result["cursor"] is None and out_of_time(deadline):
+                  result["cursor"] = scan_cursor.cursor_at(sender_output_port, no_of_receiver_cards, command_name)
+                  my_logger.info(f"Scan budget used up, the next scan starts at LAN port {sender_output_port}, receiver card {no_of_receiver_cards} ({command_name})")
+               if command_name in due and (command_name in replies or result["cursor"] is None):
+                  before = dict(receiver_status)
+                  values[command_name] = checks[command_name](serial_port, sender_output_port, replies.get(command_name))
+                  written = {key: value for key, value in receiver_status.items() if key not in before or before[key] != value}
+                  check_schedule.record(receiver_schedule, command_name, written, values[command_name])
+               elif command_name in receiver_schedule: # not due yet (or out of time), use the result of its last run
+                  receiver_status.update(receiver_schedule[command_name]["status"])
+                  values[command_name] = receiver_schedule[command_name]["value"]
+               if command_name in receiver_schedule:
+                  receiver_status.setdefault("lastChecked", {})[command_name] = checked_at(receiver_schedule[command_name]["last_run"])
+            my_logger.debug(f"Checks run: {due}, results of earlier scans used for the others")
+            # every cabinet must be on, as in scan_critical(); a check that has never been run on this receiver card
+            # (budgeted scan) leaves the verdict as it is
+            display_on = values.get("kill_mode", True) and display_on
+            if "get_brightness" in values:
+               brightness_pc, brightness, red, green, blue, vRed = values["get_brightness"]
+            if "check_module_status" in values:
+               number_of_modules = values["check_module_status"][0]
+            #################################################################################################
+            total_reciever_cards = total_reciever_cards + 1
+            ##############################################################################################
+      # ---------------------------------------------------------------------
+      # MODULE FLASH - only when scheduled in check_cadence, on every receiver
+      # card due at the same time (see get_module_flash)
+      # ---------------------------------------------------------------------
+      if "module_flash" in check_cadence:
+         flash_due = []
+         for sender_output_port, receivers_connected in result["receivers_per_lan_port"].items():
+            for receiver in range(receivers_connected):
+               receiver_schedule = check_schedule.receiver_entry(schedule, sender_output_port, receiver)
+               receiver_status = status[serial_port]["sender_card_rx_port"][sender_output_port]["receiverCard"][receiver]
+               if check_schedule.due_checks(receiver_schedule, check_cadence, ["module_flash"]) and not out_of_time(deadline):
+                  flash_due.append((sender_output_port, receiver))
+               elif "module_flash" in receiver_schedule:
+                  receiver_status.update(receiver_schedule["module_flash"]["status"])
+                  receiver_status.setdefault("lastChecked", {})["module_flash"] = checked_at(receiver_schedule["module_flash"]["last_run"])
+         for (sender_output_port, receiver), value in get_module_flash(serial_port, flash_due).items():
+            receiver_status = status[serial_port]["sender_card_rx_port"][sender_output_port]["receiverCard"][receiver]
+            receiver_schedule = check_schedule.receiver_entry(schedule, sender_output_port, receiver)
+            check_schedule.record(receiver_schedule, "module_flash", {"moduleFlash": receiver_status["moduleFlash"]}, value)
+            receiver_status.setdefault("lastChecked", {})["module_flash"] = checked_at(receiver_schedule["module_flash"]["last_run"])
+   except Exception as e:
+      my_logger.error(f"An error has occurred connecting to the Reciever Card: {str(e)}")
+
+
+   my_logger.debug(f"Number of Reciever Cards = {total_reciever_cards}")
+   ser.close()
+   result.update({
+      "connected": True,
+      "status": status[serial_port],
+      "DVI": DVI,
+      "display_on": display_on,
+      "brightness_pc": brightness_pc,
+      "receiver_cards": total_reciever_cards,
+      "number_of_modules": number_of_modules,
+      "pipeline_window": link.window # 1 if the sender card dropped pipelined requests
+   })
+   return result
+
+def init_scan_worker(config, scan_time):
+# ---------------------------------------------------------------------------------------
+# SCAN WORKER SET UP
+# Worker processes have their own copy of the module globals (serial handle, status,
+# command templates), so sender cards can be scanned side by side without sharing state.
+# ---------------------------------------------------------------------------------------
+   global sleep_time, flash_wait_time, coalesce_gap, receiver_discovery, check_cadence, module_flash_broadcast, last_updated, status, ser
+   methods.get_logger(LOGGER_NAME, LOG_FILE, FORMATTER, LOGGER_SCHEDULE, LOGGER_INTERVAL, LOGGER_BACKUPS)
+   ser = methods.setupSerialPort(config["baudrate"], LOGGER_NAME)
+   sleep_time = config["sleep_time"]
+   flash_wait_time = config["flash_wait_time"]
+   coalesce_gap = config.get("coalesce_gap")
+   receiver_discovery = config.get("receiver_discovery", receiver_search.SEARCH)
+   check_cadence = config.get("check_cadence", {})
+   module_flash_broadcast = config.get("module_flash_broadcast", False)
+   last_updated = scan_time
+   status = {}
+
+def scan_worker(scan):
+   return scan_sender_card(*scan)
+
+def out_of_time(deadline):
+   # True once the time budget of a budgeted scan (--budget) has been used up
+   return deadline is not None and time.time() >= deadline
+
+def checked_at(timestamp):
+   # Time a receiver card check was run, as shown in status.json ("lastChecked")
+   return datetime.datetime.fromtimestamp(timestamp).strftime("%d/%m/%Y %H:%M:%S")
+
 # ------------------------------------------------------------------------------------------------------------
 # SHARED FUNCTIONS
 # ------------------------------------------------------------------------------------------------------------
@@ -359,45 +690,29 @@ def search_devices(): # Searches for all sender cards connected to each USB port
     logger.info("Found {} serial ports".format(len(ports)))
     device_found = 0
     valid_ports = []
-    for port, desc, hwid in sorted(ports):
-         logger.info("Searching sender card on port: " + port)
-         ser.port = port
-         try: 
-               ser.open()
-         except Exception as e:
-               logger.error(str(e))
-         if ser.isOpen():
-               logger.info("{} opened".format(port)) # remove at production
-               try:
-                  ser.flushInput() # flush input buffer, discarding all its contents
-                  ser.flushOutput() # flush output buffer, aborting current output and discard all that is in buffer
-                  ser.write (COMMANDS["connection"]) # send CONNECTION command to check whether any devices are connected
-                  logger.debug("Sending command: " + ' '.join('{:02X}'.format(a) for a in COMMANDS["connection"]))
-                  time.sleep (sleep_time) # allow some time for the device to respond        
-                  if ser.inWaiting()>0: # there should be something at the serial input
-                     response = ser.read(size=ser.inWaiting()) # read all the data available
-                     rx_data = list(response)
-                     logger.debug("Received data:"+' '.join('{:02X}'.format(a) for a in rx_data))
-                     if check_response(rx_data):                        
-                        if (rx_data[18]!=0 or rx_data [19]!=0): # if ACKNOWLEDGE data is not equal to zero then a device is connected
-                              # **********************************************************
-                              status[port] = {} 
-                              status[port]["lastUpdated"] = last_updated
-                              status[port]["connectedControllers"] = device_found
-                              status[port]["targetPort"] = port
-                              status[port]["controllerDescription"] = desc
-                              status[port]["controllerHardware"] = hwid
-                              # **********************************************************
-                              device_found =  device_found + 1
-                              connected_port = port
-                              valid_ports.append(port)
-                              logger.info("Device found on port: {} | {} | {}".format(port, desc, hwid))                       
-                        else:
-                              logger.info("Device not connected")
-               except Exception as e1:
-                  logger.error("Error communicating with device: " + str(e1))
-               ser.close()
-               logger.info("{} closed".format(port)) # remove at production?
+    ports = discovery.candidate_ports(ports, LOGGER_NAME)
+    replies = discovery.probe_ports(ports, ser.baudrate, FRAMES.build("connection"), sleep_time, LOGGER_NAME) # probe all ports at once
+    for port, desc, hwid in ports:
+       response = replies.get(port)
+       if response: # there should be something at the serial input
+          rx_data = list(response)
+          logger.debug("Received data:"+' '.join('{:02X}'.format(a) for a in rx_data))
+          if check_response(rx_data):                        
+             if (rx_data[18]!=0 or rx_data [19]!=0): # if ACKNOWLEDGE data is not equal to zero then a device is connected
+                   # **********************************************************
+                   status[port] = {} 
+                   status[port]["lastUpdated"] = last_updated
+                   status[port]["connectedControllers"] = device_found
+                   status[port]["targetPort"] = port
+                   status[port]["controllerDescription"] = desc
+                   status[port]["controllerHardware"] = hwid
+                   # **********************************************************
+                   device_found =  device_found + 1
+                   connected_port = port
+                   valid_ports.append(port)
+                   logger.info("Device found on port: {} | {} | {}".format(port, desc, hwid))                       
+             else:
+                   logger.info("Device not connected")
     logger.info("Found {} device(s)".format(device_found))
     return device_found, valid_ports
 
@@ -437,12 +752,9 @@ def get_sender_card_model(port):
 # -----------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting sender card model")
-   sender_model_send = methods.checksum(COMMANDS["sender_model"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in sender_model_send))
-   ser.write (sender_model_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   sender_model_send = FRAMES.build("sender_model")
+   response = transport.transact(ser, sender_model_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -475,12 +787,9 @@ def get_sender_card_firmware_version(port):
 # -----------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting device firmware version")
-   sender_firmware_send = methods.checksum(COMMANDS["sender_firmware"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in sender_firmware_send))
-   ser.write (sender_firmware_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   sender_firmware_send = FRAMES.build("sender_firmware")
+   response = transport.transact(ser, sender_firmware_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -502,12 +811,9 @@ def get_input_source_mode(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting input source mode")
-   input_source_status_send = methods.checksum(COMMANDS["input_source_status"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in input_source_status_send))
-   ser.write (input_source_status_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   input_source_status_send = FRAMES.build("input_source_status")
+   response = transport.transact(ser, input_source_status_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -532,12 +838,9 @@ def get_input_source_selected(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting input source port selected")
-   current_input_source_send = methods.checksum(COMMANDS["current_input_source"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in current_input_source_send))
-   ser.write (current_input_source_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   current_input_source_send = FRAMES.build("current_input_source")
+   response = transport.transact(ser, current_input_source_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -578,12 +881,9 @@ def get_input_source_status(port):
   #**** TO CHECK ******
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting input source status")
-   input_source_port_send = methods.checksum(COMMANDS["input_source_port"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in input_source_port_send))
-   ser.write (input_source_port_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   input_source_port_send = FRAMES.build("input_source_port")
+   response = transport.transact(ser, input_source_port_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -633,11 +933,8 @@ def get_DVI_signal_status(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting DVI signal")
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in COMMANDS["check_DVI_signal"]))
-   ser.write (COMMANDS["check_DVI_signal"])
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, FRAMES.build("check_DVI_signal"), sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -666,12 +963,9 @@ def get_ALS_mode_status(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting automatic brightness mode")
-   check_auto_bright_send = methods.checksum(COMMANDS["check_auto_bright"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_auto_bright_send))
-   ser.write (check_auto_bright_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   check_auto_bright_send = FRAMES.build("check_auto_bright")
+   response = transport.transact(ser, check_auto_bright_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -697,12 +991,9 @@ def get_ALS_mode_settings(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting Automatic Brightness Settings...[TO CHECK]")
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in COMMANDS["auto_brightness_settings"]))
-   auto_brightness_settings_send = methods.checksum(COMMANDS["auto_brightness_settings"])
-   ser.write (auto_brightness_settings_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   auto_brightness_settings_send = FRAMES.build("auto_brightness_settings")
+   response = transport.transact(ser, auto_brightness_settings_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -769,12 +1060,9 @@ def get_ambient_light_level_direct(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting ambient light level directly from controller")
-   check_ALS_send = methods.checksum(COMMANDS["check_ALS_direct"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_ALS_send))
-   ser.write (check_ALS_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   check_ALS_send = FRAMES.build("check_ALS_direct")
+   response = transport.transact(ser, check_ALS_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -804,23 +1092,17 @@ def get_ambient_light_level_via_function_card(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Refreshing function card register")
-   refresh_function_send = methods.checksum(COMMANDS["function_card_refresh_register"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in refresh_function_send))
-   ser.write (refresh_function_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   refresh_function_send = FRAMES.build("function_card_refresh_register")
+   response = transport.transact(ser, refresh_function_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
    else:
          logger.warning("No data available at the input buffer")
    logger.info("Getting ambient light level from function card")
-   check_ALS_send = methods.checksum(COMMANDS["check_ALS_function"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_ALS_send))
-   ser.write (check_ALS_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   check_ALS_send = FRAMES.build("check_ALS_function")
+   response = transport.transact(ser, check_ALS_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -845,11 +1127,8 @@ def get_brightness_levels(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting current screen brightness...[TO CHECK]")
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in COMMANDS["get_brightness"]))
-   ser.write (COMMANDS["get_brightness"])
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   response = transport.transact(ser, FRAMES.build("get_brightness"), sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -893,12 +1172,9 @@ def get_cabinet_width(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting cabinet width...")
-   check_cabinet_width_send = methods.checksum (COMMANDS["check_cabinet_width"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_cabinet_width_send))
-   ser.write (check_cabinet_width_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   check_cabinet_width_send = FRAMES.build("check_cabinet_width")
+   response = transport.transact(ser, check_cabinet_width_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -918,12 +1194,9 @@ def get_cabinet_height(port):
 # ---------------------------------------------------------------------------------------   
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting cabinet height...")
-   check_cabinet_height_send = methods.checksum (COMMANDS["check_cabinet_height"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_cabinet_height_send))
-   ser.write (check_cabinet_height_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   check_cabinet_height_send = FRAMES.build("check_cabinet_height")
+   response = transport.transact(ser, check_cabinet_height_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -944,12 +1217,9 @@ def get_receiver_connected(port):
    logger = logging.getLogger(LOGGER_NAME)
    global receiver_card_found
    global no_of_receiver_cards
-   COMMANDS["check_receiver_model"][8] = no_of_receiver_cards
-   check_receiver_model_send = methods.checksum (COMMANDS["check_receiver_model"])
-   ser.write (check_receiver_model_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   check_receiver_model_send = FRAMES.build("check_receiver_model", lan_port, no_of_receiver_cards)
+   response = transport.transact(ser, check_receiver_model_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -961,18 +1231,23 @@ def get_receiver_connected(port):
       receiver_card_found = False
    return receiver_card_found
 
-def get_receiver_card_model(port, sender_output_port):
+def get_receiver_present(port, index):
+   # Probe for receiver card `index` on the current LAN port (receiver_search.count_receivers)
+   global no_of_receiver_cards
+   no_of_receiver_cards = index
+   if not get_receiver_connected(port):
+      logging.getLogger(LOGGER_NAME).info(f"Receiver card {index} not connected.")
+   return receiver_card_found
+
+def get_receiver_card_model(port, sender_output_port, response=None):
    global no_of_receiver_cards
    global receiver_card_found
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting receiver card model")
-   COMMANDS["check_receiver_model"][8] = no_of_receiver_cards
-   check_receiver_model_send = methods.checksum (COMMANDS["check_receiver_model"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_receiver_model_send))
-   ser.write (check_receiver_model_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   check_receiver_model_send = FRAMES.build("check_receiver_model", lan_port, no_of_receiver_cards)
+   if response is None:
+      response = transport.transact(ser, check_receiver_model_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1008,23 +1283,20 @@ def get_receiver_card_model(port, sender_output_port):
       logger.warning("No data available at the input buffer")
       receiver_card_found = False
 
-   status[port]["sender_card_rx_port"][sender_output_port]["receiverCard"][no_of_receiver_cards] = {"receiverModel": model}
+   status[port]["sender_card_rx_port"][sender_output_port]["receiverCard"][no_of_receiver_cards].update({"receiverModel": model})
    return (model)
 
-def get_receiver_card_firmware(port, sender_output_port):
+def get_receiver_card_firmware(port, sender_output_port, response=None):
 # ---------------------------------------------------------------------------------------
 # RECEIVER CARD FW VERSION
 # ---------------------------------------------------------------------------------------
    global no_of_receiver_cards
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting receiver card firmware")
-   COMMANDS["check_receiver_fw"][8] = no_of_receiver_cards
-   check_receiver_fw_send = methods.checksum (COMMANDS["check_receiver_fw"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_receiver_fw_send))
-   ser.write (check_receiver_fw_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   check_receiver_fw_send = FRAMES.build("check_receiver_fw", lan_port, no_of_receiver_cards)
+   if response is None:
+      response = transport.transact(ser, check_receiver_fw_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list(response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
@@ -1034,12 +1306,12 @@ def get_receiver_card_firmware(port, sender_output_port):
    else:
          logger.warning("No data available at the input buffer")
          FPGA="N/A"
-   status[port]["sender_card_rx_port"][sender_output_port]["receiverCard"][no_of_receiver_cards] = {"receiverFPGA": FPGA}
+   status[port]["sender_card_rx_port"][sender_output_port]["receiverCard"][no_of_receiver_cards].update({"receiverFPGA": FPGA})
    logger.info('Receiver Card FPGA Firmware version: {}'.format(FPGA))
 
    return (FPGA)
 
-def get_receiver_temp_voltage(port, sender_output_port):
+def get_receiver_temp_voltage(port, sender_output_port, response=None):
 # ---------------------------------------------------------------------------------------
 # CHECK TEMPERATURE, VOLTAGE & MONITORING
 # Retrieve data for receiver cards
@@ -1058,45 +1330,41 @@ def get_receiver_temp_voltage(port, sender_output_port):
    global no_of_receiver_cards
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting receiver card monitoring, temperature and voltage")
-   COMMANDS["check_monitoring"][8] = no_of_receiver_cards
-   check_monitoring_send = methods.checksum (COMMANDS["check_monitoring"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_monitoring_send))
-   ser.write(check_monitoring_send)
-   time.sleep(sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   check_monitoring_send = FRAMES.build("check_monitoring", lan_port, no_of_receiver_cards)
+   if response is None:
+      response = transport.transact(ser, check_monitoring_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list (response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
-            if ((rx_data[18] & 0x80))==0x80:
-               if (rx_data[18]&0x1)==0:
-                  sign = ""
-               else:
-                  sign = "-"
-               logger.info("Temperature (valid): {}{:.1f}°C ({})".format(sign,(rx_data[19]&0xFE)*0.5,hex(rx_data[19])))
+            # every field of the block in one pass (see monitoring_block.py)
+            monitoring = monitoring_block.decode(rx_data)
+            if monitoring.temperature_valid:
+               logger.info("Temperature (valid): {:.1f}°C ({})".format(monitoring.temperature,hex(rx_data[19])))
                temp_valid="Yes"
-               temperature = sign+str((rx_data[19]&0xFE)*0.5)
-               temperature = round(float(temperature), 2)
+               temperature = monitoring.temperature
             else:
                logger.info ("Temperature data invalid")
                temp_valid="No"
                temperature="N/A"
             
-            if ((rx_data[21]) & 0x80)==0x80:
-               logger.info("Voltage (valid): {:.1f}V ({})".format(0.1*(rx_data[21]&0x7F),hex(rx_data[21])))
+            if monitoring.voltage_valid:
+               logger.info("Voltage (valid): {:.1f}V ({})".format(monitoring.voltage,hex(rx_data[21])))
                voltage_valid="Yes"
-               voltage=0.1*(rx_data[21]&0x7F)
-               voltage = round(float(voltage), 2)#
+               voltage = monitoring.voltage
             else:
                logger.info ("Voltage data invalid")
                voltage_valid="No"
                voltage="N/A"
 
-            if (rx_data[50]==0xFF):
-               logger.info ("Monitoring card available ({})".format(hex(rx_data[50])))
+            if monitoring.monitoring_card:
+               logger.info ("Monitoring card available")
                monitoring_card="Yes"
+               # the ribbon cable flags are part of the block, only meaningful with a monitoring card
+               ribbon_cable_send = FRAMES.build("ribbon_cable", lan_port, no_of_receiver_cards)
+               get_ribbon_cable_status(port, sender_output_port, monitoring_block.slice_reply(check_monitoring_send, response, ribbon_cable_send))
             else:
-               logger.info ("Monitoring card unavailable ({})".format(hex(rx_data[50])))
+               logger.info ("Monitoring card unavailable")
                monitoring_card="No"
          else:
             temp_valid="N/A"
@@ -1121,7 +1389,7 @@ def get_receiver_temp_voltage(port, sender_output_port):
 
    return (temp_valid, temperature, voltage_valid, voltage)
 
-def get_cabinet_kill_mode(port, sender_output_port):
+def get_cabinet_kill_mode(port, sender_output_port, response=None):
 #-------------------------------------------------------------------------
 # CHECK KILL MODE (CABINET STATUS)
 # This is essentially information about whether the display is ON or OFF
@@ -1129,13 +1397,10 @@ def get_cabinet_kill_mode(port, sender_output_port):
    global no_of_receiver_cards
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting cabinet kill mode (on/off)")
-   COMMANDS["kill_mode"][8] = no_of_receiver_cards
-   kill_mode_send = methods.checksum(COMMANDS["kill_mode"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in kill_mode_send))
-   ser.write (kill_mode_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   kill_mode_send = FRAMES.build("kill_mode", lan_port, no_of_receiver_cards)
+   if response is None:
+      response = transport.transact(ser, kill_mode_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list(response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
@@ -1164,20 +1429,17 @@ def get_cabinet_kill_mode(port, sender_output_port):
    status[port]["sender_card_rx_port"][sender_output_port]["receiverCard"][no_of_receiver_cards].update({"kill": kill})
    return cabinet_on
 
-def get_cabinet_lock_mode(port, sender_output_port):
+def get_cabinet_lock_mode(port, sender_output_port, response=None):
 #----------------------------------------------------------
 # CHECK LOCK MODE
 #----------------------------------------------------------
    global no_of_receiver_cards
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting cabinet lock mode (normal/locked)")
-   COMMANDS["lock_mode"][8] = no_of_receiver_cards
-   lock_mode_send = methods.checksum(COMMANDS["lock_mode"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in lock_mode_send))
-   ser.write (lock_mode_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   lock_mode_send = FRAMES.build("lock_mode", lan_port, no_of_receiver_cards)
+   if response is None:
+      response = transport.transact(ser, lock_mode_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list(response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
@@ -1210,12 +1472,9 @@ def get_gamma_value(port):
    global no_of_receiver_cards
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting cabinet gamma value")
-   gamma_value_send = methods.checksum(COMMANDS["gamma_value"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in gamma_value_send))
-   ser.write (gamma_value_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   gamma_value_send = FRAMES.build("gamma_value")
+   response = transport.transact(ser, gamma_value_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list(response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
@@ -1228,102 +1487,109 @@ def get_gamma_value(port):
    logger.info ("Gamma Value: {}".format(gamma))
    status[port]["receiverCard"][no_of_receiver_cards]["gamma"]=gamma
 
-def get_module_flash(port,  modules_ok):
+def get_module_flash(port, receivers):
 #-----------------------------------------------------------------
 # MODULE FLASH CHECK
 # https://www.youtube.com/watch?v=-h26LV6cIwc - Novastar Memory on Module
 # https://www.youtube.com/watch?v=W7U5sa4lxFY - NovaLCT Performance Settings and Receiving Card Configuration Files
 # https://www.youtube.com/watch?app=desktop&v=XQJlwXRE5rE&fbclid=IwAR2dWGKc2lAKW4E-qGxyRxprmdLnaWo52XoPRNXpSX8GQNmv_QIyP9RTyKI - Smart settings for a regular module
+# Two passes over every receiver card in receivers ([(sender_output_port, receiver)]):
+# the module flash check is started on all of them, flash_wait_time is waited once, then
+# all of them are read back. The wait no longer grows with the number of receiver cards.
+# With module_flash_broadcast set, the check is started with one broadcast per LAN port.
+# Returns {(sender_output_port, receiver): (number_of_modules, modules_ok)}
 #---------------------------------------------------------------------------------------
-   global no_of_receiver_cards
    logger = logging.getLogger(LOGGER_NAME)
-   logger.info("Sending module flash request and wait")
-   COMMANDS["start_check_module_flash"][8] = no_of_receiver_cards
-   start_check_module_flash_send = methods.checksum(COMMANDS["start_check_module_flash"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in start_check_module_flash_send))
-   ser.write (start_check_module_flash_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
-         rx_data = list (response)
-         logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
-         if check_response(rx_data):
-            time.sleep(flash_wait_time) # this may have to be more than 1 second and perhaps minuimum 20s
-         else:
-            logger.error('ERROR')
+   if not receivers:
+      return {}
+   logger.info("Sending module flash request to {} receiver card(s) and wait".format(len(receivers)))
+   started = False
+   if module_flash_broadcast:
+      for sender_output_port in sorted({sender_output_port for sender_output_port, receiver in receivers}):
+         start_check_module_flash_send = FRAMES.build("start_check_module_flash", sender_output_port, BROADCAST)
+         response = transport.transact(ser, start_check_module_flash_send, sleep_time, LOGGER_NAME)
+         if response:
+            logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in response))
+         started = True # a broadcast is not necessarily acknowledged
    else:
-         logger.warning ("No data available at the input buffer")
+      frames = [FRAMES.build("start_check_module_flash", sender_output_port, receiver) for sender_output_port, receiver in receivers]
+      for frame, response in zip(frames, link.transact_many(frames)):
+         if response:
+            rx_data = list (response)
+            logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
+            if check_response(rx_data):
+               started = True
+            else:
+               logger.error('ERROR')
+         else:
+            logger.warning ("No data available at the input buffer")
+   if started:
+      time.sleep(flash_wait_time) # this may have to be more than 1 second and perhaps minuimum 20s
    # ------------------------------------------------------------------------------------------
    # MODULE READ BACK DATA
    # ------------------------------------------------------------------------------------------
    logger.info("Getting module flash data")
-   COMMANDS["read_back_module_flash"][8] = no_of_receiver_cards
-   read_back_module_flash_send = methods.checksum(COMMANDS["read_back_module_flash"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in read_back_module_flash_send))
-   ser.write(read_back_module_flash_send)
-   time.sleep(sleep_time)
+   frames = [FRAMES.build("read_back_module_flash", sender_output_port, receiver) for sender_output_port, receiver in receivers]
+   results = {}
+   for (sender_output_port, receiver), frame, response in zip(receivers, frames, link.transact_many(frames)):
+      results[(sender_output_port, receiver)] = read_module_flash(port, sender_output_port, receiver, response)
+   return results
+
+def read_module_flash(port, sender_output_port, receiver, response):
+   # Decode the module flash read back of one receiver card into its status.json entry
+   logger = logging.getLogger(LOGGER_NAME)
+   receiver_status = status[port]["sender_card_rx_port"][sender_output_port]["receiverCard"][receiver]
    modules_ok = True
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   if response:
          rx_data = list (response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          number_of_modules = int(rx_data[16]/4)
-         logger.info ("Total amount of modules: {}".format(number_of_modules))
-         status[port]["receiverCard"][no_of_receiver_cards]["module"]={}
+         logger.info ("Receiver card {}: total amount of modules: {}".format(receiver, number_of_modules))
+         receiver_status["moduleFlash"]={}
          if check_response(rx_data):
             for j in range (int(number_of_modules)):
-               status[port]["receiverCard"][no_of_receiver_cards]["module"][j]={}
                element = rx_data[18+j*4:(18+j*4)+4]
                if (element[0]==0x5):
                   module_sts= "OK"
-                  modules_ok = modules_ok and True
                else:
                   if (element[0]==0x3):
                      module_sts = "Error or no module flash available"
-                     modules_ok = modules_ok and False
                   else:
                      module_sts = "Unknown module state"
-                     modules_ok = modules_ok and True
                if element[1]==0x05:
                   module_ack= "OK"
-                  modules_ok = modules_ok and True
                else:
                   if (element[0]==0x3):
                      module_ack = "Error or no module flash available"
-                     modules_ok = modules_ok and False
                   else:
                      module_ack = "Unknown module state"
-                     modules_ok = modules_ok and True      
                if (element[0]==0x05 and element[1]==0x05):
                    module_status = "OK"
-                   modules_ok = modules_ok and True 
                else:
                    if (element[0]==0x03 or element[1]==0x03):
                        module_status = "Error or no module flash available"
-                       modules_ok = modules_ok and False 
+                       modules_ok = False
                    else:
-                       module_status = "Unknown module state" 
-                       modules_ok = modules_ok and True 
-               logger.info ("Module {module_index}: STATUS:{write_result} (0x{write_hex:02X}), ACKNOWLEDGE:{read_result} (0x{read_hex:02X})".format(module_index=j+1,write_result=module_sts,write_hex=element[0],read_result=module_ack,read_hex=element[1]))#.format(j+1).format(module_write).format(element[0]).format(module_read).format(element[1]))
-               status[port]["receiverCard"][no_of_receiver_cards]["module"][j]=module_status
+                       module_status = "Unknown module state"
+               logger.info ("Module {module_index}: STATUS:{write_result} (0x{write_hex:02X}), ACKNOWLEDGE:{read_result} (0x{read_hex:02X})".format(module_index=j+1,write_result=module_sts,write_hex=element[0],read_result=module_ack,read_hex=element[1]))
+               receiver_status["moduleFlash"][j]=module_status
          else:
-            modules_ok = modules_ok and False
-            status[port]["receiverCard"][no_of_receiver_cards]["module"]='N/A'
+            modules_ok = False
+            receiver_status["moduleFlash"]='N/A'
    else:
          logger.warning ("No data available at the input buffer")    
          number_of_modules = 0
-         modules_ok = modules_ok and False
-         module_status="N/A"    
-         status[port]["receiverCard"][no_of_receiver_cards]["module"]="N/A"
+         modules_ok = False
+         receiver_status["moduleFlash"]="N/A"
    return (number_of_modules,modules_ok)
 
-def get_ribbon_cable_status(port):
+def get_ribbon_cable_status(port, sender_output_port, response=None):
 # ------------------------------------------------------------------------------------------
 # RIBBON CABLE
 # Ribbon cable detection must work together with MON300 monitoring card.
 # Device: ScanCard
-# Base Address: 0x0210_0000H 
-# Data Length: 2H
+# Base Address: 0x0A00_0042H (inside the monitoring block, see monitoring_block.py)
+# Data Length: 10H
 # https://www.youtube.com/watch?v=h4grZUyoQyE - Exchange Data Group
 # Detect the status of 128 pins of the monitor card. The results of each signal line are 
 # expressed in 1bit, 0 represents OK, and 1 is error. Total 16 bytes
@@ -1331,42 +1597,42 @@ def get_ribbon_cable_status(port):
 # Group0 (0-3)...Group15 (0-3) 
 # ->A (0-7) ->B (0-7) ->C (0-7) ->D (0-7) 
 # ->LAT (0-7) ->OE (0-7) ->DCLK (0-7) ->CTRL (0-7).
+# Called by get_receiver_temp_voltage with the slice of the monitoring block reply, so
+# it costs no request of its own.
 # ------------------------------------------------------------------------------------------
    global no_of_receiver_cards
    logger = logging.getLogger(LOGGER_NAME)
-   logger.info("Getting ribbon cable status...[TODO]")
-   COMMANDS["ribbon_cable"][8] = no_of_receiver_cards
-   ribbon_cable_send = methods.checksum (COMMANDS["ribbon_cable"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in ribbon_cable_send))
-   ser.write(ribbon_cable_send)
-   time.sleep(sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   logger.info("Getting ribbon cable status")
+   ribbon_cable_send = FRAMES.build("ribbon_cable", lan_port, no_of_receiver_cards)
+   if response is None:
+      response = transport.transact(ser, ribbon_cable_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list (response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          if check_response(rx_data):
             data=rx_data[18:34]
+            receiver_status = status[port]["sender_card_rx_port"][sender_output_port]["receiverCard"][no_of_receiver_cards]
             k=0
             for x in range(8):
                logger.info ("G{firstByte}, G{secondByte} = {one:04b}, {two:04b}".format(firstByte=k, secondByte=k+1, one=data[x]>>4, two=data[x] & 0x0F))
-               status[port]["receiverCard"][no_of_receiver_cards]["G{firstByte}, G{secondByte}".format(firstByte=k, secondByte=k+1)]="{one:04b}, {two:04b}".format(one=data[x]>>4, two=data[x] & 0x0F)
+               receiver_status["G{firstByte}, G{secondByte}".format(firstByte=k, secondByte=k+1)]="{one:04b}, {two:04b}".format(one=data[x]>>4, two=data[x] & 0x0F)
                k=k+2
             logger.info("A = {:08b}".format(data[8]))
-            status[port]["receiverCard"][no_of_receiver_cards]["A"]="{:08b}".format(data[8])    
+            receiver_status["A"]="{:08b}".format(data[8])    
             logger.info("B = {:08b}".format(data[9]))
-            status[port]["receiverCard"][no_of_receiver_cards]["B"]="{:08b}".format(data[9])   
+            receiver_status["B"]="{:08b}".format(data[9])   
             logger.info("C = {:08b}".format(data[10]))
-            status[port]["receiverCard"][no_of_receiver_cards]["C"]="{:08b}".format(data[10])
+            receiver_status["C"]="{:08b}".format(data[10])
             logger.info("D = {:08b}".format(data[11]))
-            status[port]["receiverCard"][no_of_receiver_cards]["D"]="{:08b}".format(data[11])    
+            receiver_status["D"]="{:08b}".format(data[11])    
             logger.info("LAT = {:08b}".format(data[12]))
-            status[port]["receiverCard"][no_of_receiver_cards]["LAT"]="{:08b}".format(data[12])
+            receiver_status["LAT"]="{:08b}".format(data[12])
             logger.info("OE = {:08b}".format(data[13]))
-            status[port]["receiverCard"][no_of_receiver_cards]["OE"]="{:08b}".format(data[13])
+            receiver_status["OE"]="{:08b}".format(data[13])
             logger.info("DCLK = {:08b}".format(data[14]))
-            status[port]["receiverCard"][no_of_receiver_cards]["DCLK"]="{:08b}".format(data[14])
+            receiver_status["DCLK"]="{:08b}".format(data[14])
             logger.info("CTRL = {:08b}".format(data[15]))
-            status[port]["receiverCard"][no_of_receiver_cards]["CTRL"]="{:08b}".format(data[15])
+            receiver_status["CTRL"]="{:08b}".format(data[15])
          else:
             logger.error('ERROR') 
    else:
@@ -1378,12 +1644,9 @@ def get_edid(port): #inactive
    global no_of_receiver_cards
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting EDID 1.3 register")
-   edid_send = methods.checksum(COMMANDS["edid_register"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in edid_send))
-   ser.write (edid_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-         response = ser.read(size=ser.inWaiting())
+   edid_send = FRAMES.build("edid_register")
+   response = transport.transact(ser, edid_send, sleep_time, LOGGER_NAME)
+   if response:
          rx_data = list(response)
          logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
          #if check_response(rx_data):
@@ -1413,7 +1676,7 @@ def get_edid(port): #inactive
    #logger.info ("EDID: {}".format(gamma))
    #status[port]["receiverCard"][no_of_receiver_cards]["gamma"]=gamma
 
-def get_receiver_brightness(port, sender_output_port):
+def get_receiver_brightness(port, sender_output_port, response=None):
 # ---------------------------------------------------------------------------------------
 # SCREEN BRIGHTNESS SETTINGS
 # This needs to be on a per receiver card basis or global?
@@ -1422,16 +1685,13 @@ def get_receiver_brightness(port, sender_output_port):
     logger = logging.getLogger(LOGGER_NAME)
     logger.info("Getting current receiver card brightness...[TO CHECK]")
     
-    COMMANDS["get_brightness"][8] = no_of_receiver_cards
-    get_brightness_send = methods.checksum(COMMANDS["get_brightness"])
+    get_brightness_send = FRAMES.build("get_brightness", lan_port, no_of_receiver_cards)
     
-    logger.debug("Sending command: " + ' '.join('{:02X}'.format(a) for a in get_brightness_send))
     
-    ser.write(get_brightness_send)
-    time.sleep(sleep_time)
+    if response is None:
+        response = transport.transact(ser, get_brightness_send, sleep_time, LOGGER_NAME)
 
-    if ser.inWaiting() > 0:
-        response = ser.read(size=ser.inWaiting())
+    if response:
         rx_data = list(response)
         
         logger.debug("Received data: " + ' '.join('{:02X}'.format(a) for a in rx_data))
@@ -1481,12 +1741,9 @@ def get_display_brightness(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting current screen brightness...[TO CHECK]")
-   display_brightness_send = methods.checksum(COMMANDS["display_brightness"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in display_brightness_send))
-   ser.write (display_brightness_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   display_brightness_send = FRAMES.build("display_brightness")
+   response = transport.transact(ser, display_brightness_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1520,12 +1777,9 @@ def get_redundant_status(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting redundancy status")
-   check_redundancy_send = methods.checksum(COMMANDS["check_redundancy"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in check_redundancy_send))
-   ser.write (check_redundancy_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   check_redundancy_send = FRAMES.build("check_redundancy")
+   response = transport.transact(ser, check_redundancy_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1543,12 +1797,9 @@ def get_function_card(port):
 # ---------------------------------------------------------------------------------------
    logger = logging.getLogger(LOGGER_NAME)
    logger.info("Getting function card model")
-   function_card_model_send = methods.checksum(COMMANDS["check_function_card"])
-   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in function_card_model_send))
-   ser.write (function_card_model_send)
-   time.sleep (sleep_time)
-   if ser.inWaiting()>0:
-      response = ser.read(size=ser.inWaiting())
+   function_card_model_send = FRAMES.build("check_function_card")
+   response = transport.transact(ser, function_card_model_send, sleep_time, LOGGER_NAME)
+   if response:
       rx_data = list(response)
       logger.debug("Received data: "+' '.join('{:02X}'.format(a) for a in rx_data))
       if check_response(rx_data):
@@ -1565,38 +1816,71 @@ def get_function_card(port):
    logger.info("Function card model: " + model)
    return (model)
 
-def get_module_status(port, sender_output_port):
+def set_module_status_length(number_of_modules, data_groups):
+# ---------------------------------------------------------------------------------------
+# MODULE STATUS DATA LENGTH
+# Each module reports 22 bytes plus 2 bytes per data group
+# ---------------------------------------------------------------------------------------
+    data_length = number_of_modules * (22 + (2 * data_groups))
+    COMMANDS["check_module_status"][16] = data_length & 0x00FF
+    COMMANDS["check_module_status"][17] = (data_length & 0xFF00) >> 8
+    FRAMES.register("check_module_status", COMMANDS["check_module_status"])
+
+def prefetch_receiver_data(port, command_names=RECEIVER_COMMANDS):
+# ---------------------------------------------------------------------------------------
+# PIPELINED RECEIVER QUERIES
+# Sends the requests in command_names (by default every one in RECEIVER_COMMANDS) for the
+# current receiver card through the pipeline so that several are in flight at once. Replies are keyed by command name and
+# handed to the receiver getters, which then skip their own round trip.
+# With coalesce_gap set, requests whose registers overlap or lie within coalesce_gap
+# bytes of each other are first merged into block reads (see read_planner.py).
+# Requests that lie inside the monitoring block (e.g. module status) are not sent when
+# check_monitoring is: their replies are sliced out of its reply (see monitoring_block.py).
+# ---------------------------------------------------------------------------------------
+    global no_of_receiver_cards
+    logger = logging.getLogger(LOGGER_NAME)
+    set_module_status_length(NUMBER_OF_MODULES, DATA_GROUPS)
+    frames = {}
+    for command_name in command_names:
+        frames[command_name] = FRAMES.build(command_name, lan_port, no_of_receiver_cards)
+    monitoring_send = frames.get("check_monitoring")
+    sliced = [name for name in frames if monitoring_send is not None and name != "check_monitoring" and monitoring_block.contains(monitoring_send, frames[name])]
+    requests = {name: frame for name, frame in frames.items() if name not in sliced}
+    if coalesce_gap is not None:
+        blocks = read_planner.plan_reads(requests, coalesce_gap)
+        logger.debug(f"Reading {len(requests)} registers in {len(blocks)} block reads (window {link.window})")
+        replies = read_planner.coalesced_transact(link, requests, coalesce_gap)
+    else:
+        logger.debug(f"Pipelining {len(requests)} requests (window {link.window})")
+        replies = dict(zip(requests, link.transact_many(list(requests.values()))))
+    for name in sliced:
+        replies[name] = monitoring_block.slice_reply(monitoring_send, replies["check_monitoring"], frames[name])
+    if sliced:
+        logger.debug(f"{', '.join(sliced)} read from the monitoring block")
+    return replies
+
+def get_module_status(port, sender_output_port, response=None):
     global no_of_receiver_cards
     global number_of_modules
 
-    # This is to be uncommented when config.json is setup
-    # number_of_modules = config["number_of_modules"]
-    # data_groups = config["data_groups"]
-
     FAULT_CRITICAL_LINES = {
                            "RFU": False,  # Change to True if you want RFU to cause module faults
                            "R": False     # Change to True if R should cause module faults
                            }
 
 
-    number_of_modules = 4
-    data_groups = 4
+    number_of_modules = NUMBER_OF_MODULES
+    data_groups = DATA_GROUPS
     element_length = 22 + (2 * data_groups)
 
     logger = logging.getLogger(LOGGER_NAME)
     logger.info("Getting module status")
 
-    COMMANDS["check_module_status"][8] = no_of_receiver_cards
-    data_length = number_of_modules * element_length
-    first_byte = (data_length & 0xFF00) >> 8
-    second_byte = data_length & 0x00FF
-    COMMANDS["check_module_status"][16] = second_byte
-    COMMANDS["check_module_status"][17] = first_byte
+    set_module_status_length(number_of_modules, data_groups)
 
-    check_module_status_send = methods.checksum(COMMANDS["check_module_status"])
-    logger.debug("Sending command: " + ' '.join('{:02X}'.format(a) for a in check_module_status_send))
-    ser.write(check_module_status_send)
-    time.sleep(sleep_time)
+    check_module_status_send = FRAMES.build("check_module_status", lan_port, no_of_receiver_cards)
+    if response is None:
+        response = transport.transact(ser, check_module_status_send, sleep_time, LOGGER_NAME)
 
     modules_ok = True
 
@@ -1620,8 +1904,7 @@ def get_module_status(port, sender_output_port):
         15: "D"
     }
 
-    if ser.inWaiting() > 0:
-        response = ser.read(size=ser.inWaiting())
+    if response:
         rx_data = list(response)
         logger.debug("Received data: " + ' '.join('{:02X}'.format(a) for a in rx_data))
 
@@ -1710,4 +1993,8 @@ def get_module_status(port, sender_output_port):
 # PROGRAM ENTRY POINT - this won't be run only when imported from external module
 # ------------------------------------------------------------------------------------------------------------
 if __name__ == "__main__":
-   sys.exit(main())#exit(main())
+   parser = argparse.ArgumentParser(description="Check the display status via the Novastar sender and receiver cards")
+   parser.add_argument("--budget", type=float, metavar="SECONDS",
+                       help="stop reading receiver cards after SECONDS and carry on from there on the next run (see scan_cursor.py)")
+   args = parser.parse_args()
+   sys.exit(main(args.budget))#exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# FRAME BUILDER
+# Precompiled, immutable request frames for the Novastar serial protocol.
+#
+# DESCRIPTION
+# - Command templates used to be global lists which every query patched in place (LAN port, receiver index)
+#   before recomputing the checksum one byte at a time, so concurrent scans could see each other's changes.
+# - FrameBuilder keeps every template as immutable bytes. Addressed frames are assembled with struct.pack_into
+#   on a reusable scratch buffer and cached by (command, LAN port, receiver index, payload). After the first
+#   receiver card on a sender card output, every frame of a scan is a dictionary lookup.
+#------------------------------------------------------------------------------------------------------------
+import struct
+import threading
+import transport
+
+LAN_PORT_OFFSET = 7
+RECEIVER_INDEX_OFFSET = 8
+WORD = struct.Struct("<H") # receiver index, data length and checksum fields (little endian)
+
+class FrameBuilder:
+# ---------------------------------------------------------------------------------------
+# Builds addressed request frames from named command templates.
+# templates: {name: frame} as bytes or a list of byte values.
+# build() returns immutable bytes, so frames may be shared freely between callers and
+# worker threads. payload (bytes) replaces the data field of write commands.
+# ---------------------------------------------------------------------------------------
+   def __init__(self, templates):
+      self.templates = {}
+      self.cache = {}
+      self.scratch = bytearray()
+      self.lock = threading.Lock()
+      for name, frame in templates.items():
+         self.register(name, frame)
+
+   def register(self, name, frame):
+      # Add or replace a template; cached frames built from an older version are dropped
+      frame = bytes(frame)
+      if self.templates.get(name) != frame:
+         self.templates[name] = frame
+         self.cache = {key: value for key, value in self.cache.items() if key[0] != name}
+
+   def build(self, name, lan_port=None, receiver_index=None, payload=None):
+      key = (name, lan_port, receiver_index, payload)
+      frame = self.cache.get(key)
+      if frame is None:
+         frame = self._compile(name, lan_port, receiver_index, payload)
+         self.cache[key] = frame
+      return frame
+
+   def _compile(self, name, lan_port, receiver_index, payload):
+      template = self.templates[name]
+      with self.lock:
+         scratch = self.scratch
+         if payload is None:
+            scratch[:] = template
+         else:
+            scratch[:] = template[:transport.HEADER_LENGTH] + bytes(payload) + b"\x00\x00"
+            WORD.pack_into(scratch, transport.LENGTH_OFFSET, len(payload))
+         if lan_port is not None:
+            scratch[LAN_PORT_OFFSET] = lan_port
+         if receiver_index is not None:
+            WORD.pack_into(scratch, RECEIVER_INDEX_OFFSET, receiver_index)
+         WORD.pack_into(scratch, len(scratch) - 2, transport.frame_checksum(scratch))
+         return bytes(scratch)
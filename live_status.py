@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# LIVE STATUS
+# Publishes the latest sender card and receiver card values of display_status.py in a memory-mapped file.
+#
+# DESCRIPTION
+# - The check scripts (check_dvi.py, check_brightness.py, check_cabinet.py, check_receiving_cards_temperature.py)
+#   each go back to the sender card for values a display_status.py scan has often just read. With "live_status"
+#   in config.json, display_status.py writes what it read into live_status.bin, next to status.json, as each
+#   sender card is scanned. Any local reader maps the file and reads a value in microseconds, without the
+#   serial port.
+# - Fixed layout, little endian:
+#       header      magic "NSLIVE01", version, sender card slots, LAN ports, receiver cards per LAN port, sizes
+#       per sender card slot:
+#          sender record     serial port, DVI signal, brightness level, receiver cards on each LAN port
+#          receiver records  LAN ports x receiver cards, record (lan_port, receiver) at index
+#                            lan_port * receiver cards per LAN port + receiver
+#   Every record starts with a sequence counter and the time it was written (time.time()). Unknown values are
+#   -1 (NaN for temperature and voltage). Values follow the check cadence of display_status.py, so a value may
+#   have been read by an earlier scan than the one that wrote the record.
+# - Lock-free reads (seqlock): the only writer makes the counter odd, writes the record and makes it even again.
+#   A reader reads the counter, the record and the counter again, and retries if the counter was odd or has
+#   changed in between.
+# - A segment whose layout no longer matches config.json is replaced by a new file (rename), so readers that
+#   still map the old one are never cut short.
+#
+# USAGE
+# Linux: python3 live_status.py [serial port]
+#------------------------------------------------------------------------------------------------------------
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+import telemetry_store
+
+SEGMENT_FILE = "live_status.bin"
+MAGIC = b"NSLIVE01"
+VERSION = 1
+MAX_LAN_PORTS = 4
+HEADER = struct.Struct("<8sHHHHHH12x") # magic, version, sender card slots, LAN ports, receivers per LAN port, sender / receiver record size
+SEQUENCE = struct.Struct("<I4x") # counter, odd while the record is being written
+SENDER = struct.Struct("<d64sbh" + "H" * MAX_LAN_PORTS) # time, serial port, DVI, brightness level, receiver cards per LAN port
+RECEIVER = struct.Struct("<dffhhhhbbbhx") # time, temperature, voltage, brightness %, red, green, blue, cabinet on, locked, monitoring card, faulty modules
+SENDER_SIZE = SEQUENCE.size + SENDER.size
+RECEIVER_SIZE = SEQUENCE.size + RECEIVER.size
+RETRIES = 1000
+DVI = {"Valid": 1, "Not valid": 0}
+DVI_SIGNAL = {value: name for name, value in DVI.items()}
+SWITCHES = {"On": 1, "Off": 0, "Locked": 1, "Normal": 0, "Yes": 1, "No": 0}
+
+def segment_path():
+   return os.path.join(os.path.dirname(os.path.abspath(__file__)), SEGMENT_FILE)
+
+def known(value):
+   # -1 for a value that is not a number (e.g. "N/A")
+   return int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else -1
+
+class Segment:
+# ---------------------------------------------------------------------------------------
+# A mapped live status file. Segment.create() is used by the writer (display_status.py),
+# Segment.open() by readers.
+# ---------------------------------------------------------------------------------------
+   def __init__(self, mapping, sender_slots, lan_ports, receivers, path, inode):
+      self.mapping = mapping
+      self.path = path
+      self.inode = inode # of the file mapped, see replaced()
+      self.sender_slots = sender_slots
+      self.lan_ports = lan_ports
+      self.receivers = receivers
+      self.slot_size = SENDER_SIZE + lan_ports * receivers * RECEIVER_SIZE
+
+   @classmethod
+   def create(cls, sender_slots, lan_ports=MAX_LAN_PORTS, receivers=256, path=None):
+      # Map the segment for writing, making a new one if it is missing or its layout differs
+      path = path or segment_path()
+      layout = (MAGIC, VERSION, sender_slots, lan_ports, receivers, SENDER_SIZE, RECEIVER_SIZE)
+      size = HEADER.size + sender_slots * (SENDER_SIZE + lan_ports * receivers * RECEIVER_SIZE)
+      try:
+         with open(path, "rb") as segment:
+            current = HEADER.unpack(segment.read(HEADER.size))
+      except (OSError, struct.error):
+         current = None
+      if current != layout or os.path.getsize(path) != size:
+         with open(path + ".tmp", "wb") as segment:
+            segment.write(HEADER.pack(*layout))
+            segment.truncate(size)
+         os.replace(path + ".tmp", path)
+      with open(path, "r+b") as segment:
+         return cls(mmap.mmap(segment.fileno(), size), sender_slots, lan_ports, receivers, path, os.fstat(segment.fileno()).st_ino)
+
+   @classmethod
+   def open(cls, path=None):
+      # Map an existing segment read only; None if there is none (or not a valid one)
+      path = path or segment_path()
+      try:
+         with open(path, "rb") as segment:
+            mapping = mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ)
+            inode = os.fstat(segment.fileno()).st_ino
+      except (OSError, ValueError):
+         return None
+      if len(mapping) < HEADER.size:
+         mapping.close()
+         return None
+      magic, version, sender_slots, lan_ports, receivers, sender_size, receiver_size = HEADER.unpack_from(mapping)
+      if (magic, version, sender_size, receiver_size) != (MAGIC, VERSION, SENDER_SIZE, RECEIVER_SIZE):
+         mapping.close()
+         return None
+      return cls(mapping, sender_slots, lan_ports, receivers, path, inode)
+
+   def replaced(self):
+      # True if the writer has put a new segment in place of the one mapped (its layout changed)
+      try:
+         return os.stat(self.path).st_ino != self.inode
+      except OSError:
+         return True
+
+   def close(self):
+      self.mapping.close()
+
+   # ---------------------------------------------------------------------------------------
+   # SEQLOCK
+   # ---------------------------------------------------------------------------------------
+   def write(self, offset, record, values):
+      sequence = SEQUENCE.unpack_from(self.mapping, offset)[0] | 1 # odd: being written
+      SEQUENCE.pack_into(self.mapping, offset, sequence)
+      record.pack_into(self.mapping, offset + SEQUENCE.size, *values)
+      SEQUENCE.pack_into(self.mapping, offset, (sequence + 1) & 0xFFFFFFFF)
+
+   def read(self, offset, record):
+      for attempt in range(RETRIES):
+         before = SEQUENCE.unpack_from(self.mapping, offset)[0]
+         if before & 1:
+            continue
+         values = record.unpack_from(self.mapping, offset + SEQUENCE.size)
+         if SEQUENCE.unpack_from(self.mapping, offset)[0] == before:
+            return values
+      return None # the writer kept changing it
+
+   # ---------------------------------------------------------------------------------------
+   # LAYOUT
+   # ---------------------------------------------------------------------------------------
+   def slot_offset(self, slot):
+      return HEADER.size + slot * self.slot_size
+
+   def receiver_offset(self, slot, lan_port, receiver):
+      return self.slot_offset(slot) + SENDER_SIZE + (lan_port * self.receivers + receiver) * RECEIVER_SIZE
+
+   def slot_port(self, slot):
+      values = self.read(self.slot_offset(slot), SENDER)
+      return values[1].rstrip(b"\0").decode() if values else None
+
+   def find_slot(self, serial_port, assign=False):
+      # Slot of a sender card, or (assign=True) the first free one
+      ports = [self.slot_port(slot) for slot in range(self.sender_slots)]
+      if serial_port in ports:
+         return ports.index(serial_port)
+      if assign and "" in ports:
+         return ports.index("")
+      return None
+
+   # ---------------------------------------------------------------------------------------
+   # WRITER
+   # ---------------------------------------------------------------------------------------
+   def publish(self, serial_port, sender_status, receivers_per_lan_port, now=None):
+   # Write the status.json entry of one sender card; returns False if there is no slot for it
+      slot = self.find_slot(serial_port, assign=True)
+      if slot is None:
+         return False
+      now = time.time() if now is None else now
+      counts = [min(int(receivers_per_lan_port.get(lan_port, 0)), self.receivers) if lan_port < self.lan_ports else 0 for lan_port in range(MAX_LAN_PORTS)]
+      for lan_port, port_status in sender_status.get("sender_card_rx_port", {}).items():
+         for receiver, entry in port_status.get("receiverCard", {}).items():
+            if int(lan_port) < self.lan_ports and int(receiver) < self.receivers:
+               self.write(self.receiver_offset(slot, int(lan_port), int(receiver)), RECEIVER, self.receiver_values(entry, now))
+      # the sender record last, so that its receiver card counts only cover records already written
+      self.write(self.slot_offset(slot), SENDER, [now, serial_port.encode()[:64], DVI.get(sender_status.get("DVISignal"), -1),
+                                                  known(sender_status.get("brightnessLevel"))] + counts)
+      return True
+
+   def receiver_values(self, entry, now):
+      value = {name: read(entry) for name, (check, read) in telemetry_store.FIELDS.items()} # as stored in the telemetry history
+      def number(name):
+         return float("nan") if value[name] is None else value[name]
+      def level(name):
+         return -1 if value[name] is None else int(value[name])
+      return [now, number("temperature"), number("voltage"), level("brightness"), level("red"), level("green"), level("blue"),
+              level("cabinet_on"), level("locked"), SWITCHES.get(entry.get("monitorCard"), -1), level("module_faults")]
+
+   # ---------------------------------------------------------------------------------------
+   # READERS
+   # ---------------------------------------------------------------------------------------
+   def sender(self, serial_port):
+      # Latest values of a sender card as a dict, or None if it has not been published
+      slot = self.find_slot(serial_port)
+      values = self.read(self.slot_offset(slot), SENDER) if slot is not None else None
+      if not values:
+         return None
+      return {"time": values[0], "port": serial_port, "DVI": values[2], "brightnessLevel": values[3],
+              "receivers": dict(enumerate(values[4:4 + self.lan_ports]))}
+
+   def receiver(self, serial_port, lan_port, receiver):
+      # Latest values of one receiver card as a dict, or None if it has not been published
+      slot = self.find_slot(serial_port)
+      if slot is None or not (0 <= lan_port < self.lan_ports and 0 <= receiver < self.receivers):
+         return None
+      values = self.read(self.receiver_offset(slot, lan_port, receiver), RECEIVER)
+      if not values or values[0] == 0:
+         return None
+      names = ["time", "temperature", "voltage", "brightness", "red", "green", "blue", "cabinet_on", "locked", "monitoring_card", "module_faults"]
+      record = dict(zip(names, values))
+      for name in ("temperature", "voltage"): # stored as float32
+         record[name] = None if math.isnan(record[name]) else round(record[name], 2)
+      return record
+
+def open_writer(sender_slots, receivers, logger_name=None):
+   # The segment display_status.py publishes to, or None if it cannot be made (logged, the scan goes on without it)
+   try:
+      return Segment.create(sender_slots, receivers=receivers)
+   except (OSError, ValueError) as e:
+      logging.getLogger(logger_name).error(f"Live status error ({SEGMENT_FILE}): {e}")
+      return None
+
+def main():
+   segment = Segment.open()
+   if segment is None:
+      print(f"No live status segment ({segment_path()})")
+      return 1
+   ports = [port for port in (segment.slot_port(slot) for slot in range(segment.sender_slots)) if port]
+   for serial_port in (sys.argv[1:] or ports):
+      sender = segment.sender(serial_port)
+      if sender is None:
+         print(f"{serial_port}: not published")
+         continue
+      print(f"{serial_port}: DVI={sender['DVI']} brightnessLevel={sender['brightnessLevel']} age={time.time() - sender['time']:.1f}s")
+      for lan_port, count in sender["receivers"].items():
+         for receiver in range(count):
+            record = segment.receiver(serial_port, lan_port, receiver)
+            if record is not None:
+               print(f"   {lan_port}/{receiver}: " + " ".join(f"{name}={value}" for name, value in record.items() if name != "time"))
+   segment.close()
+   return 0
+
+if __name__ == "__main__":
+   sys.exit(main())
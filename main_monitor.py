@@ -1,54 +1,126 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# MAIN MONITOR
+# Runs the monitoring checks in a single pass over the display.
+#
+# DESCRIPTION
+# - Each check script, run on its own, asks the local server for the ports, runs its own discovery, opens the
+#   ports and walks the receiver cards. main_monitor.py does all of that once: one session with the local server
+#   (or serial broker), one discovery, one walk over the sender cards, LAN ports and receiver cards, during which
+#   every enabled check is given each receiver card in turn.
+# - All checks share one base() instance. Reads that several checks make of the same receiver card (e.g. model
+#   and firmware) are sent once and their reply shared (base.shared_replies).
+# - "monitor_checks" in config.json lists the checks to run (default: all of them). The alarm of every check
+#   run is written to monitor_log.log, one "<alarm>=<exit code>" line each:
+#       check_brightness, dvi_alarm     sender cards
+#       receiving_cards                 number of receiver cards found against the number expected
+#       Modules, cabinet_alarm, receiving_card_temperature    every receiver card
+#
+# USAGE
+# Linux: python3 main_monitor.py
+#------------------------------------------------------------------------------------------------------------
 import asyncio
-from check_brightness import check_brightness
-from check_cabinet import check_cabinet
-from check_modules import check_modules
-from check_receiving_card import check_receiving_card
-from check_receiving_cards_temperature import check_receiving_cards_temperature
-from check_dvi import check_dvi
-from base_monitoring import base
 import time
+import check_brightness
+import check_cabinet
+import check_dvi
+import check_modules
+import check_receiving_cards_temperature
+from base_monitoring import base
+
+ALARMS = { # check: alarm it raises
+    "check_brightness": "check_brightness",
+    "check_dvi": "dvi_alarm",
+    "check_receiving_card": "receiving_cards",
+    "check_modules": "Modules",
+    "check_cabinet": "cabinet_alarm",
+    "check_receiving_cards_temperature": "receiving_card_temperature",
+}
+
 base_script = base()
-async def main():
+base_script._logger_name = "main_monitor"
+for check in (check_brightness, check_cabinet, check_dvi, check_modules, check_receiving_cards_temperature):
+    check.base_script = base_script # every check works on the same discovery, ports and status
+
+class Alarm:
+    # Worst result of one check over every sender card / receiver card it was run on
+    def __init__(self, name):
+        self.name = name
+        self.exit_code = base_script.GOOD
+        self.messages = []
+
+    def update(self, exit_code, message):
+        if exit_code != base_script.GOOD and message not in self.messages:
+            self.messages.append(message)
+        if exit_code == base_script.CRITICAL or (exit_code != base_script.GOOD and self.exit_code == base_script.GOOD):
+            self.exit_code = exit_code
+
+async def run_checks(reader, writer):
     await base_script.initialize_program()
-    i=0
-    expected_modules = base_script.config['modules']
+    enabled = base_script.config.get("monitor_checks", list(ALARMS))
+    alarms = {}
+    def alarm(check):
+        return alarms.setdefault(ALARMS[check], Alarm(ALARMS[check]))
     total_receiver_cards = base_script.config_panel["receiver_cards"]
-    total_lan_ports = base_script.config_panel["lan_ports"]   #Validate device found on player
+    total_lan_ports = base_script.config_panel["lan_ports"]
     total_receiver_cards_found = 0
-    for base_script.serial_port in sorted(base_script.valid_ports):
-        i += 1
+    for i, base_script.serial_port in enumerate(sorted(base_script.valid_ports or []), 1):
         base_script.logger.info("*******************    DEVICE {}   *******************".format(i))
         base_script.logger.info("Connecting to device on {}".format(base_script.serial_port))
         base_script.ser.port = base_script.serial_port
+        base_script.status.setdefault(base_script.serial_port, {}).setdefault("receiverCard", {})
+        base_script.shared_replies = {} # replies are shared between the checks of one sender card only
         try:
             if base_script.ser.isOpen() == False:
                 base_script.ser.open()
             base_script.ser.flushInput() #flush input buffer, discarding all its contents
             base_script.ser.flushOutput() #flush output buffer, aborting current output and discard all that is in buffer
             base_script.logger.info("Opened device on port: " + base_script.ser.name) # remove at production
-            check_brightness() # This function will be called for each serial port found. and will handle the monitoring of brightness for each sender card.
-            check_dvi() # This function will be called for each serial port found. and will handle the monitoring of DVI signal for each sender card.
-            # loop through each LAN port to check for receiver cards
+            # -------------------------------------
+            # SENDER CARD CHECKS
+            # -------------------------------------
+            if "check_dvi" in enabled:
+                alarm("check_dvi").update(*await check_dvi.check_dvi(reader, writer))
+            if "check_brightness" in enabled:
+                alarm("check_brightness").update(*await check_brightness.check_brightness(reader, writer))
+            # -------------------------------------
+            # RECEIVER CARD CHECKS, one walk over every LAN port
+            # -------------------------------------
             for lan_value in range(total_lan_ports):
-                # Check if the receiver card is connected before proceeding, a time sleep is added to ensure the serial port is ready! (testing shows that the serial port is not ready immediately after closing it manually and reopening it)
+                # a time sleep is added to ensure the serial port is ready after it was closed (check_brightness closes it)
                 if not base_script.ser.is_open:
                     time.sleep(0.05)
-                    base_script.ser.open()                    
-                no_of_receiver_cards = 0
-                receiver_card_found = True
-                while receiver_card_found:                    
-                    # Check if receiver card is connected before proceeding
-                    if not base_script.get_receiver_connected(base_script.ser.port, no_of_receiver_cards, lan_value):
-                        base_script.ser.close()
-                        break 
-                    base_script.logger.info ("Connecting to receiver number: {}".format(no_of_receiver_cards+1))  
-                    check_receiving_cards_temperature(base_script.ser, no_of_receiver_cards, lan_value) # This function will be called for each serial port found. and will handle the monitoring of receiving cards temperature.
-                    check_modules(no_of_receiver_cards, lan_value) # This function will be called for each serial port found. and will handle the monitoring of modules.   
-                    total_receiver_cards_found += 1 # Incrementing the total receiver cards found since we are checking for receiving cards in modules and temperature and 
-                    no_of_receiver_cards += 1                     
+                    base_script.ser.open()
+                receivers_connected = await base_script.count_receivers(base_script.serial_port, lan_value)
+                total_receiver_cards_found += receivers_connected
+                for no_of_receiver_cards in range(receivers_connected):
+                    base_script.logger.info ("Connecting to receiver number: {}".format(no_of_receiver_cards+1))
+                    base_script.status[base_script.serial_port]["receiverCard"].setdefault(no_of_receiver_cards, {})
+                    if "check_modules" in enabled:
+                        alarm("check_modules").update(*await check_modules.check_modules(no_of_receiver_cards, lan_value))
+                    if "check_cabinet" in enabled:
+                        cabinet_on = await check_cabinet.get_cabinet_kill_mode(base_script.serial_port, no_of_receiver_cards, lan_value)
+                        alarm("check_cabinet").update(base_script.GOOD if cabinet_on else base_script.CRITICAL, "ONE OR MORE CABINETS OFF")
+                    if "check_receiving_cards_temperature" in enabled:
+                        alarm("check_receiving_cards_temperature").update(*await check_receiving_cards_temperature.check_receiving_cards_temperature(base_script.serial_port, no_of_receiver_cards, lan_value))
         except Exception as e:
             base_script.logger.error(f"Error connecting to device on port {base_script.serial_port}: {e}")
         finally:
-            base_script.ser.close()  # Closing 
-            base_script.logger.info("Writing to JSON file")
-main()        
\ No newline at end of file
+            base_script.ser.close()  # Closing
+    base_script.shared_replies = None
+    if not base_script.valid_ports:
+        for check in enabled:
+            alarm(check).update(base_script.CRITICAL, "NO DEVICE")
+    elif "check_receiving_card" in enabled:
+        alarm("check_receiving_card").update(base_script.GOOD if total_receiver_cards_found == total_receiver_cards else base_script.CRITICAL,
+                                        f"NO of receiver cards {total_receiver_cards_found} EXPECTED {total_receiver_cards}")
+    for name, result in alarms.items():
+        log = base_script.logger.info if result.exit_code == base_script.GOOD else base_script.logger.error
+        log("{}={} {}".format(name, result.exit_code, "; ".join(result.messages)))
+    await base_script.monitoring_log_outputs({name: result.exit_code for name, result in alarms.items()}, reader, writer)
+
+async def main():
+    await base_script.communicate_with_server(run_checks)
+
+if __name__ == "__main__":
+    asyncio.run(main())
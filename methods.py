@@ -5,6 +5,7 @@ import time
 import logging
 from logging.handlers import TimedRotatingFileHandler
 import os 
+import tempfile
 
 status = {} # Initialise variable to store status data
 global last_updated
@@ -66,6 +67,13 @@ def read_data(filename,logger_name):
       temp_data = {}
    return temp_data
 
+def read_cache(filename, logger_name):
+   # read_data() for a cache file, which only exists once there is something to remember: {} without an error if missing
+   if not os.path.isfile(filename):
+      logging.getLogger(logger_name).debug('{} not found, starting empty.'.format(filename))
+      return {}
+   return read_data(filename, logger_name)
+
 def write_data(filename, json_data, logger_name):
     logger = logging.getLogger(logger_name)
     
@@ -77,9 +85,8 @@ def write_data(filename, json_data, logger_name):
         # Convert data to JSON
         data = json.dumps(json_data, indent=4)
         
-        # Write data to file
-        with open(file_path, "w", encoding="utf-8") as outfile:
-            outfile.write(data)
+        # Write data to file (readers never see it half written)
+        write_file_atomic(file_path, data)
         
         logger.info(f'Written to {file_path}')
     
@@ -92,6 +99,32 @@ def write_data(filename, json_data, logger_name):
     except Exception as e:
         logger.error(f'Unexpected error: {e}')
 
+def write_file_atomic(file_path, text):
+    # Write text to a temporary file next to file_path, flush it to disk and rename it into place,
+    # so a reader sees either the previous file or the new one, never a partial write.
+    directory = os.path.dirname(file_path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix="." + os.path.basename(file_path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as outfile:
+            outfile.write(text)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        # mkstemp creates the file readable by its owner only; keep the permissions of the file replaced
+        os.chmod(temp_path, os.stat(file_path).st_mode & 0o777 if os.path.exists(file_path) else 0o644)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"): # make the rename itself durable (POSIX only)
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
 def checkConnections():
     port = "/dev/ttyUSB0"
     return (port)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# MONITORING BLOCK
+# Decodes the whole receiver card monitoring block (0x0A00_0000, 100H) in one pass.
+#
+# DESCRIPTION
+# - The monitoring block read by check_monitoring carries more than temperature and voltage: monitoring card
+#   presence, the module status elements (0x0A00_000A) and, with a MON300 monitoring card, the ribbon cable
+#   signal line flags (0x0A00_0042, 16 bytes). These used to be read with requests of their own.
+# - decode() extracts every field of a check_monitoring reply at once.
+# - contains() tells whether another read request lies inside the block, and slice_reply() cuts its reply out
+#   of the block reply (read_planner.slice_reply), so the existing decoders are fed without a round trip.
+#
+# Offsets are from the start of the block data (reply byte 18):
+#   0       temperature flags: bit 7 valid, bit 0 sign
+#   1       temperature, 0.5°C per unit (bit 0 ignored)
+#   3       voltage: bit 7 valid, bits 0-6 in 0.1V
+#   0AH     module status, 22 bytes plus 2 per data group for each module
+#   20H     FFH when a monitoring card is fitted
+#   42H     ribbon cable, 16 bytes, 1 bit per signal line, 1 = error
+#------------------------------------------------------------------------------------------------------------
+from collections import namedtuple
+import read_planner
+import transport
+
+TEMPERATURE_FLAGS = 0
+TEMPERATURE = 1
+VOLTAGE = 3
+MODULE_STATUS = 0x0A
+MONITORING_CARD = 0x20
+RIBBON_CABLE = 0x42
+RIBBON_CABLE_LENGTH = 16
+
+Monitoring = namedtuple("Monitoring", ["temperature_valid", "temperature", "voltage_valid", "voltage",
+                                       "monitoring_card", "module_status", "ribbon_cable"])
+
+def field(data, offset, length=1):
+   # Bytes of the block at offset, or None if the reply is too short to hold them
+   return data[offset:offset + length] if len(data) >= offset + length else None
+
+def decode(reply, number_of_modules=0, data_groups=0):
+# ---------------------------------------------------------------------------------------
+# Every field of a check_monitoring reply (a complete reply frame).
+# temperature in °C and voltage in V are None when flagged invalid; module_status is the
+# list of raw module elements and ribbon_cable the 16 raw flag bytes (None if the reply
+# is too short or no monitoring card is fitted).
+# ---------------------------------------------------------------------------------------
+   data = list(reply[transport.HEADER_LENGTH:-2])
+   head = data + [0] * (VOLTAGE + 1 - len(data)) # a short reply reads as invalid temperature and voltage
+   temperature_valid = (head[TEMPERATURE_FLAGS] & 0x80) == 0x80
+   temperature = (-1 if head[TEMPERATURE_FLAGS] & 0x1 else 1) * (head[TEMPERATURE] & 0xFE) * 0.5
+   voltage_valid = (head[VOLTAGE] & 0x80) == 0x80
+   card = field(data, MONITORING_CARD)
+   monitoring_card = card is not None and card[0] == 0xFF
+   element_length = 22 + 2 * data_groups
+   modules = field(data, MODULE_STATUS, number_of_modules * element_length) or []
+   return Monitoring(temperature_valid=temperature_valid,
+                     temperature=round(temperature, 2) if temperature_valid else None,
+                     voltage_valid=voltage_valid,
+                     voltage=round(0.1 * (head[VOLTAGE] & 0x7F), 2) if voltage_valid else None,
+                     monitoring_card=monitoring_card,
+                     module_status=[modules[i:i + element_length] for i in range(0, len(modules), element_length)],
+                     ribbon_cable=field(data, RIBBON_CABLE, RIBBON_CABLE_LENGTH) if monitoring_card else None)
+
+def contains(block_frame, frame):
+   # True if the read request `frame` targets the same card as block_frame and lies within its registers
+   address = read_planner.register_address(frame)
+   start = read_planner.register_address(block_frame)
+   return (frame[transport.DIRECTION_OFFSET] == transport.READ
+           and bytes(frame[read_planner.TARGET]) == bytes(block_frame[read_planner.TARGET])
+           and start <= address and address + transport.data_length(frame) <= start + transport.data_length(block_frame))
+
+def slice_reply(block_frame, reply, frame):
+   # The reply `frame` would have received, cut out of the reply to block_frame
+   block = read_planner.ReadBlock("block", block_frame)
+   block.merge("frame", frame)
+   return read_planner.slice_reply(block, reply, "frame", frame)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# NOVASTAR SIMULATOR
+# Simulated Novastar sender card, receiver cards and multifunction card on a pseudo-terminal, for load testing
+# the suite without a display.
+#
+# DESCRIPTION
+# - Opens one pseudo-terminal per simulated sender card and answers the 55 AA request frames of command.py
+#   with AA 55 replies, exactly as a sender card on /dev/ttyUSBx does.
+# - The display is modelled as LAN ports x receiver cards x modules x data groups. Every card has a register
+#   map (model ID, FPGA version, temperature, voltage, kill / lock mode, brightness, module status and module
+#   flash). Writes change the registers, so display on/off and brightness changes can be read back.
+#   Requests to receiver cards that do not exist are answered with acknowledge code 1 (time out), which ends
+#   the receiver card scan of each LAN port.
+# - Latency (per command address, or for all commands), dropped replies and replies with a bad checksum can
+#   be set to exercise timeouts, retries and the frame decoder. Replies are sent in order, one at a time, as
+#   the sender card processes requests one after another.
+# - Add the pseudo-terminal (or the --link path) to "extra_ports" in config.json for display_status.py,
+#   main_monitor.py and config_writer.py to find the simulated sender card.
+#
+# USAGE
+# Linux: python3 novastar_simulator.py --lan-ports 4 --receivers 244 --modules 4 --link /tmp/ttyNOVA0
+#        python3 novastar_simulator.py --receivers 61,61,61,61 --latency 0.005 --drop 0.01 --bad-checksum 0.01
+#------------------------------------------------------------------------------------------------------------
+import os
+import sys
+import tty
+import time
+import heapq
+import random
+import select
+import logging
+import argparse
+import transport
+
+REQUEST_HEADER = transport.REQUEST_HEADER
+DEVICE_TYPE_OFFSET = 6
+LAN_PORT_OFFSET = 7
+RECEIVER_INDEX_OFFSET = 8
+ADDRESS_OFFSET = 12
+SENDER_CARD = 0
+RECEIVER_CARD = 1
+FUNCTION_CARD = 2
+BROADCAST = 0xFFFF # receiver index of a write to every receiver card on a LAN port
+ALL_LAN_PORTS = 0xFF
+
+ACK_OK = 0
+ACK_TIMEOUT = 1 # no device at this address
+ACK_REQUEST_CHECKSUM = 2
+
+SENDER_MODELS = {
+   "300": b"\x01\x00", # MSD300/MCTRL300
+   "500": b"\x01\x01", # MCTRL500
+   "660": b"\x01\x11", # MSD600/MCTRL600/MCTRL610/MCTRL660
+}
+RECEIVER_MODELS = {
+   "A4s": b"\x06\x45",
+   "A5s": b"\x08\x45",
+   "A7s": b"\x0A\x45",
+   "A8s": b"\x09\x45",
+   "A5s Plus": b"\x21\x46",
+}
+
+# Register addresses
+MODEL = 0x00000002 # sender / function card model
+SENDER_FIRMWARE = 0x04100000
+DVI_SIGNAL = 0x02000017
+RECEIVER_MODEL = 0x00000000
+RECEIVER_FIRMWARE = 0x08000004
+BRIGHTNESS = 0x02000001 # global, red, green, blue, virtual red
+KILL_MODE = 0x02000100
+LOCK_MODE = 0x02000102
+MONITORING = 0x0A000000 # temperature valid, temperature, -, voltage
+MODULE_STATUS = 0x0A00000A # 22 bytes plus 2 per data group for each module (overlaps the monitoring data, so no monitoring card is simulated)
+MODULE_FLASH = 0x03003010 # status, acknowledge, -, - for each module
+AMBIENT_LIGHT = 0x06000000 # function card light sensor
+
+class Registers:
+# ---------------------------------------------------------------------------------------
+# Sparse byte addressable register map; registers never written read as zero
+# ---------------------------------------------------------------------------------------
+   def __init__(self):
+      self.data = {}
+
+   def read(self, address, length):
+      return bytes(self.data.get(address + i, 0) for i in range(length))
+
+   def write(self, address, values):
+      for i, value in enumerate(values):
+         self.data[address + i] = value
+
+def sender_card_registers(model):
+   registers = Registers()
+   registers.write(MODEL, SENDER_MODELS[model])
+   registers.write(SENDER_FIRMWARE, b"\x04\x06\x02\x00")
+   registers.write(DVI_SIGNAL, b"\x01")
+   registers.write(BRIGHTNESS, b"\xFF\xFF\xFF\xFF\xFF")
+   return registers
+
+def receiver_card_registers(model, modules, data_groups, rng):
+   registers = Registers()
+   registers.write(RECEIVER_MODEL, RECEIVER_MODELS[model])
+   registers.write(RECEIVER_FIRMWARE, b"\x04\x06\x02\x10")
+   registers.write(BRIGHTNESS, b"\xFF\xFF\xFF\xFF\xFF")
+   half_degrees = rng.randint(25, 45) * 2 # temperature in 0.5 C units
+   registers.write(MONITORING, bytes([0x80, half_degrees, 0x00, 0x80 | 50])) # valid, +temperature, -, 5.0 V
+   element_length = 22 + 2 * data_groups
+   for module in range(modules):
+      registers.write(MODULE_STATUS + module * element_length, b"\xFF") # module OK, no signal line faults
+      registers.write(MODULE_FLASH + module * 4, b"\x05\x05")
+   return registers
+
+class SenderCard:
+# ---------------------------------------------------------------------------------------
+# One simulated sender card with its receiver cards and optional multifunction card.
+# receivers: number of receiver cards on each LAN port.
+# latency: default reply delay in seconds; latency_by_address overrides it per register.
+# ---------------------------------------------------------------------------------------
+   def __init__(self, receivers, modules, data_groups, sender_model="660", receiver_model="A5s Plus",
+                function_card=False, latency=0.002, latency_by_address=None, drop=0.0, bad_checksum=0.0,
+                strict=False, seed=None, logger_name="novastar_simulator"):
+      self.logger = logging.getLogger(logger_name)
+      self.rng = random.Random(seed)
+      self.sender = sender_card_registers(sender_model)
+      self.function_card = None
+      if function_card:
+         self.function_card = Registers()
+         self.function_card.write(MODEL, b"\x01\x81") # MFN300/MFN300-B
+         self.function_card.write(AMBIENT_LIGHT, b"\x00\x00\x80\x40\x00")
+      self.receivers = {}
+      for lan_port, count in enumerate(receivers):
+         for index in range(count):
+            self.receivers[(lan_port, index)] = receiver_card_registers(receiver_model, modules, data_groups, self.rng)
+      self.latency = float(latency)
+      self.latency_by_address = latency_by_address or {}
+      self.drop = float(drop)
+      self.bad_checksum = float(bad_checksum)
+      self.strict = strict
+      self.received = bytearray()
+      self.busy_until = 0.0
+      self.requests = 0
+      self.bytes_received = 0
+      self.bytes_sent = 0
+
+   def registers_for(self, frame):
+      # Register maps addressed by a request; several for a broadcast write
+      device = frame[DEVICE_TYPE_OFFSET]
+      if device == SENDER_CARD:
+         return [self.sender]
+      if device == FUNCTION_CARD:
+         return [self.function_card] if self.function_card else []
+      lan_port = frame[LAN_PORT_OFFSET]
+      index = int.from_bytes(frame[RECEIVER_INDEX_OFFSET:RECEIVER_INDEX_OFFSET + 2], "little")
+      if index == BROADCAST or lan_port == ALL_LAN_PORTS:
+         return [registers for (port, number), registers in self.receivers.items()
+                 if lan_port in (port, ALL_LAN_PORTS) and index in (number, BROADCAST)]
+      registers = self.receivers.get((lan_port, index))
+      return [registers] if registers else []
+
+   def reply(self, frame):
+      # Reply to one request frame, None if it is dropped
+      address = int.from_bytes(frame[ADDRESS_OFFSET:ADDRESS_OFFSET + 4], "little")
+      length = transport.data_length(frame)
+      write = frame[transport.DIRECTION_OFFSET] == transport.WRITE
+      targets = self.registers_for(frame)
+      if self.strict and not transport.checksum_ok(frame):
+         ack, data = ACK_REQUEST_CHECKSUM, b""
+      elif not targets:
+         ack, data = ACK_TIMEOUT, b""
+      elif write:
+         for registers in targets:
+            registers.write(address, frame[transport.HEADER_LENGTH:transport.HEADER_LENGTH + length])
+         ack, data = ACK_OK, b""
+      else:
+         ack, data = ACK_OK, targets[0].read(address, length)
+      if self.rng.random() < self.drop:
+         self.logger.debug("Dropping reply to request {:02X} ({:08X})".format(frame[transport.SERIAL_NUMBER_OFFSET], address))
+         return None
+      reply = bytearray(transport.REPLY_HEADER + bytes([ack, frame[transport.SERIAL_NUMBER_OFFSET]]) + b"\x00\xFE")
+      reply += frame[DEVICE_TYPE_OFFSET:transport.LENGTH_OFFSET]
+      reply += transport.CHECKSUM.pack(len(data)) + data + b"\x00\x00"
+      checksum = transport.frame_checksum(reply)
+      if self.rng.random() < self.bad_checksum:
+         checksum ^= 0x0101
+      transport.CHECKSUM.pack_into(reply, len(reply) - 2, checksum)
+      return bytes(reply)
+
+   def feed(self, data, now):
+   # ---------------------------------------------------------------------------------------
+   # Take received bytes; returns [(due time, reply)] for every complete request.
+   # Write requests carry their data field, read requests end after the length field.
+   # ---------------------------------------------------------------------------------------
+      self.received += data
+      self.bytes_received += len(data)
+      replies = []
+      while True:
+         start = self.received.find(REQUEST_HEADER)
+         if start < 0:
+            del self.received[:-1]
+            return replies
+         del self.received[:start]
+         if len(self.received) < transport.FRAME_OVERHEAD:
+            return replies
+         end = transport.FRAME_OVERHEAD
+         if self.received[transport.DIRECTION_OFFSET] == transport.WRITE:
+            end += transport.data_length(self.received)
+         if len(self.received) < end:
+            return replies
+         frame = bytes(self.received[:end])
+         del self.received[:end]
+         self.requests += 1
+         address = int.from_bytes(frame[ADDRESS_OFFSET:ADDRESS_OFFSET + 4], "little")
+         self.busy_until = max(self.busy_until, now) + self.latency_by_address.get(address, self.latency)
+         reply = self.reply(frame)
+         if reply is not None:
+            replies.append((self.busy_until, reply))
+
+def open_pty(link=None):
+   # Raw pseudo-terminal; returns (master fd, slave fd, path the scripts should open)
+   master, slave = os.openpty()
+   tty.setraw(slave)
+   path = os.ttyname(slave)
+   if link:
+      if os.path.lexists(link):
+         os.remove(link)
+      os.symlink(path, link)
+      path = link
+   return master, slave, path
+
+def serve(cards, stop=None):
+# ---------------------------------------------------------------------------------------
+# Answer requests on every {master fd: SenderCard} until interrupted, or until `stop`
+# (anything with a fileno(), e.g. a multiprocessing connection) becomes readable
+# ---------------------------------------------------------------------------------------
+   pending = [] # heap of (due time, sequence, fd, reply)
+   sequence = 0
+   watched = list(cards) + ([stop] if stop is not None else [])
+   while True:
+      timeout = max(0.0, pending[0][0] - time.monotonic()) if pending else None
+      readable, _, _ = select.select(watched, [], [], timeout)
+      if stop is not None and stop in readable:
+         return
+      now = time.monotonic()
+      for fd in readable:
+         for due, reply in cards[fd].feed(os.read(fd, 4096), now):
+            heapq.heappush(pending, (due, sequence, fd, reply))
+            sequence += 1
+      now = time.monotonic()
+      while pending and pending[0][0] <= now:
+         due, _, fd, reply = heapq.heappop(pending)
+         os.write(fd, reply)
+         cards[fd].bytes_sent += len(reply)
+
+def parse_latency(text):
+   # "0A000000=0.05" -> (0x0A000000, 0.05)
+   address, _, seconds = text.partition("=")
+   return int(address, 16), float(seconds)
+
+def main(argv=None):
+   parser = argparse.ArgumentParser(description="Simulated Novastar sender card on a pseudo-terminal")
+   parser.add_argument("--senders", type=int, default=1, help="number of simulated sender cards (one pseudo-terminal each)")
+   parser.add_argument("--lan-ports", type=int, default=1, help="sender card outputs with receiver cards")
+   parser.add_argument("--receivers", default="2", help="receiver cards per LAN port, or a comma separated count for each port")
+   parser.add_argument("--modules", type=int, default=4, help="modules per receiver card")
+   parser.add_argument("--data-groups", type=int, default=4, help="data groups per module")
+   parser.add_argument("--sender-model", choices=sorted(SENDER_MODELS), default="660")
+   parser.add_argument("--receiver-model", choices=sorted(RECEIVER_MODELS), default="A5s Plus")
+   parser.add_argument("--function-card", action="store_true", help="add an MFN300 multifunction card")
+   parser.add_argument("--latency", type=float, default=0.002, help="reply delay in seconds")
+   parser.add_argument("--latency-for", type=parse_latency, action="append", default=[], metavar="ADDRESS=SECONDS",
+                       help="reply delay for one register address (hex), e.g. 0A000000=0.05")
+   parser.add_argument("--drop", type=float, default=0.0, help="fraction of replies never sent")
+   parser.add_argument("--bad-checksum", type=float, default=0.0, help="fraction of replies sent with a bad checksum")
+   parser.add_argument("--strict", action="store_true", help="reject requests with a bad checksum (acknowledge code 2)")
+   parser.add_argument("--seed", type=int, default=None, help="random seed for temperatures and faults")
+   parser.add_argument("--link", default=None, help="symbolic link to the pseudo-terminal (numbered from the second sender card)")
+   args = parser.parse_args(argv)
+
+   logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s', datefmt='%Y/%m/%d %H:%M:%S')
+   logger = logging.getLogger("novastar_simulator")
+   counts = [int(count) for count in args.receivers.split(",")]
+   receivers = counts if len(counts) > 1 else counts * args.lan_ports
+   cards = {}
+   slaves = [] # kept open so the pseudo-terminals stay up between clients
+   for number in range(args.senders):
+      link = args.link if not args.link or number == 0 else "{}{}".format(args.link, number)
+      master, slave, path = open_pty(link)
+      slaves.append(slave)
+      cards[master] = SenderCard(receivers, args.modules, args.data_groups, args.sender_model, args.receiver_model,
+                                 args.function_card, args.latency, dict(args.latency_for), args.drop, args.bad_checksum,
+                                 args.strict, None if args.seed is None else args.seed + number)
+      logger.info("Sender card {} on {} ({} receiver cards on {} LAN ports)".format(number + 1, path, sum(receivers), len(receivers)))
+   try:
+      serve(cards)
+   except KeyboardInterrupt:
+      logger.info("Stopped after {} requests".format(sum(card.requests for card in cards.values())))
+
+if __name__ == "__main__":
+   sys.exit(main())
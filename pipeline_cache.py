@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# PIPELINE CACHE
+# Remembers the sender cards that dropped pipelined requests, keyed by the serial number of their USB adapter.
+#
+# DESCRIPTION
+# - transport.Pipeline falls back to one request at a time when a request goes unanswered while others are in
+#   flight. The fallback only lasted for the scan, so every scan of such a sender card first lost a timeout
+#   and resent its requests before it went on one at a time.
+# - The fallback is stored in pipeline_cache.json, next to status.json, as
+#   {"<USB serial number>": {"window", "until", "failures"}}. Like baudrate_cache.json it is keyed by the USB
+#   serial number (SER=... in the pyserial hwid string), which stays with the controller whichever
+#   /dev/ttyUSBx or COMx it enumerates as. Sender cards without one are not remembered.
+# - Until "until" (time.time()) the sender card is scanned with the window it fell back to. After that the
+#   configured "pipeline_window" is tried again. A scan at that window that needs no fallback removes the entry;
+#   another fallback holds it for twice as long as the last time (HOLD, doubling up to MAX_HOLD), so a single
+#   dropped reply costs an hour of pipelining and a card that keeps dropping them is only retried weekly.
+#------------------------------------------------------------------------------------------------------------
+import time
+import baud_cache
+from methods import read_cache, write_data
+
+CACHE_FILE = "pipeline_cache.json"
+HOLD = 3600 # seconds a first fallback is kept
+MAX_HOLD = 7 * 86400
+
+def load(logger_name):
+   return read_cache(CACHE_FILE, logger_name)
+
+def save(cache, logger_name):
+   write_data(CACHE_FILE, cache, logger_name)
+
+def cache_key(hwid):
+   # USB serial number of a sender card's adapter (status.json "controllerHardware"), None if it has none
+   return baud_cache.usb_serial_number(hwid)
+
+def window(cache, key, configured, now=None):
+   # Window to open the link to a sender card with: the configured one, unless it fell back and is still held
+   now = time.time() if now is None else now
+   entry = cache.get(key) if key else None
+   if entry is None or now >= entry["until"]:
+      return int(configured)
+   return min(int(configured), int(entry["window"]))
+
+def remember(cache, key, configured, opened, window, now=None):
+# ---------------------------------------------------------------------------------------
+# Record how a scan went. opened is the window the link was opened with, window the one
+# it was left with. Returns True if the cache changed.
+# ---------------------------------------------------------------------------------------
+   if not key:
+      return False
+   now = time.time() if now is None else now
+   if window < opened: # fell back during this scan
+      failures = cache[key]["failures"] + 1 if key in cache else 1
+      cache[key] = {"window": window, "until": now + min(HOLD * 2 ** (failures - 1), MAX_HOLD), "failures": failures}
+      return True
+   if opened >= int(configured) and key in cache: # the configured window worked again
+      del cache[key]
+      return True
+   return False
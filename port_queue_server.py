@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# PORT QUEUE SERVER
+# Reference implementation of the local server on 127.0.0.1:8888 which the monitoring checks ask for permission
+# to use the serial ports (base.communicate_with_server / session_handler).
+#
+# DESCRIPTION
+# - A check connects, sends its name and waits for START. It then owns the ports until it sends Done, which
+#   is answered with OK.
+# - Permission is given as leases on individual ports. A client may name the ports it needs after its name
+#   ("set_display_on /dev/ttyUSB0"); a client that names none gets a lease on every port, as before. Checks on
+#   different ports therefore run at the same time, while a whole host lease still waits for all of them.
+# - Each port is served first come, first served: a request is granted once none of its ports are leased and
+#   no earlier request waiting for one of them is still queued, so a whole host lease cannot be starved by a
+#   stream of single port checks.
+# - A lease held for longer than "lease_timeout" seconds (config.json) is revoked and the client disconnected,
+#   so a crashed or hung check can't hold a port forever. A client that disconnects gives its lease back.
+# - STATS returns, as one line of JSON, the number of sessions, the wait and hold times and the number of
+#   revoked leases of each client name (the _logger_name of the checks).
+#
+# PROTOCOL
+#   <client name> [port ...]   -> START (once the lease is granted)
+#   Done                       -> OK
+#   STATS                      -> {"<client name>": {...}, ...}
+# A leading PORTS, which checks send to find out whether a serial broker is listening, is ignored. A server that
+# only knows the bare client name may answer it with anything else: the checks then connect again and send
+# just their name (a lease on every port).
+#
+# USAGE
+# Linux: python3 port_queue_server.py (run as a service, in place of serial_broker.py)
+#------------------------------------------------------------------------------------------------------------
+import json
+import time
+import asyncio
+import logging
+import methods
+
+HOST = "127.0.0.1"
+PORT = 8888
+ALL_PORTS = "*" # lease on every port of the host
+DEFAULT_LEASE_TIMEOUT = 300 # seconds
+
+FORMATTER = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s', datefmt='%Y/%m/%d %H:%M:%S')
+LOG_FILE = "debug.log"
+LOGGER_NAME = "port_queue_server"
+LOGGER_SCHEDULE = 'midnight'
+LOGGER_BACKUPS = 7
+LOGGER_INTERVAL = 1
+
+class Lease:
+   def __init__(self, client, ports):
+      self.client = client
+      self.ports = frozenset(ports) or frozenset([ALL_PORTS])
+      self.requested = time.monotonic()
+      self.granted = None
+      self.ready = asyncio.Event()
+
+   def conflicts(self, other):
+      return ALL_PORTS in self.ports or ALL_PORTS in other.ports or not self.ports.isdisjoint(other.ports)
+
+class ClientStats:
+   def __init__(self):
+      self.sessions = 0
+      self.revoked = 0
+      self.wait_total = 0.0
+      self.wait_max = 0.0
+      self.hold_total = 0.0
+      self.hold_max = 0.0
+
+   def summary(self):
+      sessions = max(self.sessions, 1)
+      return {
+         "sessions": self.sessions,
+         "revoked": self.revoked,
+         "wait_avg": round(self.wait_total / sessions, 3),
+         "wait_max": round(self.wait_max, 3),
+         "hold_avg": round(self.hold_total / sessions, 3),
+         "hold_max": round(self.hold_max, 3),
+      }
+
+class PortQueueServer:
+# ---------------------------------------------------------------------------------------
+# Grants port leases in arrival order. `waiting` is the FIFO queue of requests not yet
+# granted, `held` the leases currently granted.
+# ---------------------------------------------------------------------------------------
+   def __init__(self, lease_timeout, logger_name):
+      self.lease_timeout = float(lease_timeout)
+      self.logger = logging.getLogger(logger_name)
+      self.waiting = []
+      self.held = []
+      self.stats = {}
+
+   def grant(self):
+      # Grant every waiting request that conflicts with no held lease and no earlier waiting request
+      earlier = []
+      for lease in list(self.waiting):
+         if not any(lease.conflicts(other) for other in self.held + earlier):
+            self.waiting.remove(lease)
+            self.held.append(lease)
+            lease.granted = time.monotonic()
+            lease.ready.set()
+         else:
+            earlier.append(lease)
+
+   def release(self, lease, revoked=False):
+      if lease in self.waiting:
+         self.waiting.remove(lease)
+      elif lease in self.held:
+         self.held.remove(lease)
+         now = time.monotonic()
+         stats = self.stats.setdefault(lease.client, ClientStats())
+         stats.sessions += 1
+         stats.revoked += revoked
+         wait, hold = lease.granted - lease.requested, now - lease.granted
+         stats.wait_total += wait
+         stats.wait_max = max(stats.wait_max, wait)
+         stats.hold_total += hold
+         stats.hold_max = max(stats.hold_max, hold)
+         self.logger.info("{} released {} after {:.2f}s (waited {:.2f}s)".format(lease.client, " ".join(sorted(lease.ports)), hold, wait))
+      self.grant()
+
+   async def handle_client(self, reader, writer):
+      lease = None
+      try:
+         words = (await reader.read(1024)).decode(errors="replace").split()
+         if words[:1] == ["PORTS"]:
+            words = words[1:]
+         if not words:
+            return
+         if words == ["STATS"]:
+            summary = {client: stats.summary() for client, stats in sorted(self.stats.items())}
+            writer.write((json.dumps(summary) + "\n").encode())
+            await writer.drain()
+            return
+         lease = Lease(words[0], words[1:])
+         self.waiting.append(lease)
+         self.grant()
+         if not lease.ready.is_set():
+            self.logger.info("{} waiting for {}".format(lease.client, " ".join(sorted(lease.ports))))
+         await lease.ready.wait()
+         self.logger.info("{} granted {}".format(lease.client, " ".join(sorted(lease.ports))))
+         writer.write(b"START")
+         await writer.drain()
+         try:
+            await asyncio.wait_for(reader.read(1024), self.lease_timeout) # Done, or the connection closing
+         except asyncio.TimeoutError:
+            self.logger.warning("{} held {} for more than {}s, lease revoked".format(lease.client, " ".join(sorted(lease.ports)), self.lease_timeout))
+            self.release(lease, revoked=True)
+            lease = None
+            return
+         self.release(lease)
+         lease = None
+         writer.write(b"OK")
+         await writer.drain()
+      except ConnectionError as e:
+         self.logger.warning("Client connection lost: {}".format(e))
+      finally:
+         if lease is not None: # client gone before it was done
+            self.release(lease)
+         writer.close()
+
+async def main():
+   logger = methods.get_logger(LOGGER_NAME,LOG_FILE,FORMATTER,LOGGER_SCHEDULE,LOGGER_INTERVAL,LOGGER_BACKUPS)
+   config = methods.loadConfig(LOGGER_NAME)
+   queue = PortQueueServer(config.get("lease_timeout", DEFAULT_LEASE_TIMEOUT), LOGGER_NAME)
+   server = await asyncio.start_server(queue.handle_client, HOST, PORT)
+   logger.info("Port queue server listening on {}:{}, lease timeout {}s".format(HOST, PORT, queue.lease_timeout))
+   async with server:
+      await server.serve_forever()
+
+if __name__ == "__main__":
+   asyncio.run(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# READ PLANNER
+# Coalesces receiver card register reads into as few frames as possible.
+#
+# DESCRIPTION
+# - Several per-receiver reads sit in the same register windows, e.g. module status (0x0A00_000A) lives inside
+#   the monitoring block (0x0A00_0000, 100H), and kill mode (0x0200_0100) and lock mode (0x0200_0102) sit next
+#   to the brightness registers (0x0200_0001).
+# - plan_reads() merges read requests addressed to the same card whose register ranges overlap or are at most
+#   `max_gap` bytes apart into one larger read.
+# - slice_reply() cuts each original request's data back out of the block reply and returns it as a complete
+#   reply frame, so the existing decoders (which index rx_data[18:]) work unchanged.
+#------------------------------------------------------------------------------------------------------------
+import methods
+import transport
+
+ADDRESS_OFFSET = 12
+TARGET = slice(4, 10) # source, destination, device type, LAN port and receiver index
+MAX_BLOCK_LENGTH = transport.MAX_DATA_LENGTH # never merge into a single read longer than this
+
+def register_address(frame):
+   return int.from_bytes(bytes(frame[ADDRESS_OFFSET:ADDRESS_OFFSET + 4]), "little")
+
+class ReadBlock:
+# ---------------------------------------------------------------------------------------
+# One coalesced read: a start address, a length and the offset of every merged request
+# inside the block.
+# ---------------------------------------------------------------------------------------
+   def __init__(self, name, frame):
+      self.template = list(frame)
+      self.address = register_address(frame)
+      self.length = transport.data_length(frame)
+      self.members = {name: 0}
+
+   def end(self):
+      return self.address + self.length
+
+   def can_merge(self, frame, max_gap):
+      address = register_address(frame)
+      end = max(self.end(), address + transport.data_length(frame))
+      return (bytes(frame[TARGET]) == bytes(self.template[TARGET])
+              and address <= self.end() + max_gap
+              and end - self.address <= MAX_BLOCK_LENGTH)
+
+   def merge(self, name, frame):
+      address = register_address(frame)
+      self.length = max(self.end(), address + transport.data_length(frame)) - self.address
+      self.members[name] = address - self.address
+
+   def frame(self):
+      # Request frame reading the whole block
+      block = list(self.template)
+      block[ADDRESS_OFFSET:ADDRESS_OFFSET + 4] = list(self.address.to_bytes(4, "little"))
+      block[transport.LENGTH_OFFSET] = self.length & 0xFF
+      block[transport.LENGTH_OFFSET + 1] = (self.length & 0xFF00) >> 8
+      return methods.checksum(block)
+
+def plan_reads(frames, max_gap):
+# ---------------------------------------------------------------------------------------
+# Group read requests into blocks.
+# frames: {name: request frame}. Write requests are never merged.
+# Returns the list of ReadBlock objects, one frame each.
+# ---------------------------------------------------------------------------------------
+   blocks = []
+   reads = sorted(frames.items(), key=lambda item: (bytes(item[1][TARGET]), register_address(item[1])))
+   for name, frame in reads:
+      if frame[transport.DIRECTION_OFFSET] == transport.READ and blocks and blocks[-1].can_merge(frame, max_gap):
+         blocks[-1].merge(name, frame)
+      else:
+         blocks.append(ReadBlock(name, frame))
+   return blocks
+
+def slice_reply(block, reply, name, frame):
+# ---------------------------------------------------------------------------------------
+# Rebuild the reply the original request would have received from the block reply.
+# The acknowledge code is carried over, so failed block reads still fail per request.
+# ---------------------------------------------------------------------------------------
+   if len(reply) < transport.HEADER_LENGTH:
+      return b""
+   length = transport.data_length(frame)
+   offset = transport.HEADER_LENGTH + block.members[name]
+   data = list(reply[offset:offset + length])
+   data += [0] * (length - len(data))
+   header = list(reply[:transport.HEADER_LENGTH])
+   header[ADDRESS_OFFSET:transport.LENGTH_OFFSET + 2] = list(frame[ADDRESS_OFFSET:transport.LENGTH_OFFSET + 2])
+   return bytes(methods.checksum(header + data + [0, 0]))
+
+def coalesced_transact(link, frames, max_gap):
+# ---------------------------------------------------------------------------------------
+# Read every request in `frames` ({name: frame}) using as few frames as possible and
+# return {name: reply}. `link` is a transport.Pipeline; blocks are pipelined when its
+# window allows it.
+# ---------------------------------------------------------------------------------------
+   blocks = plan_reads(frames, max_gap)
+   replies = link.transact_many([block.frame() for block in blocks])
+   result = {}
+   for block, reply in zip(blocks, replies):
+      for name in block.members:
+         result[name] = slice_reply(block, reply, name, frames[name])
+   return result
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# RECEIVER SEARCH
+# Finds the number of receiver cards chained on a sender card output (LAN port) in a logarithmic number of probes.
+#
+# DESCRIPTION
+# - Receiver cards on a LAN port are addressed 0, 1, 2, ... in chain order. They used to be found by probing
+#   each index in turn until one did not answer, i.e. one round trip per receiver card (244 on the largest
+#   displays) before any real data was read.
+# - count_receivers() probes indexes 0, 2, 6, 14, 30, ... until one is absent, then binary searches between the
+#   last index present and the first absent one: about 2 x log2(n) probes, e.g. 15 instead of 245 for 244 cards.
+# - The search assumes the chain is contiguous. A card that does not answer in the middle of the chain may
+#   hide the cards behind it, as with the one by one probe, or be counted and then reported by the per receiver
+#   checks, depending on where the probes land. Set "receiver_discovery" to "linear" in config.json for the one
+#   by one probe.
+# - Given the count found by the previous scan (topology_cache.py), only the boundary of the chain is checked:
+#   receiver card n-1 present and receiver card n absent. The search above only runs when that check fails.
+#------------------------------------------------------------------------------------------------------------
+MAX_RECEIVERS = 0xFFFF # receiver index FFFFH is the broadcast address
+SEARCH = "search"
+LINEAR = "linear"
+
+def search(limit=MAX_RECEIVERS, mode=SEARCH, expected=None):
+# ---------------------------------------------------------------------------------------
+# The search itself, as a generator: it yields each receiver index to probe, is sent
+# back True if that receiver card answers, and returns n, the receiver cards present
+# being 0 .. n-1. Each index is yielded at most once. expected is the count found last
+# time, if known. count_receivers() and count_receivers_async() drive it.
+# ---------------------------------------------------------------------------------------
+   answers = {}
+   if expected is not None and 0 <= expected < limit:
+      if expected > 0:
+         answers[expected - 1] = yield expected - 1
+      if (expected == 0 or answers[expected - 1]):
+         answers[expected] = yield expected
+         if not answers[expected]:
+            return expected
+   if mode == LINEAR:
+      count = 0
+      while count < limit:
+         if count not in answers:
+            answers[count] = yield count
+         if not answers[count]:
+            break
+         count += 1
+      return count
+   # highest index known present and lowest index above it known absent, from the boundary check if it ran
+   last = max((index for index, answer in answers.items() if answer), default=-1)
+   absent = min((index for index, answer in answers.items() if not answer and index > last), default=None)
+   step = 1
+   while absent is None:
+      index = last + step
+      if index >= limit:
+         absent = limit
+         break
+      if index not in answers:
+         answers[index] = yield index
+      if answers[index]:
+         last = index
+         step *= 2
+      else:
+         absent = index
+   while absent - last > 1:
+      index = (last + absent) // 2
+      if index not in answers:
+         answers[index] = yield index
+      if answers[index]:
+         last = index
+      else:
+         absent = index
+   return last + 1
+
+def count_receivers(probe, limit=MAX_RECEIVERS, mode=SEARCH, expected=None):
+# ---------------------------------------------------------------------------------------
+# Number of receiver cards on one LAN port.
+# probe(index) returns True if receiver card `index` answers.
+# ---------------------------------------------------------------------------------------
+   steps = search(limit, mode, expected)
+   try:
+      index = next(steps)
+      while True:
+         index = steps.send(bool(probe(index)))
+   except StopIteration as done:
+      return done.value
+
+async def count_receivers_async(probe, limit=MAX_RECEIVERS, mode=SEARCH, expected=None):
+   # count_receivers() for a coroutine probe, e.g. over the serial broker (base_monitoring.py)
+   steps = search(limit, mode, expected)
+   try:
+      index = next(steps)
+      while True:
+         index = steps.send(bool(await probe(index)))
+   except StopIteration as done:
+      return done.value
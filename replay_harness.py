@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# REPLAY HARNESS
+# Replays serial traffic captured in the debug logs through a fake serial port, for regression testing and
+# profiling the decoders and scan logic against real field traffic without a sender card.
+#
+# DESCRIPTION
+# - build: parses the "Sending command:" / "Received data:" lines of debug.log files (and captures such as
+#   "15 Jan Bug Log.txt") into a compact binary fixture. Each exchange keeps the time it was logged, the time
+#   until its reply was logged, the serial port it was sent on, the request and the reply. A request without a
+#   reply (a timeout) or a reply whose request was not logged is kept as well. Bytes logged after the end of a
+#   request frame are dropped. transport.py logs each request as written, serial number included, so replies
+#   are paired with their request by it.
+# - ReplaySerial: serial port object (write / read / inWaiting ...) which answers each request with the reply
+#   recorded for the same command (device type, LAN port, receiver index, direction and register address).
+#   The reply is given the serial number of the request, as transport.py expects, and is delivered after the
+#   recorded delay divided by `speed` (0 = at once). Use it in place of methods.setupSerialPort() to run the
+#   scan logic against a capture.
+# - replay: sends every recorded request through transport.transact() on a ReplaySerial, or with --decoder
+#   feeds the recorded reply bytes straight into a transport.FrameDecoder, and reports frames per second and
+#   the requests left without a reply.
+#
+# FIXTURE FORMAT (little endian)
+# - "NSREPLAY" magic, version (H), number of ports (H), then for each port its name length (H) and name (utf-8)
+# - one record per exchange: time (d), reply delay (f), port index (H), request length (H), reply length (H),
+#   request, reply
+# The debug logs have a resolution of one second, so recorded timing is only as good as that.
+#
+# USAGE
+# Linux: python3 replay_harness.py build debug.log* "15 Jan Bug Log.txt" -o field_traffic.nsr
+#        python3 replay_harness.py replay field_traffic.nsr --loops 1000
+#        python3 replay_harness.py replay field_traffic.nsr --decoder --loops 1000
+#------------------------------------------------------------------------------------------------------------
+import re
+import sys
+import time
+import struct
+import argparse
+import datetime
+import collections
+import transport
+
+MAGIC = b"NSREPLAY"
+VERSION = 1
+HEADER = struct.Struct("<HH")
+LENGTH = struct.Struct("<H")
+RECORD = struct.Struct("<dfHHH")
+COMMAND = slice(6, 16) # device type, LAN port, receiver index, direction, reserved, register address
+
+LOG_LINE = re.compile(r"^(\d{2,4}/\d\d/\d{2,4} \d\d:\d\d:\d\d)\s+(.*)$")
+TIME_FORMATS = ("%d/%m/%Y %H:%M:%S", "%Y/%m/%d %H:%M:%S")
+SENT = re.compile(r"Sending command(?: to (\S+?))?\s*:\s*(.*)")
+RECEIVED = re.compile(r"Received data\s*:\s*(.*)")
+PORT = re.compile(r"(?:Searching sender card on port|Connecting to device on|Opened device on port)\s*:?\s*(\S+)")
+HEX_BYTE = re.compile(r"[0-9A-Fa-f]{2}$")
+
+Exchange = collections.namedtuple("Exchange", "time delay port request reply")
+
+def parse_hex(text):
+   # Leading hex bytes of a log message ("55 AA 00 ..."), stopping at the first word that is not a byte
+   values = []
+   for word in text.split():
+      if not HEX_BYTE.match(word):
+         break
+      values.append(int(word, 16))
+   return bytes(values)
+
+def parse_time(text):
+   for time_format in TIME_FORMATS:
+      try:
+         return datetime.datetime.strptime(text, time_format).timestamp()
+      except ValueError:
+         pass
+   return 0.0
+
+def request_frame(frame):
+   # A logged request cut to the length given by its header
+   if len(frame) < transport.FRAME_OVERHEAD or not frame.startswith(transport.REQUEST_HEADER):
+      return frame
+   length = transport.data_length(frame) if frame[transport.DIRECTION_OFFSET] == transport.WRITE else 0
+   return frame[:transport.FRAME_OVERHEAD + length]
+
+def parse_log(lines):
+# ---------------------------------------------------------------------------------------
+# Exchanges logged in a debug log, in the order their requests were logged. Requests are
+# logged as written, so a reply is paired with the request carrying its serial number,
+# which lets pipelined requests (several sent before the first reply) be told apart.
+# A reply without one is paired with the last request logged (older logs show the frame
+# template rather than the bytes sent). A request still waiting when its serial number
+# comes round again, or at the end of the log, got no reply.
+# ---------------------------------------------------------------------------------------
+   logged_in_order = [] # (line number, exchange)
+   port = ""
+   pending = collections.OrderedDict() # serial number -> (line number, time, port, frame) waiting for its reply
+   def unanswered(request):
+      logged_in_order.append((request[0], Exchange(request[1], 0.0, request[2], request[3], b"")))
+   for number, line in enumerate(lines):
+      match = LOG_LINE.match(line.strip())
+      if not match:
+         continue
+      logged, message = parse_time(match.group(1)), match.group(2)
+      sent, received, named = SENT.search(message), RECEIVED.search(message), PORT.search(message)
+      if named and not sent:
+         port = named.group(1)
+      elif sent:
+         frame = request_frame(parse_hex(sent.group(2)))
+         serial_number = frame[transport.SERIAL_NUMBER_OFFSET] if len(frame) > transport.SERIAL_NUMBER_OFFSET else None
+         if serial_number in pending:
+            unanswered(pending.pop(serial_number))
+         pending[serial_number] = (number, logged, sent.group(1) or port, frame)
+      elif received:
+         reply = parse_hex(received.group(1))
+         serial_number = reply[transport.SERIAL_NUMBER_OFFSET] if len(reply) > transport.SERIAL_NUMBER_OFFSET else None
+         if serial_number in pending:
+            request = pending.pop(serial_number)
+         elif pending:
+            request = pending.popitem()[1]
+         else:
+            request = None
+         if request is not None:
+            logged_in_order.append((request[0], Exchange(request[1], logged - request[1], request[2], request[3], reply)))
+         elif reply:
+            logged_in_order.append((number, Exchange(logged, 0.0, port, b"", reply)))
+   for request in pending.values():
+      unanswered(request)
+   return [exchange for number, exchange in sorted(logged_in_order, key=lambda entry: entry[0])]
+
+def save_fixture(path, exchanges):
+   ports = sorted({exchange.port for exchange in exchanges})
+   index = {port: number for number, port in enumerate(ports)}
+   with open(path, "wb") as f:
+      f.write(MAGIC + HEADER.pack(VERSION, len(ports)))
+      for port in ports:
+         name = port.encode("utf-8")
+         f.write(LENGTH.pack(len(name)) + name)
+      for exchange in exchanges:
+         f.write(RECORD.pack(exchange.time, exchange.delay, index[exchange.port], len(exchange.request), len(exchange.reply)))
+         f.write(exchange.request + exchange.reply)
+
+def load_fixture(path):
+   with open(path, "rb") as f:
+      data = f.read()
+   if not data.startswith(MAGIC):
+      raise ValueError("{} is not a replay fixture".format(path))
+   offset = len(MAGIC)
+   version, port_count = HEADER.unpack_from(data, offset)
+   if version != VERSION:
+      raise ValueError("{} is a version {} replay fixture, expected {}".format(path, version, VERSION))
+   offset += HEADER.size
+   ports = []
+   for _ in range(port_count):
+      length, = LENGTH.unpack_from(data, offset)
+      offset += LENGTH.size
+      ports.append(data[offset:offset + length].decode("utf-8"))
+      offset += length
+   exchanges = []
+   while offset < len(data):
+      logged, delay, port, request_length, reply_length = RECORD.unpack_from(data, offset)
+      offset += RECORD.size
+      request = data[offset:offset + request_length]
+      reply = data[offset + request_length:offset + request_length + reply_length]
+      offset += request_length + reply_length
+      exchanges.append(Exchange(logged, delay, ports[port], request, reply))
+   return exchanges
+
+def command_key(frame):
+   return bytes(frame[COMMAND])
+
+class ReplaySerial:
+# ---------------------------------------------------------------------------------------
+# Fake serial port answering requests with the replies recorded in a fixture.
+# Replies to the same command are served in recorded order and start again from the
+# first once used up. A command never recorded with a reply gets none (a timeout).
+# ---------------------------------------------------------------------------------------
+   def __init__(self, exchanges, speed=0.0, port=None, baudrate=115200):
+      self.replies = collections.defaultdict(list)
+      for exchange in exchanges:
+         if exchange.reply and len(exchange.reply) >= transport.HEADER_LENGTH:
+            key = command_key(exchange.request if exchange.request else exchange.reply)
+            self.replies[key].append((exchange.reply, max(0.0, exchange.delay)))
+      self.used = collections.Counter()
+      self.speed = float(speed)
+      self.port = port
+      self.baudrate = baudrate
+      self.is_open = False
+      self.pending = collections.deque() # (due time, bytes)
+      self.buffer = bytearray()
+      self.writes = 0
+
+   @property
+   def name(self):
+      return self.port
+
+   def open(self):
+      self.is_open = True
+
+   def close(self):
+      self.is_open = False
+
+   def isOpen(self):
+      return self.is_open
+
+   def flushInput(self):
+      self.pending.clear()
+      del self.buffer[:]
+
+   def flushOutput(self):
+      pass
+
+   def write(self, frame):
+      frame = bytes(frame)
+      self.writes += 1
+      key = command_key(frame)
+      replies = self.replies.get(key)
+      if not replies:
+         return len(frame)
+      reply, delay = replies[self.used[key] % len(replies)]
+      self.used[key] += 1
+      reply = bytearray(reply)
+      if transport.checksum_ok(reply) and len(frame) > transport.SERIAL_NUMBER_OFFSET:
+         reply[transport.SERIAL_NUMBER_OFFSET] = frame[transport.SERIAL_NUMBER_OFFSET]
+         transport.CHECKSUM.pack_into(reply, len(reply) - 2, transport.frame_checksum(reply))
+      delay = delay / self.speed if self.speed > 0 else 0.0
+      self.pending.append((time.monotonic() + delay, bytes(reply)))
+      return len(frame)
+
+   def inWaiting(self):
+      now = time.monotonic()
+      while self.pending and self.pending[0][0] <= now:
+         self.buffer += self.pending.popleft()[1]
+      return len(self.buffer)
+
+   @property
+   def in_waiting(self):
+      return self.inWaiting()
+
+   def read(self, size=1):
+      self.inWaiting()
+      data = bytes(self.buffer[:size])
+      del self.buffer[:size]
+      return data
+
+def replay_transact(exchanges, loops, speed, timeout):
+   # Every recorded request through transport.transact(); returns (frames, unanswered, seconds)
+   requests = [exchange.request for exchange in exchanges if len(exchange.request) >= transport.FRAME_OVERHEAD]
+   ser = ReplaySerial(exchanges, speed)
+   frames = unanswered = 0
+   start = time.perf_counter()
+   for _ in range(loops):
+      for request in requests:
+         if transport.transact(ser, request, timeout):
+            frames += 1
+         else:
+            unanswered += 1
+   return frames, unanswered, time.perf_counter() - start
+
+def replay_decoder(exchanges, loops):
+   # All recorded reply bytes through one FrameDecoder; returns (frames, bytes, seconds)
+   stream = b"".join(exchange.reply for exchange in exchanges)
+   decoder = transport.FrameDecoder()
+   frames = 0
+   start = time.perf_counter()
+   for _ in range(loops):
+      decoder.feed(stream)
+      frames += sum(1 for frame in decoder.frames())
+   return frames, len(stream) * loops, time.perf_counter() - start
+
+def main(argv=None):
+   parser = argparse.ArgumentParser(description="Build and replay serial traffic fixtures from debug logs")
+   commands = parser.add_subparsers(dest="command")
+   build = commands.add_parser("build", help="parse debug logs into a binary fixture")
+   build.add_argument("logs", nargs="+")
+   build.add_argument("-o", "--output", default="field_traffic.nsr")
+   replay = commands.add_parser("replay", help="replay a fixture through transport.py")
+   replay.add_argument("fixture")
+   replay.add_argument("--loops", type=int, default=1, help="times to replay the whole fixture")
+   replay.add_argument("--speed", type=float, default=0.0, help="1 = recorded timing, 10 = ten times faster, 0 = no delay")
+   replay.add_argument("--timeout", type=float, default=0.5, help="reply timeout in seconds")
+   replay.add_argument("--decoder", action="store_true", help="feed the recorded replies straight into a FrameDecoder")
+   args = parser.parse_args(argv)
+
+   if args.command == "build":
+      exchanges = []
+      for path in args.logs:
+         with open(path, errors="replace") as f:
+            exchanges += parse_log(f)
+      save_fixture(args.output, exchanges)
+      print("{} exchanges ({} unanswered) written to {}".format(len(exchanges), sum(1 for e in exchanges if not e.reply), args.output))
+   elif args.command == "replay":
+      exchanges = load_fixture(args.fixture)
+      if args.decoder:
+         frames, size, seconds = replay_decoder(exchanges, args.loops)
+         print("{} frames ({} bytes) decoded in {:.3f}s: {:.0f} frames/s".format(frames, size, seconds, frames / seconds if seconds else 0))
+      else:
+         frames, unanswered, seconds = replay_transact(exchanges, args.loops, args.speed, args.timeout)
+         print("{} replies, {} unanswered in {:.3f}s: {:.0f} frames/s".format(frames, unanswered, seconds, frames / seconds if seconds else 0))
+   else:
+      parser.print_help()
+      return 1
+
+if __name__ == "__main__":
+   sys.exit(main())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# SCAN BENCHMARK
+# Times full and partial scans against a simulated display, to compare transport and scan changes before and
+# after.
+#
+# DESCRIPTION
+# - For every topology size a simulated sender card (novastar_simulator.py) is started on a pseudo-terminal
+#   in its own process, and each target scan is run against it in a fresh process, so module globals, caches
+#   and peak memory do not carry over from one run to the next.
+# - Targets: display_status (display_status.main), main_monitor (main_monitor.run_checks) and the check_* scripts
+#   (the coroutine each runs once the local queue server grants its ports, see CHECKS), without the local queue
+#   server. check_dvi and check_brightness get base.initialize_program() and an open port first, as
+#   main_monitor.py gives them.
+# - Topology sizes are "<receivers per LAN port>x<LAN ports>". By default the profiles in config.json are used,
+#   from the default 2 receiver card profile up to 244 x 4 for UK-RO-STM-C005.
+# - Reported per run: wall time, frames answered and frames per second, bytes on the wire in each direction,
+#   time spent in time.sleep(), time spent in serial port calls (write, read, inWaiting), CPU time and peak
+#   RSS. Results are printed as a table and written to a JSON file.
+# - Each run uses config.json, with the simulator added to "extra_ports" and the topology as the expected
+#   display. status.json, baudrate_cache.json, the other caches and the logs of the runs are written to the
+#   results folder rather than next to the scripts.
+#
+# USAGE
+# Linux: python3 scan_benchmark.py
+#        python3 scan_benchmark.py --targets display_status check_dvi --sizes 2x1 61x4 244x4 --latency 0.002
+#------------------------------------------------------------------------------------------------------------
+import io
+import os
+import json
+import time
+import logging
+import asyncio
+import argparse
+import resource
+import importlib
+import contextlib
+import multiprocessing
+import methods
+import novastar_simulator
+
+# Check scripts: (coroutine the local queue server session runs, True if it expects base.initialize_program() to
+# have run and the sender card port to be open). check_modules.py and check_receiving_cards_temperature.py are
+# per receiver card helpers of main_monitor.py, not scripts of their own.
+CHECKS = {
+   "check_brightness": ("check_brightness", True),
+   "check_cabinet": ("main", False), # main() runs initialize_program() itself
+   "check_dvi": ("check_dvi", True),
+   "check_receiving_card": ("main", False),
+   "check_sender_card": ("main", False), # stand-alone, no base_monitoring
+}
+TARGETS = ["display_status", "main_monitor"] + sorted(CHECKS)
+SINGLE_BAUDRATE = ("display_status", "check_sender_card")
+SERIAL_CALLS = ("write", "read", "inWaiting")
+
+def config_sizes():
+   # Topology sizes of the display profiles in config.json, smallest first
+   config = methods.loadConfig("scan_benchmark")
+   sizes = set()
+   for name, value in config.items():
+      if isinstance(value, dict) and "receiver_cards" in value and "lan_ports" in value:
+         sizes.add((int(value["receiver_cards"]), int(value["lan_ports"])))
+   return sorted(sizes, key=lambda size: size[0] * size[1])
+
+def parse_size(text):
+   receivers, _, lan_ports = text.lower().partition("x")
+   return int(receivers), int(lan_ports or 1)
+
+def run_simulator(receivers, lan_ports, modules, latency, connection):
+   # Simulator process: sends the pseudo-terminal path, serves until told to stop, sends its counters
+   master, slave, path = novastar_simulator.open_pty()
+   card = novastar_simulator.SenderCard([receivers] * lan_ports, modules, 4, latency=latency, seed=0)
+   connection.send(path)
+   novastar_simulator.serve({master: card}, stop=connection)
+   connection.recv()
+   connection.send({"frames": card.requests, "bytes_to_card": card.bytes_received, "bytes_from_card": card.bytes_sent})
+
+def benchmark_config(target, port, receivers, lan_ports):
+   config = methods.loadConfig("scan_benchmark")
+   profile = {"devices": 1, "receiver_cards": receivers * lan_ports, "lan_ports": lan_ports}
+   config = {key: value for key, value in config.items() if not (isinstance(value, dict) and "lan_ports" in value)}
+   config.update({"default": profile, "extra_ports": [port], "no_of_sender_cards": 1, "devices": 1, "receiver_cards": receivers * lan_ports})
+   config.setdefault("sleep_time", float(config.get("sleepTime", 0.5)))
+   config.setdefault("flash_wait_time", float(config.get("flashWaitTime", 15)))
+   if target in SINGLE_BAUDRATE and isinstance(config.get("baudrate"), list):
+      config["baudrate"] = config["baudrate"][0] # these open the port at a single baudrate
+   return config
+
+class NullStream:
+   # Stands in for the queue server connection of the check scripts
+   def write(self, data):
+      pass
+
+   async def drain(self):
+      pass
+
+   async def read(self, size=-1):
+      return b"OK"
+
+   def close(self):
+      pass
+
+   async def wait_closed(self):
+      pass
+
+def load_target(target):
+   # Import the target and return the function that runs it
+   if target == "display_status":
+      return importlib.import_module("display_status").main
+   if target == "main_monitor":
+      module = importlib.import_module("main_monitor")
+      return lambda: asyncio.run(module.run_checks(NullStream(), NullStream())) # without the local queue server
+   module = importlib.import_module(target)
+   name, prepare = CHECKS[target]
+   callback = getattr(module, name)
+   async def run():
+      if not hasattr(module, "base_script"): # check_sender_card.py: its logger is set by communicate_with_server()
+         module.logger = logging.getLogger(module.LOGGER_NAME)
+      if prepare: # as main_monitor.py does before it runs the check
+         base_script = module.base_script
+         await base_script.initialize_program()
+         if base_script.valid_ports:
+            base_script.ser.port = sorted(base_script.valid_ports)[0]
+            base_script.ser.open()
+      await callback(NullStream(), NullStream())
+   return lambda: asyncio.run(run())
+
+def timed(function, totals, key):
+   def wrapper(*args, **kwargs):
+      start = time.perf_counter()
+      try:
+         return function(*args, **kwargs)
+      finally:
+         totals[key] += time.perf_counter() - start
+   return wrapper
+
+def run_client(target, port, receivers, lan_ports, results_dir, queue):
+# ---------------------------------------------------------------------------------------
+# Client process: instruments time.sleep() and the serial port calls, runs the target
+# with the benchmark configuration and puts its measurements on `queue`
+# ---------------------------------------------------------------------------------------
+   import serial
+   totals = {"sleep": 0.0, "serial": 0.0}
+   time.sleep = timed(time.sleep, totals, "sleep")
+   for call in SERIAL_CALLS:
+      setattr(serial.Serial, call, timed(getattr(serial.Serial, call), totals, "serial"))
+   config = benchmark_config(target, port, receivers, lan_ports)
+   write_data, write_file_atomic = methods.write_data, methods.write_file_atomic
+   def write_results(filename, json_data, logger_name):
+      write_data(os.path.join(results_dir, os.path.basename(filename)), json_data, logger_name)
+   def write_results_atomic(file_path, text): # status.json of display_status.py (status_store.py)
+      write_file_atomic(os.path.join(results_dir, os.path.basename(file_path)), text)
+   methods.loadConfig = lambda logger_name: dict(config) # patched before the target imports them
+   methods.write_data = write_results
+   methods.write_file_atomic = write_results_atomic
+   result = {"exit": None, "error": None}
+   console = io.StringIO()
+   with contextlib.redirect_stderr(console), contextlib.redirect_stdout(console):
+      start, cpu = time.perf_counter(), time.process_time()
+      try:
+         scan = load_target(target)
+         os.chdir(results_dir) # log files
+         start, cpu = time.perf_counter(), time.process_time()
+         scan()
+      except SystemExit as e:
+         result["exit"] = e.code
+      except Exception as e:
+         result["error"] = repr(e)
+      result["wall_s"] = time.perf_counter() - start
+      result["cpu_s"] = time.process_time() - cpu
+   result["sleep_s"] = totals["sleep"]
+   result["serial_io_s"] = totals["serial"]
+   result["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+   queue.put(result)
+
+def benchmark(target, receivers, lan_ports, modules, latency, results_dir):
+   context = multiprocessing.get_context("fork")
+   connection, simulator_end = context.Pipe()
+   simulator = context.Process(target=run_simulator, args=(receivers, lan_ports, modules, latency, simulator_end))
+   simulator.start()
+   port = connection.recv()
+   queue = context.Queue()
+   client = context.Process(target=run_client, args=(target, port, receivers, lan_ports, results_dir, queue))
+   client.start()
+   result = queue.get()
+   client.join()
+   connection.send("stop")
+   result.update(connection.recv())
+   simulator.join()
+   result.update({
+      "target": target,
+      "receivers_per_lan_port": receivers,
+      "lan_ports": lan_ports,
+      "receiver_cards": receivers * lan_ports,
+      "frames_per_s": result["frames"] / result["wall_s"] if result["wall_s"] else 0.0,
+   })
+   return result
+
+def main(argv=None):
+   parser = argparse.ArgumentParser(description="Benchmark scans against a simulated display")
+   parser.add_argument("--targets", nargs="+", choices=TARGETS, default=["display_status"])
+   parser.add_argument("--sizes", nargs="+", type=parse_size, default=None, metavar="RECEIVERSxLAN_PORTS",
+                       help="topology sizes, e.g. 2x1 61x4 244x4 (default: the display profiles in config.json)")
+   parser.add_argument("--modules", type=int, default=4, help="modules per receiver card")
+   parser.add_argument("--latency", type=float, default=0.002, help="simulated reply delay in seconds")
+   parser.add_argument("--repeat", type=int, default=1, help="runs of each target and size")
+   parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+   args = parser.parse_args(argv)
+
+   results_dir = os.path.abspath(os.path.splitext(args.output)[0])
+   os.makedirs(results_dir, exist_ok=True)
+   results = []
+   print("{:<34} {:>9} {:>9} {:>8} {:>10} {:>9} {:>9} {:>9} {:>9}".format(
+      "TARGET", "SIZE", "WALL S", "FRAMES", "FRAMES/S", "KB WIRE", "SLEEP S", "IO S", "RSS MB"))
+   for receivers, lan_ports in args.sizes or config_sizes():
+      for target in args.targets:
+         for run in range(args.repeat):
+            result = benchmark(target, receivers, lan_ports, args.modules, args.latency, results_dir)
+            results.append(result)
+            print("{:<34} {:>9} {:>9.2f} {:>8} {:>10.1f} {:>9.1f} {:>9.2f} {:>9.2f} {:>9.1f}{}".format(
+               target, "{}x{}".format(receivers, lan_ports), result["wall_s"], result["frames"], result["frames_per_s"],
+               (result["bytes_to_card"] + result["bytes_from_card"]) / 1024, result["sleep_s"], result["serial_io_s"],
+               result["peak_rss_kb"] / 1024, "  " + result["error"] if result["error"] else ""))
+   with open(args.output, "w") as f:
+      json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "latency": args.latency, "modules": args.modules, "results": results}, f, indent=4)
+   print("Results written to {}".format(args.output))
+
+if __name__ == "__main__":
+   main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# SCAN CURSOR
+# Remembers where a time-budgeted scan stopped, so that the next one carries on from there.
+#
+# DESCRIPTION
+# - display_status.py --budget SECONDS stops reading receiver cards once SECONDS have elapsed. The check it
+#   would have run next is stored in scan_cursor.json, next to status.json, as
+#   {"<serial port>": {"lan_port", "receiver", "check"}}, one cursor per sender card as sender cards may be
+#   scanned side by side.
+# - The next budgeted scan of that sender card skips the receiver cards and checks before its cursor and starts
+#   from the check stored. A sender card whose walk is completed has its cursor removed, so the scan after it
+#   starts from the first receiver card again.
+# - The results of the checks run (check_schedule.json) fill in status.json for the receiver cards a scan did
+#   not get to, so it always holds the latest value of every check, each with the time it was read.
+#------------------------------------------------------------------------------------------------------------
+from methods import read_cache, write_data
+
+CACHE_FILE = "scan_cursor.json"
+
+def load(logger_name):
+   return read_cache(CACHE_FILE, logger_name)
+
+def save(cursors, logger_name):
+   write_data(CACHE_FILE, cursors, logger_name)
+
+def position(cursor, checks):
+   # Sort key of a place in the walk over a sender card: (LAN port, receiver card, index of the check in checks)
+   return (int(cursor["lan_port"]), int(cursor["receiver"]), checks.index(cursor["check"]) if cursor["check"] in checks else 0)
+
+def cursor_at(lan_port, receiver, check):
+   return {"lan_port": lan_port, "receiver": receiver, "check": check}
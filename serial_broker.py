@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# SERIAL BROKER
+# Long lived daemon which owns the sender card serial ports and runs the requests of the monitoring checks.
+#
+# DESCRIPTION
+# - Every check used to ask the local queue server on 127.0.0.1:8888 for permission (START / Done), then open
+#   the serial port, probe every port for sender cards and close it again, so a check spent far longer on
+#   discovery and port setup than on the few frames it actually needed.
+# - The broker discovers the sender cards once at start up (cached baudrate first, all ports probed at once),
+#   keeps their ports open, each at the baudrate its sender card answered on, and serves request frames from
+#   any number of clients over the same socket (see broker_client.py for the protocol). A check connected to
+#   the broker runs in milliseconds.
+# - Requests for each port wait in a priority queue: writes (brightness, display on/off, kill) go ahead of
+#   monitoring reads, requests of equal priority are served first come, first served. A client may give its
+#   own priority (lower runs first).
+# - Clients that still use the plain START / Done protocol are served one at a time. While such a session is
+#   running the broker finishes the request in progress, closes its ports and queues new requests; the ports
+#   are reopened once the client sends Done.
+#
+# USAGE
+# Linux: python3 serial_broker.py (run as a service, in place of the port queue server)
+#------------------------------------------------------------------------------------------------------------
+import asyncio
+import itertools
+import serial.tools.list_ports
+import methods
+import baud_cache
+import transport
+import broker_client
+from base_monitoring import base
+from command import *
+
+PRIORITY_WRITE = 0 # brightness, display on/off, kill / lock
+PRIORITY_READ = 1 # monitoring reads
+
+class PortWorker:
+# ---------------------------------------------------------------------------------------
+# Owns one sender card port and runs its queued requests one at a time, lowest priority
+# value first. `paused` is cleared while a START / Done client has the ports.
+# ---------------------------------------------------------------------------------------
+   def __init__(self, port, baudrate, timeout, logger_name):
+      self.port = port
+      self.baudrate = baudrate
+      self.timeout = timeout
+      self.logger_name = logger_name
+      self.queue = asyncio.PriorityQueue()
+      self.sequence = itertools.count() # keeps equal priorities in arrival order
+      self.idle = asyncio.Event()
+      self.idle.set()
+      self.paused = asyncio.Event()
+      self.paused.set()
+      self.ser = None
+      self.link = None
+
+   def open(self):
+      self.ser = methods.setupSerialPort(self.baudrate, self.logger_name)
+      self.ser.port = self.port
+      self.ser.open()
+      self.ser.flushInput()
+      self.ser.flushOutput()
+      self.link = transport.AsyncLink(self.ser, self.timeout, self.logger_name)
+
+   def close(self):
+      if self.ser is not None:
+         self.ser.close()
+      self.ser = None
+      self.link = None
+
+   def submit(self, frame, timeout, priority):
+      future = asyncio.get_running_loop().create_future()
+      self.queue.put_nowait((priority, next(self.sequence), frame, timeout, future))
+      return future
+
+   async def run(self):
+      # A request whose client has gone (its future cancelled) is dropped, or its reply discarded
+      while True:
+         priority, sequence, frame, timeout, future = await self.queue.get()
+         await self.paused.wait()
+         if future.done():
+            continue
+         self.idle.clear()
+         try:
+            if self.link is None:
+               self.open()
+            reply = await self.link.transact(frame, timeout)
+            if not future.done():
+               future.set_result(reply)
+         except Exception as e:
+            self.close() # reopened for the next request
+            if not future.done():
+               future.set_exception(e)
+         finally:
+            self.idle.set()
+
+class Broker(base):
+   def __init__(self):
+      super().__init__()
+      self._logger_name = "serial_broker"
+      self.workers = {}
+      self.session = None
+
+   async def start(self):
+      self.session = asyncio.Lock() # START / Done clients, first come, first served
+      await self.initialize_program()
+      baudrates = self.find_sender_cards()
+      for port in sorted(baudrates):
+         worker = self.workers[port] = PortWorker(port, baudrates[port], self.sleep_time, self._logger_name)
+         try:
+            worker.open()
+         except Exception as e:
+            self.logger.error("Error opening serial port {}: {}".format(port, e))
+         asyncio.ensure_future(worker.run())
+      self.logger.info("Serial broker serving {} on {}:{}".format(sorted(self.workers), broker_client.HOST, broker_client.PORT))
+      server = await asyncio.start_server(self.handle_client, broker_client.HOST, broker_client.PORT)
+      async with server:
+         await server.serve_forever()
+
+   def find_sender_cards(self):
+   # ---------------------------------------------------------------------------------------
+   # Baudrate of each sender card port, {port: baudrate}. initialize_program() stops at the
+   # first baudrate any sender card answers on, so the controllers not found yet are looked
+   # for again at the baudrates cached for them (baudrate_cache.json).
+   # ---------------------------------------------------------------------------------------
+      found = {port: self.ser.baudrate for port in self.valid_ports or []}
+      if not found:
+         return found
+      cache = baud_cache.load(self._logger_name)
+      ports = serial.tools.list_ports.comports()
+      for baudrate in baud_cache.other_baudrates(cache, ports, found, self.ser.baudrate):
+         self.logger.info("Looking for the remaining sender cards at {} baud".format(baudrate))
+         self.ser = methods.setupSerialPort(baudrate, self._logger_name)
+         device_found, valid_ports = self.search_devices()
+         for port in valid_ports:
+            found.setdefault(port, baudrate)
+      self.valid_ports = sorted(found)
+      return found
+
+   async def handle_client(self, reader, writer):
+      try:
+         first = await reader.read(1024)
+         if broker_client.parse_ports(first.decode(broker_client.ENCODING, "replace")) is not None:
+            await self.serve(first, reader, writer)
+         elif first.strip():
+            await self.exclusive_session(first.decode(broker_client.ENCODING, "replace").strip(), reader, writer)
+      except ConnectionError as e:
+         self.logger.warning("Client connection lost: {}".format(e))
+      finally:
+         writer.close()
+
+   async def serve(self, received, reader, writer):
+      # Line based request / reply loop of a broker client
+      buffer = bytearray(received)
+      client = None
+      while True:
+         while b"\n" not in buffer and buffer.strip() != b"Done": # session_handler() sends Done without a newline
+            chunk = await reader.read(1024)
+            if not chunk:
+               break
+            buffer += chunk
+         line, _, rest = bytes(buffer).partition(b"\n")
+         buffer[:] = rest
+         line = line.decode(broker_client.ENCODING, "replace").strip()
+         if not line:
+            break
+         if client is None:
+            client = line.partition(" ")[2] or "unnamed client"
+            self.logger.info("Client {} connected".format(client))
+         reply = await self.answer(line)
+         writer.write((reply + "\n").encode(broker_client.ENCODING))
+         await writer.drain()
+         if reply == "BYE":
+            break
+      self.logger.info("Client {} disconnected".format(client))
+
+   async def answer(self, line):
+      words = line.split()
+      if words[0] == "PORTS":
+         return " ".join(["PORTS"] + sorted(self.workers))
+      if words[0] == "Done":
+         return "BYE"
+      if words[0] != "SEND" or len(words) not in (4, 5):
+         return "ERROR Unknown request: {}".format(line)
+      port = words[1]
+      worker = self.workers.get(port)
+      if worker is None:
+         return "ERROR No sender card on {}".format(port)
+      try:
+         frame = broker_client.decode_frame(words[2])
+         timeout = float(words[3])
+         if len(words) == 5:
+            priority = int(words[4])
+         elif len(frame) > transport.DIRECTION_OFFSET and frame[transport.DIRECTION_OFFSET] == transport.WRITE:
+            priority = PRIORITY_WRITE
+         else:
+            priority = PRIORITY_READ
+      except ValueError as e:
+         return "ERROR Invalid request: {}".format(e)
+      try:
+         reply = await worker.submit(frame, timeout, priority)
+      except Exception as e:
+         self.logger.error("Error communicating with device on {}: {}".format(port, e))
+         return "ERROR {}".format(e)
+      return "REPLY " + broker_client.encode_frame(reply)
+
+   async def exclusive_session(self, client, reader, writer):
+   # ---------------------------------------------------------------------------------------
+   # START / Done client: hand over all ports until the client is done with them
+   # ---------------------------------------------------------------------------------------
+      async with self.session:
+         for worker in self.workers.values():
+            worker.paused.clear()
+         for worker in self.workers.values():
+            await worker.idle.wait()
+            worker.close()
+         self.logger.info("Ports handed over to {}".format(client))
+         try:
+            writer.write(b"START")
+            await writer.drain()
+            await reader.read(1024) # Done, or the connection closing
+            writer.write(b"OK")
+            await writer.drain()
+         finally:
+            self.logger.info("Ports returned by {}".format(client))
+            for worker in self.workers.values():
+               worker.paused.set() # reopened by the next request
+
+def main():
+   asyncio.run(Broker().start())
+
+if __name__ == "__main__":
+   main()
@@ -10,6 +10,7 @@ from logging.handlers import TimedRotatingFileHandler
 import datetime
 import json
 import methods
+import discovery
 from methods import read_data, write_data, loadConfig
 
 FORMATTER = logging.Formatter('%(asctime)s %(name)s %(levelname)-8s %(message)s', datefmt='%d/%m/%Y %H:%M:%S')
@@ -76,39 +77,23 @@ def search_devices():
     logger.info("Found {} serial ports".format(len(ports)))
     device_found = 0
     valid_ports = []
-    for port, desc, hwid in sorted(ports):
-         logger.info("Searching sender card on port: " + port)
-         ser.port = port
-         try: 
-               ser.open()
-         except Exception as e:
-               logger.error(str(e))
-         if ser.isOpen():
-               logger.info("{} opened".format(port)) # remove at production
-               try:
-                  ser.flushInput() # flush input buffer, discarding all its contents
-                  ser.flushOutput() # flush output buffer, aborting current output and discard all that is in buffer
-                  ser.write (connection) # send CONNECTION command to check whether any devices are connected
-                  logger.debug("Sending command: " + ' '.join('{:02X}'.format(a) for a in connection))
-                  time.sleep (sleep_time) # allow some time for the device to respond        
-                  if ser.inWaiting()>0: # there should be something at the serial input
-                     response = ser.read(size=ser.inWaiting()) # read all the data available
-                     rx_data = list(response)
-                     logger.debug("Received data:"+' '.join('{:02X}'.format(a) for a in rx_data))
-                     if check_response(rx_data):
-                        if (rx_data[18]!=0 or rx_data [19]!=0): # if ACKNOWLEDGE data is not equal to zero then a device is connected
-                            device_found =  device_found + 1
-                            connected_port = port
-                            valid_ports.append(port)
-                            logger.info("Device found on port: {} | {} | {}".format(port, desc, hwid))                       
-                        else:
-                            logger.info("Device not connected")
-                     else:
-                        logger.info("Device not connected") 
-               except Exception as e1:
-                  logger.error("Error communicating with device: " + str(e1))
-               ser.close()
-               logger.info("{} closed".format(port)) # remove at production
+    ports = discovery.candidate_ports(ports, LOGGER_NAME_DEBUG)
+    replies = discovery.probe_ports(ports, ser.baudrate, connection, sleep_time, LOGGER_NAME_DEBUG) # probe all ports at once
+    for port, desc, hwid in ports:
+       response = replies.get(port)
+       if response: # there should be something at the serial input
+          rx_data = list(response)
+          logger.debug("Received data:"+' '.join('{:02X}'.format(a) for a in rx_data))
+          if check_response(rx_data):
+             if (rx_data[18]!=0 or rx_data [19]!=0): # if ACKNOWLEDGE data is not equal to zero then a device is connected
+                 device_found =  device_found + 1
+                 connected_port = port
+                 valid_ports.append(port)
+                 logger.info("Device found on port: {} | {} | {}".format(port, desc, hwid))                       
+             else:
+                 logger.info("Device not connected")
+          else:
+             logger.info("Device not connected") 
     logger.info("Found {} device(s)".format(device_found))
     return device_found, valid_ports
 
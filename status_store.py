@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# STATUS STORE
+# Writes status.json atomically, re-encoding only the parts of it that changed.
+#
+# DESCRIPTION
+# - display_status.py writes status.json after every sender card and again with the verdict. It used to
+#   re-serialise the whole document each time and overwrite the file in place, so a reader could see it half
+#   written. write() goes through methods.write_file_atomic(): temporary file, fsync, rename.
+# - The JSON text of each sender card entry is kept between writes. Only the entries marked with changed()
+#   (the sender card just scanned) are encoded again; the rest of the document is put together from the text
+#   already encoded. The output is the same as json.dumps().
+# - compact=True ("status_compact" in config.json) writes the document without indentation, which is much
+#   smaller on large displays.
+#------------------------------------------------------------------------------------------------------------
+import json
+import logging
+import os
+import methods
+
+INDENT = 4
+
+def json_key(key):
+   # Object key as json.dumps() writes it (numbers, booleans and None become strings)
+   return json.dumps(key if isinstance(key, str) else json.dumps(key))
+
+class StatusStore:
+   def __init__(self, filename, document, logger_name, compact=False):
+      self.file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+      self.document = document
+      self.logger = logging.getLogger(logger_name)
+      self.compact = compact
+      self.fragments = {} # serial port: JSON text of its sender card entry
+
+   def changed(self, serial_port):
+      # Mark the entry of a sender card as modified: it is encoded again by the next write()
+      self.fragments.pop(serial_port, None)
+
+   def encode(self):
+      members = []
+      for key, value in self.document.items():
+         if isinstance(value, dict): # sender card entries ({serial port: {...}}) are kept encoded
+            if key not in self.fragments:
+               self.fragments[key] = self.dumps(value, 1)
+            text = self.fragments[key]
+         else:
+            text = self.dumps(value, 1)
+         members.append("{}{}{}".format(json_key(key), ":" if self.compact else ": ", text))
+      return self.join(members, "{", "}", 0)
+
+   def dumps(self, value, depth):
+      # json.dumps() of a value nested depth levels deep (JSON strings never hold a raw new line)
+      if self.compact:
+         return json.dumps(value, separators=(",", ":"))
+      return json.dumps(value, indent=INDENT).replace("\n", "\n" + " " * (INDENT * depth))
+
+   def join(self, members, opening, closing, depth):
+      if not members:
+         return opening + closing
+      if self.compact:
+         return opening + ",".join(members) + closing
+      inner = "\n" + " " * (INDENT * (depth + 1))
+      return opening + inner + ("," + inner).join(members) + "\n" + " " * (INDENT * depth) + closing
+
+   def write(self):
+      try:
+         methods.write_file_atomic(self.file_path, self.encode())
+         self.logger.info(f"Written to {self.file_path}")
+      except (IOError, OSError) as e:
+         self.logger.error(f"File error ({self.file_path}): {e}")
+      except Exception as e:
+         self.logger.error(f"Unexpected error: {e}")
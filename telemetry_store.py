@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# TELEMETRY STORE
+# Keeps the history of the receiver card telemetry in an SQLite database (telemetry.db).
+#
+# DESCRIPTION
+# - status.json only holds the latest reading, so a receiver card slowly overheating goes unnoticed. Every scan
+#   of display_status.py (with "telemetry_history" in config.json) appends one row per receiver card to
+#   telemetry.db, next to status.json: temperature, voltage, brightness (global, red, green, blue), kill and
+#   lock state and the number of faulty modules, keyed by (host, serial port, LAN port, receiver card).
+#   Only the values read by that scan are stored; values carried over from earlier scans (check cadence) are
+#   left empty (NULL).
+# - The database runs in WAL mode, so readers (dashboards, history queries) do not block the scan, and the
+#   rows of a scan are inserted in one transaction.
+# - Retention ("telemetry_retention" in config.json): raw rows are kept for raw_days (7), then folded into
+#   rollup_minutes (5) rollups (count, minimum, average and maximum) kept for rollup_days (90).
+# - history() returns the rows of one receiver card over a time range, raw rows where still kept and rollups
+#   before that, through indexes on (receiver card, time).
+# - Requires SQLite 3.24 or later (Python's sqlite3 module).
+#
+# USAGE
+# Linux: python3 telemetry_store.py /dev/ttyUSB0 0 3 --hours 24
+#------------------------------------------------------------------------------------------------------------
+import argparse
+import datetime
+import logging
+import os
+import socket
+import sqlite3
+import time
+
+DATABASE = "telemetry.db"
+RETENTION = {"raw_days": 7, "rollup_days": 90, "rollup_minutes": 5}
+KEY = ["host", "serial_port", "lan_port", "receiver"]
+# Telemetry of one receiver card: the check (display_status.RECEIVER_COMMANDS) that reads it and how it reads it from
+# the receiver card's status.json entry
+FIELDS = {
+   "temperature": ("check_monitoring", lambda entry: number(entry.get("temperature"))),
+   "voltage": ("check_monitoring", lambda entry: number(entry.get("voltage"))),
+   "brightness": ("get_brightness", lambda entry: number(entry.get("brightnessLevelPC"))),
+   "red": ("get_brightness", lambda entry: number(entry.get("redLevel"))),
+   "green": ("get_brightness", lambda entry: number(entry.get("greenLevel"))),
+   "blue": ("get_brightness", lambda entry: number(entry.get("blueLevel"))),
+   "cabinet_on": ("kill_mode", lambda entry: {"On": 1, "Off": 0}.get(entry.get("kill"))),
+   "locked": ("lock_mode", lambda entry: {"Locked": 1, "Normal": 0}.get(entry.get("locked"))),
+   "module_faults": ("check_module_status", lambda entry: module_faults(entry.get("module"))),
+}
+VALUES = list(FIELDS)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+   host TEXT NOT NULL, serial_port TEXT NOT NULL, lan_port INTEGER NOT NULL, receiver INTEGER NOT NULL, time REAL NOT NULL,
+   temperature REAL, voltage REAL, brightness REAL, red REAL, green REAL, blue REAL, cabinet_on INTEGER, locked INTEGER, module_faults INTEGER);
+CREATE INDEX IF NOT EXISTS samples_by_receiver ON samples (host, serial_port, lan_port, receiver, time);
+CREATE INDEX IF NOT EXISTS samples_by_time ON samples (time);
+CREATE TABLE IF NOT EXISTS rollups (
+   host TEXT NOT NULL, serial_port TEXT NOT NULL, lan_port INTEGER NOT NULL, receiver INTEGER NOT NULL, time REAL NOT NULL, samples INTEGER NOT NULL,
+   temperature_min REAL, temperature REAL, temperature_max REAL, voltage_min REAL, voltage REAL, voltage_max REAL,
+   brightness REAL, red REAL, green REAL, blue REAL, cabinet_off INTEGER, locked INTEGER, module_faults INTEGER,
+   PRIMARY KEY (host, serial_port, lan_port, receiver, time));
+CREATE INDEX IF NOT EXISTS rollups_by_time ON rollups (time);
+"""
+
+def weighted(name):
+   return f"({name} * samples + excluded.{name} * excluded.samples) / (samples + excluded.samples)"
+
+# Rollup columns: (name, aggregate over the raw rows of a period, merge of two rollups of the same period)
+ROLLUP = [
+   ("temperature_min", "MIN(temperature)", "MIN(temperature_min, excluded.temperature_min)"),
+   ("temperature", "AVG(temperature)", weighted("temperature")),
+   ("temperature_max", "MAX(temperature)", "MAX(temperature_max, excluded.temperature_max)"),
+   ("voltage_min", "MIN(voltage)", "MIN(voltage_min, excluded.voltage_min)"),
+   ("voltage", "AVG(voltage)", weighted("voltage")),
+   ("voltage_max", "MAX(voltage)", "MAX(voltage_max, excluded.voltage_max)"),
+   ("brightness", "AVG(brightness)", weighted("brightness")),
+   ("red", "AVG(red)", weighted("red")),
+   ("green", "AVG(green)", weighted("green")),
+   ("blue", "AVG(blue)", weighted("blue")),
+   ("cabinet_off", "SUM(cabinet_on = 0)", "cabinet_off + excluded.cabinet_off"), # number of readings with the cabinet off
+   ("locked", "SUM(locked = 1)", "locked + excluded.locked"), # number of readings locked
+   ("module_faults", "MAX(module_faults)", "MAX(module_faults, excluded.module_faults)"),
+]
+
+def number(value):
+   # Numeric status.json value, or None for "N/A" and the like
+   return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+def module_faults(modules):
+   if not isinstance(modules, dict):
+      return None
+   return sum(1 for module in modules.values() if isinstance(module, dict) and module.get("status") != "OK")
+
+def connect(path=None):
+   # Open (and create) the database in WAL mode
+   path = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), DATABASE)
+   connection = sqlite3.connect(path, timeout=30)
+   connection.execute("PRAGMA journal_mode=WAL")
+   connection.execute("PRAGMA synchronous=NORMAL") # durable at each checkpoint, no fsync per transaction in WAL mode
+   connection.executescript(SCHEMA)
+   return connection
+
+def receiver_rows(serial_port, sender_status, schedule, since, now=None, host=None):
+# ---------------------------------------------------------------------------------------
+# Rows to append for the receiver cards of one sender card.
+# sender_status is its status.json entry and schedule its check_schedule.json entry; only
+# the values of checks run at or after since (i.e. by this scan) are filled in, and a
+# receiver card none of whose checks ran gives no row.
+# ---------------------------------------------------------------------------------------
+   now = time.time() if now is None else now
+   host = host or socket.gethostname()
+   rows = []
+   for lan_port, port_status in sender_status.get("sender_card_rx_port", {}).items():
+      for receiver, entry in port_status.get("receiverCard", {}).items():
+         runs = schedule.get(str(lan_port), {}).get(str(receiver), {})
+         fresh = {check for check, run in runs.items() if run["last_run"] >= since}
+         values = [read(entry) if check in fresh else None for check, read in FIELDS.values()]
+         if any(value is not None for value in values):
+            rows.append([host, serial_port, int(lan_port), int(receiver), now] + values)
+   return rows
+
+def append(connection, rows):
+   # Insert the rows of one scan in a single transaction
+   with connection:
+      connection.executemany("INSERT INTO samples ({}) VALUES ({})".format(", ".join(KEY + ["time"] + VALUES), ", ".join("?" * (len(KEY) + 1 + len(VALUES)))), rows)
+
+def downsample(connection, retention=None, now=None):
+# ---------------------------------------------------------------------------------------
+# Apply the retention policy: raw rows older than raw_days are folded into rollups of
+# rollup_minutes and deleted, rollups older than rollup_days are deleted. The cut-off is
+# aligned to a rollup boundary so every rollup is made from complete periods.
+# ---------------------------------------------------------------------------------------
+   retention = dict(RETENTION, **(retention or {}))
+   now = time.time() if now is None else now
+   period = retention["rollup_minutes"] * 60
+   cutoff = (now - retention["raw_days"] * 86400) // period * period
+   key = ", ".join(KEY)
+   with connection:
+      # a rollup of the same period already made (rows stored late) is merged with the new one
+      connection.execute(f"""
+         INSERT INTO rollups ({key}, time, samples, {", ".join(name for name, aggregate, merge in ROLLUP)})
+         SELECT {key}, CAST(time / :period AS INTEGER) * :period AS period_start, COUNT(*), {", ".join(aggregate for name, aggregate, merge in ROLLUP)}
+         FROM samples WHERE time < :cutoff GROUP BY {key}, period_start
+         ON CONFLICT ({key}, time) DO UPDATE SET {", ".join(f"{name} = COALESCE({merge}, {name}, excluded.{name})" for name, aggregate, merge in ROLLUP)},
+            samples = samples + excluded.samples
+         """, {"period": period, "cutoff": cutoff})
+      connection.execute("DELETE FROM samples WHERE time < ?", (cutoff,))
+      connection.execute("DELETE FROM rollups WHERE time < ?", (now - retention["rollup_days"] * 86400,))
+
+def history(connection, serial_port, lan_port, receiver, start, end, host=None):
+# ---------------------------------------------------------------------------------------
+# Telemetry of one receiver card between start and end (time.time() values), oldest first,
+# as dicts: raw rows ("samples": 1) and, for the period they no longer cover, rollups
+# ("samples": n, averages plus temperature/voltage minimum and maximum).
+# ---------------------------------------------------------------------------------------
+   key = (host or socket.gethostname(), serial_port, lan_port, receiver, start, end)
+   where = "host = ? AND serial_port = ? AND lan_port = ? AND receiver = ? AND time >= ? AND time < ?"
+   connection.row_factory = sqlite3.Row
+   rollups = connection.execute(f"SELECT * FROM rollups WHERE {where} ORDER BY time", key).fetchall()
+   samples = connection.execute(f"SELECT *, 1 AS samples FROM samples WHERE {where} ORDER BY time", key).fetchall()
+   return [dict(row) for row in rollups] + [dict(row) for row in samples]
+
+def record_scan(results, since, retention=None, logger_name=None):
+# ---------------------------------------------------------------------------------------
+# Append the telemetry of a display_status.py scan and apply the retention policy.
+# results: [(serial port, status.json entry, check_schedule.json entry)] for each sender
+# card scanned. Errors are logged, never raised: the history must not fail a scan.
+# ---------------------------------------------------------------------------------------
+   logger = logging.getLogger(logger_name)
+   try:
+      connection = connect()
+      try:
+         rows = [row for serial_port, sender_status, schedule in results for row in receiver_rows(serial_port, sender_status, schedule, since)]
+         append(connection, rows)
+         downsample(connection, retention)
+         logger.info(f"Telemetry of {len(rows)} receiver card(s) added to {DATABASE}")
+      finally:
+         connection.close()
+   except sqlite3.Error as e:
+      logger.error(f"Telemetry history error ({DATABASE}): {e}")
+
+def main():
+   parser = argparse.ArgumentParser(description="Telemetry history of one receiver card")
+   parser.add_argument("serial_port")
+   parser.add_argument("lan_port", type=int)
+   parser.add_argument("receiver", type=int)
+   parser.add_argument("--hours", type=float, default=24, help="period to show, ending now")
+   parser.add_argument("--host", help="host that scanned the display (default: this one)")
+   parser.add_argument("--database", help=f"database file (default: {DATABASE} next to this script)")
+   args = parser.parse_args()
+   connection = connect(args.database)
+   now = time.time()
+   for row in history(connection, args.serial_port, args.lan_port, args.receiver, now - args.hours * 3600, now, args.host):
+      when = datetime.datetime.fromtimestamp(row["time"]).strftime("%d/%m/%Y %H:%M:%S")
+      print(when, " ".join(f"{name}={value}" for name, value in row.items() if name not in KEY + ["time"] and value is not None))
+   connection.close()
+
+if __name__ == "__main__":
+   main()
@@ -0,0 +1,43 @@
+#------------------------------------------------------------------------------------------------------------
+# Shared fixtures for the test suite. The scripts are flat top-level modules, so the repository root is put
+# on the import path.
+#------------------------------------------------------------------------------------------------------------
+import os
+import sys
+import threading
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import novastar_simulator
+
+@pytest.fixture
+def simulator():
+# ---------------------------------------------------------------------------------------
+# Starts simulated sender cards on pseudo-terminals, served from a thread until the test
+# ends. Each argument is the number of receiver cards on each LAN port of one sender
+# card; options go to novastar_simulator.SenderCard (requests with a bad checksum are
+# rejected by default). Returns [(port to open, SenderCard)].
+#    (path, card), = simulator([3, 2])
+# ---------------------------------------------------------------------------------------
+   stop_read, stop_write = os.pipe()
+   cards = {}
+   slaves = []
+   threads = []
+   def start(*displays, modules=4, data_groups=4, strict=True, **options):
+      started = []
+      for receivers in displays or ([2],):
+         master, slave, path = novastar_simulator.open_pty()
+         slaves.append(slave)
+         cards[master] = novastar_simulator.SenderCard(list(receivers), modules, data_groups, strict=strict, seed=1, **options)
+         started.append((path, cards[master]))
+      threads.append(threading.Thread(target=novastar_simulator.serve, args=(dict(cards), stop_read), daemon=True))
+      threads[-1].start()
+      return started
+   yield start
+   os.write(stop_write, b"x")
+   for thread in threads:
+      thread.join(5)
+   for fd in list(cards) + slaves + [stop_read, stop_write]:
+      os.close(fd)
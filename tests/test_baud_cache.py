@@ -0,0 +1,42 @@
+import os
+import baud_cache
+import methods
+
+LINUX = ("/dev/ttyUSB0", "USB-Serial Controller", "USB VID:PID=0403:6001 SER=A10KX3Q2 LOCATION=1-1.2")
+WINDOWS = ("COM4", "USB Serial Port (COM4)", "USB VID:PID=0403:6001 SER=A10KX3Q7A")
+NO_SERIAL = ("/dev/ttyS0", "ttyS0", "PNP0501")
+
+def test_usb_serial_number():
+   assert baud_cache.usb_serial_number(LINUX[2]) == "A10KX3Q2"
+   assert baud_cache.usb_serial_number(WINDOWS[2]) == "A10KX3Q7A"
+   assert baud_cache.usb_serial_number(NO_SERIAL[2]) is None
+   assert baud_cache.usb_serial_number(None) is None
+
+def test_cached_baudrates_go_first():
+   baudrates = [115200, 1048576, 57600]
+   assert baud_cache.preferred_order(baudrates, [LINUX, WINDOWS], {}) == baudrates
+   assert baud_cache.preferred_order(baudrates, [LINUX, WINDOWS], {"A10KX3Q2": 57600}) == [57600, 115200, 1048576]
+   both = {"A10KX3Q2": 57600, "A10KX3Q7A": 1048576}
+   assert baud_cache.preferred_order(baudrates, [LINUX, WINDOWS], both) == [1048576, 57600, 115200] # ties keep config order
+   assert baud_cache.preferred_order(baudrates, [NO_SERIAL], {"unplugged": 57600}) == baudrates
+
+def test_remember_only_the_sender_cards_found():
+   cache = {}
+   assert baud_cache.remember(cache, [LINUX, WINDOWS, NO_SERIAL], ["/dev/ttyUSB0", "/dev/ttyS0"], 1048576)
+   assert cache == {"A10KX3Q2": 1048576} # COM4 did not answer, ttyS0 has no serial number
+   assert not baud_cache.remember(cache, [LINUX], ["/dev/ttyUSB0"], 1048576)
+   assert baud_cache.remember(cache, [LINUX], ["/dev/ttyUSB0"], 115200)
+   assert cache == {"A10KX3Q2": 115200}
+
+def test_other_baudrates_of_the_sender_cards_not_found():
+   cache = {"A10KX3Q2": 115200, "A10KX3Q7A": 1048576}
+   assert baud_cache.other_baudrates(cache, [LINUX, WINDOWS, NO_SERIAL], {"/dev/ttyUSB0": 115200}, 115200) == [1048576]
+   assert baud_cache.other_baudrates(cache, [LINUX, WINDOWS], {"/dev/ttyUSB0": 115200, "COM4": 115200}, 115200) == []
+   assert baud_cache.baudrate_for(cache, NO_SERIAL[2], 57600) == 57600
+
+def test_the_cache_reads_back(tmp_path, monkeypatch):
+   monkeypatch.chdir(tmp_path)
+   write = methods.write_file_atomic
+   monkeypatch.setattr(methods, "write_file_atomic", lambda path, data: write(str(tmp_path / os.path.basename(path)), data))
+   baud_cache.save({"A10KX3Q2": 1048576}, "test")
+   assert baud_cache.load("test") == {"A10KX3Q2": 1048576}
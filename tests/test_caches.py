@@ -0,0 +1,28 @@
+import logging
+import pytest
+import baud_cache
+import check_schedule
+import methods
+import pipeline_cache
+import scan_cursor
+import topology_cache
+
+CACHES = [baud_cache, check_schedule, pipeline_cache, scan_cursor, topology_cache]
+
+@pytest.mark.parametrize("cache", CACHES, ids=[cache.__name__ for cache in CACHES])
+def test_a_missing_cache_loads_empty_without_an_error(cache, tmp_path, monkeypatch, caplog):
+   monkeypatch.chdir(tmp_path)
+   with caplog.at_level(logging.DEBUG, logger="test"):
+      assert cache.load("test") == {}
+   assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
+
+def test_a_missing_required_file_is_still_an_error(tmp_path, monkeypatch, caplog):
+   monkeypatch.chdir(tmp_path)
+   with caplog.at_level(logging.DEBUG, logger="test"):
+      assert methods.read_data("status.json", "test") == {}
+   assert [record.levelno for record in caplog.records] == [logging.ERROR]
+
+def test_a_cache_reads_back(tmp_path, monkeypatch):
+   monkeypatch.chdir(tmp_path)
+   (tmp_path / topology_cache.CACHE_FILE).write_text('{"/dev/ttyUSB0": {"0": 3}}')
+   assert topology_cache.counts(topology_cache.load("test"), "/dev/ttyUSB0") == {0: 3}
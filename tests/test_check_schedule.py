@@ -0,0 +1,51 @@
+import types
+import pytest
+import check_schedule
+import novastar_simulator
+
+CHECKS = ["kill_mode", "check_monitoring", "check_module_status"]
+CADENCE = {"check_monitoring": 300, "check_module_status": 3600} # kill mode not listed: every scan
+
+def test_every_check_is_due_on_a_new_receiver_card():
+   schedule = {}
+   entry = check_schedule.receiver_entry(schedule, 1, 7)
+   assert schedule == {"1": {"7": {}}}
+   assert check_schedule.due_checks(entry, CADENCE, CHECKS, now=1000) == CHECKS
+
+def test_checks_are_due_once_their_cadence_has_elapsed():
+   entry = {}
+   for name in CHECKS:
+      check_schedule.record(entry, name, {"killMode": "Normal"}, True, now=1000)
+   assert entry["kill_mode"] == {"last_run": 1000, "status": {"killMode": "Normal"}, "value": True}
+   assert check_schedule.due_checks(entry, CADENCE, CHECKS, now=1000) == ["kill_mode"]
+   assert check_schedule.due_checks(entry, CADENCE, CHECKS, now=1299) == ["kill_mode"]
+   assert check_schedule.due_checks(entry, CADENCE, CHECKS, now=1300) == ["kill_mode", "check_monitoring"]
+   assert check_schedule.due_checks(entry, CADENCE, CHECKS, now=4600) == CHECKS
+   assert check_schedule.due_checks(entry, {"kill_mode": 0}, ["kill_mode"], now=1000) == ["kill_mode"]
+
+def test_a_scan_runs_only_the_checks_due(simulator, tmp_path, monkeypatch):
+   pytest.importorskip("serial")
+   import display_status
+   monkeypatch.chdir(tmp_path) # log files
+   (path, card), = simulator([2])
+   display_status.init_scan_worker({"baudrate": 115200, "sleep_time": 0.05, "flash_wait_time": 0, "check_cadence": CADENCE}, "17/10/2026 12:00")
+   now = [1000.0]
+   monkeypatch.setattr(check_schedule, "time", types.SimpleNamespace(time=lambda: now[0])) # the schedule's clock only
+   def scan(schedule):
+      result = display_status.scan_sender_card(0, path, 115200, 1, {}, schedule, None)
+      receivers = result["status"]["sender_card_rx_port"][0]["receiverCard"]
+      return result["check_schedule"], [receivers[receiver]["temperature"] for receiver in range(2)]
+   schedule, temperatures = scan({})
+   assert sorted(schedule["0"]["1"]) == sorted(display_status.RECEIVER_COMMANDS) # first scan: every check
+   for receiver in range(2): # 60 C from now on
+      card.receivers[(0, receiver)].write(novastar_simulator.MONITORING, bytes([0x80, 120, 0x00, 0x80 | 50]))
+   now[0] += 60
+   schedule, cached = scan(schedule)
+   assert cached == temperatures # not due: the stored result fills in status.json
+   assert schedule["0"]["0"]["kill_mode"]["last_run"] == 1060
+   assert schedule["0"]["0"]["check_monitoring"]["last_run"] == 1000
+   now[0] += 300
+   schedule, measured = scan(schedule)
+   assert measured == [60.0, 60.0]
+   assert schedule["0"]["0"]["check_monitoring"]["last_run"] == 1360
+   assert schedule["0"]["0"]["check_module_status"]["last_run"] == 1000
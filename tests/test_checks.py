@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+import sys
+import pytest
+
+serial = pytest.importorskip("serial")
+pytestmark = pytest.mark.skipif(sys.platform == "linux" and not os.path.isdir("/data/opt/LEDMonitoring"),
+                                reason="base_monitoring.py runs from /data/opt/LEDMonitoring")
+
+@pytest.fixture
+def base_script(simulator):
+   # A base() of the monitoring checks with the port of a simulated sender card open
+   import base_monitoring
+   (path, card), = simulator([2, 1])
+   script = base_monitoring.base()
+   script.logger = logging.getLogger(script.LOGGER_NAME)
+   script.ser = serial.Serial(path, timeout=0)
+   script.status = {path: {}}
+   yield script
+   script.ser.close()
+
+def test_check_dvi_reads_a_valid_signal(base_script, monkeypatch):
+   import check_dvi
+   monkeypatch.setattr(check_dvi, "base_script", base_script)
+   exit_code, message = asyncio.run(check_dvi.check_dvi(None, None))
+   assert (exit_code, message) == (base_script.GOOD, "DVI SIGNAL OK")
+   assert base_script.status[base_script.ser.port]["DVISignal"] == "Valid"
+
+def test_count_receivers_past_255(simulator, monkeypatch):
+   # The probes go past receiver index FFH: both bytes of the index have to be sent
+   import base_monitoring
+   import topology_cache
+   monkeypatch.setattr(topology_cache, "save", lambda topology, logger_name: None)
+   (path, card), = simulator([300, 256])
+   script = base_monitoring.base()
+   script.logger = logging.getLogger(script.LOGGER_NAME)
+   with serial.Serial(path, timeout=0) as script.ser:
+      counts = [asyncio.run(script.count_receivers(path, lan_value)) for lan_value in range(2)]
+      assert asyncio.run(script.get_receiver_connected(path, 0xFFFF, 0)) is False # broadcast address, not probed
+   assert counts == [300, 256]
+
+def test_count_receivers_over_the_serial_broker(simulator, monkeypatch):
+   import broker_client
+   import serial_broker
+   import topology_cache
+   monkeypatch.setattr(topology_cache, "save", lambda topology, logger_name: None)
+   (path, card), = simulator([5, 3])
+   broker = serial_broker.Broker()
+   broker.logger = logging.getLogger(broker.LOGGER_NAME)
+   worker = broker.workers[path] = serial_broker.PortWorker(path, 115200, 0.5, broker.LOGGER_NAME)
+   worker.open()
+   script = serial_broker.base()
+   script.logger = logging.getLogger(script.LOGGER_NAME)
+   script.ser = broker_client.RemotePort(path) # no serial port of its own, as in broker mode
+   async def count():
+      running = asyncio.ensure_future(worker.run())
+      server = await asyncio.start_server(broker.handle_client, broker_client.HOST, 0)
+      reader, writer = await asyncio.open_connection(broker_client.HOST, server.sockets[0].getsockname()[1])
+      writer.write(b"PORTS test_checks\n")
+      ports = broker_client.parse_ports((await reader.readline()).decode())
+      script.broker = broker_client.BrokerClient(reader, writer, ports, script.LOGGER_NAME)
+      counts = [await script.count_receivers(path, lan_value) for lan_value in range(3)]
+      writer.close()
+      server.close()
+      running.cancel()
+      return ports, counts
+   ports, counts = asyncio.run(count())
+   worker.close()
+   assert ports == [path]
+   assert counts == [5, 3, 0]
+
+def test_a_request_cancelled_by_its_client_does_not_stop_the_port_worker(simulator):
+   import command
+   import serial_broker
+   (path, card), = simulator([2])
+   worker = serial_broker.PortWorker(path, 115200, 0.5, "serial_broker")
+   worker.open()
+   async def run():
+      running = asyncio.ensure_future(worker.run())
+      gone = worker.submit(command.check_DVI_signal, 0.5, serial_broker.PRIORITY_READ)
+      waiting = worker.submit(command.check_DVI_signal, 0.5, serial_broker.PRIORITY_READ)
+      await asyncio.sleep(0) # the worker is waiting for the reply to the first request
+      gone.cancel() # its client disconnected
+      reply = await asyncio.wait_for(waiting, 5)
+      dropped = worker.submit(command.check_DVI_signal, 0.5, serial_broker.PRIORITY_READ)
+      dropped.cancel() # cancelled before its turn: never sent
+      reply_after = await asyncio.wait_for(worker.submit(command.check_DVI_signal, 0.5, serial_broker.PRIORITY_READ), 5)
+      running.cancel()
+      return reply, reply_after
+   reply, reply_after = asyncio.run(run())
+   worker.close()
+   assert reply and reply_after
+
+def test_the_broker_opens_each_sender_card_at_its_cached_baudrate(monkeypatch):
+   import types
+   import baud_cache
+   import methods
+   import serial_broker
+   ports = [("/dev/ttyUSB0", "", "USB VID:PID=1A86:7523 SER=A"), ("/dev/ttyUSB1", "", "USB VID:PID=1A86:7523 SER=B"),
+            ("/dev/ttyUSB2", "", "USB VID:PID=1A86:7523")]
+   monkeypatch.setattr(serial.tools.list_ports, "comports", lambda: ports)
+   monkeypatch.setattr(baud_cache, "load", lambda logger_name: {"A": 115200, "B": 1048576})
+   monkeypatch.setattr(methods, "setupSerialPort", lambda baudrate, logger_name: types.SimpleNamespace(baudrate=baudrate))
+   broker = serial_broker.Broker()
+   broker.logger = logging.getLogger(broker.LOGGER_NAME)
+   broker.ser = types.SimpleNamespace(baudrate=115200)
+   broker.valid_ports = ["/dev/ttyUSB0"] # found by initialize_program() at the first baudrate
+   probed = []
+   def search_devices():
+      probed.append(broker.ser.baudrate)
+      return (1, ["/dev/ttyUSB1"]) if broker.ser.baudrate == 1048576 else (0, [])
+   broker.search_devices = search_devices
+   assert broker.find_sender_cards() == {"/dev/ttyUSB0": 115200, "/dev/ttyUSB1": 1048576}
+   assert probed == [1048576]
+   assert broker.valid_ports == ["/dev/ttyUSB0", "/dev/ttyUSB1"]
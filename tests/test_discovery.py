@@ -0,0 +1,52 @@
+import os
+import time
+import pytest
+import command
+import discovery
+import methods
+import novastar_simulator
+
+CP2102N = ("/dev/ttyUSB0", "CP2102N USB to UART Bridge Controller", "USB VID:PID=10C4:EA60 SER=0001 LOCATION=1-1.1")
+FTDI = ("/dev/ttyUSB1", "FT232R USB UART", "USB VID:PID=0403:6001 SER=A10KX3Q2")
+UART = ("/dev/ttyAMA10", "ttyAMA10", "n/a")
+
+def candidates(monkeypatch, ports, **config):
+   monkeypatch.setattr(methods, "loadConfig", lambda logger_name: config)
+   return [port for port, desc, hwid in discovery.candidate_ports(ports, "test")]
+
+def test_vid_pid():
+   assert discovery.vid_pid(CP2102N[2]) == "10C4:EA60"
+   assert discovery.vid_pid("USB VID:PID=10c4:ea60") == "10C4:EA60"
+   assert discovery.vid_pid(UART[2]) is None
+   assert discovery.vid_pid(None) is None
+
+def test_every_port_without_lists(monkeypatch):
+   assert candidates(monkeypatch, [UART, FTDI, CP2102N]) == ["/dev/ttyAMA10", "/dev/ttyUSB0", "/dev/ttyUSB1"]
+
+def test_allowlist_skips_other_devices_and_on_board_uarts(monkeypatch):
+   assert candidates(monkeypatch, [UART, FTDI, CP2102N], port_allowlist=["10c4:ea60"]) == ["/dev/ttyUSB0"]
+
+def test_denylist_skips_the_devices_listed(monkeypatch):
+   assert candidates(monkeypatch, [UART, FTDI, CP2102N], port_denylist=["0403:6001"]) == ["/dev/ttyAMA10", "/dev/ttyUSB0"]
+   assert candidates(monkeypatch, [FTDI, CP2102N], port_allowlist=["10C4:EA60", "0403:6001"], port_denylist=["0403:6001"]) == ["/dev/ttyUSB0"]
+
+def test_extra_ports_are_always_probed(monkeypatch):
+   ports = candidates(monkeypatch, [UART, CP2102N], port_allowlist=["10C4:EA60"], extra_ports=["/dev/pts/7", "/dev/ttyUSB0"])
+   assert ports == ["/dev/ttyUSB0", "/dev/pts/7"] # listed once, even if also found
+
+def test_probe_takes_one_timeout_however_many_ports_are_silent(simulator):
+   pytest.importorskip("serial")
+   (path, card), = simulator([2])
+   silent = [novastar_simulator.open_pty() for index in range(3)] # ports nothing answers on
+   try:
+      ports = [(path, "", "n/a")] + [(name, "", "n/a") for master, slave, name in silent] + [("/dev/does-not-exist", "", "n/a")]
+      started = time.monotonic()
+      replies = discovery.probe_ports(ports, 115200, command.connection, 0.3, "test")
+      elapsed = time.monotonic() - started
+   finally:
+      for master, slave, name in silent:
+         os.close(master)
+         os.close(slave)
+   assert list(replies) == [path]
+   assert replies[path][2] == 0
+   assert elapsed < 0.3 * 2
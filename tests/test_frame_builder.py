@@ -0,0 +1,64 @@
+import threading
+import command
+import methods
+import transport
+import frame_builder
+
+def patched(template, lan_port, receiver_index):
+   # The frame the scripts used to build: template patched in place, checksum by methods.checksum()
+   frame = list(template)
+   frame[frame_builder.LAN_PORT_OFFSET] = lan_port
+   frame[frame_builder.RECEIVER_INDEX_OFFSET] = receiver_index & 0xFF
+   frame[frame_builder.RECEIVER_INDEX_OFFSET + 1] = receiver_index >> 8
+   return bytes(methods.checksum(frame))
+
+def test_addressed_frames_match_the_patched_templates():
+   frames = frame_builder.FrameBuilder({"check_receiver_model": command.check_receiver_model, "kill_mode": command.kill_mode})
+   for name in ("check_receiver_model", "kill_mode"):
+      for lan_port, receiver_index in ((0, 0), (1, 7), (3, 255), (2, 300), (0, 0xFFFF)):
+         frame = frames.build(name, lan_port, receiver_index)
+         assert frame == patched(getattr(command, name), lan_port, receiver_index)
+         assert transport.checksum_ok(frame)
+   unaddressed = frames.build("kill_mode")
+   assert unaddressed[:-2] == bytes(command.kill_mode[:-2]) # the template as it is, checksum recomputed
+   assert transport.checksum_ok(unaddressed)
+
+def test_payload_replaces_the_data_field():
+   frames = frame_builder.FrameBuilder({"start_check_module_flash": command.start_check_module_flash})
+   frame = frames.build("start_check_module_flash", 1, 2, payload=b"\xFF\x00\x00")
+   assert transport.data_length(frame) == 3
+   assert frame[transport.HEADER_LENGTH:-2] == b"\xFF\x00\x00"
+   assert len(frame) == transport.request_length(frame)
+   assert transport.checksum_ok(frame)
+   assert frame[:transport.HEADER_LENGTH - 2] == patched(command.start_check_module_flash, 1, 2)[:transport.HEADER_LENGTH - 2]
+   assert frames.build("start_check_module_flash", 1, 2, payload=b"\x00") != frame
+
+def test_frames_are_cached_and_immutable():
+   frames = frame_builder.FrameBuilder({"check_receiver_model": command.check_receiver_model})
+   frame = frames.build("check_receiver_model", 1, 5)
+   assert isinstance(frame, bytes)
+   assert frames.build("check_receiver_model", 1, 5) is frame
+   assert frames.build("check_receiver_model", 1, 6) != frame
+
+def test_register_drops_frames_built_from_the_old_template():
+   frames = frame_builder.FrameBuilder({"model": command.check_receiver_model, "kill_mode": command.kill_mode})
+   old, kill = frames.build("model", 0, 1), frames.build("kill_mode", 0, 1)
+   frames.register("model", command.display_brightness)
+   assert frames.build("model", 0, 1) == patched(command.display_brightness, 0, 1) != old
+   assert frames.build("kill_mode", 0, 1) is kill # other templates keep their cache
+   frames.register("kill_mode", command.kill_mode) # unchanged
+   assert frames.build("kill_mode", 0, 1) is kill
+
+def test_frames_built_from_several_threads():
+   frames = frame_builder.FrameBuilder({"check_receiver_model": command.check_receiver_model})
+   wrong = []
+   def build(lan_port):
+      for receiver_index in range(300):
+         if frames.build("check_receiver_model", lan_port, receiver_index) != patched(command.check_receiver_model, lan_port, receiver_index):
+            wrong.append((lan_port, receiver_index))
+   threads = [threading.Thread(target=build, args=(lan_port,)) for lan_port in range(4)]
+   for thread in threads:
+      thread.start()
+   for thread in threads:
+      thread.join()
+   assert wrong == []
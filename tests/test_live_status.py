@@ -0,0 +1,78 @@
+import threading
+import live_status
+
+def receiver_entry(temperature):
+   return {"temperature": temperature, "voltage": 4.9, "brightnessLevelPC": 80, "redLevel": 255, "greenLevel": 250, "blueLevel": 245,
+           "kill": "On", "locked": "Normal", "monitorCard": "Yes", "module": {"0": {"status": "OK"}, "1": {"status": "Error"}}}
+
+def sender_status(temperatures):
+   return {"DVISignal": "Valid", "brightnessLevel": 200,
+           "sender_card_rx_port": {0: {"receiverCard": {receiver: receiver_entry(value) for receiver, value in enumerate(temperatures)}}}}
+
+def test_published_values_read_back(tmp_path):
+   path = str(tmp_path / live_status.SEGMENT_FILE)
+   writer = live_status.Segment.create(2, receivers=4, path=path)
+   assert writer.publish("/dev/ttyUSB0", sender_status([31.5, "N/A"]), {0: 2}, now=1000.0)
+   reader = live_status.Segment.open(path)
+   assert reader.sender("/dev/ttyUSB0") == {"time": 1000.0, "port": "/dev/ttyUSB0", "DVI": 1, "brightnessLevel": 200,
+                                           "receivers": {0: 2, 1: 0, 2: 0, 3: 0}}
+   assert reader.receiver("/dev/ttyUSB0", 0, 0) == {"time": 1000.0, "temperature": 31.5, "voltage": 4.9, "brightness": 80, "red": 255, "green": 250,
+                                                    "blue": 245, "cabinet_on": 1, "locked": 0, "monitoring_card": 1, "module_faults": 1}
+   assert reader.receiver("/dev/ttyUSB0", 0, 1)["temperature"] is None # "N/A"
+   assert reader.receiver("/dev/ttyUSB0", 0, 2) is None # never written
+   assert reader.sender("/dev/ttyUSB1") is None
+   reader.close()
+   writer.close()
+
+def test_a_record_being_written_is_not_read(tmp_path):
+   path = str(tmp_path / live_status.SEGMENT_FILE)
+   writer = live_status.Segment.create(1, receivers=2, path=path)
+   writer.publish("/dev/ttyUSB0", sender_status([30.0]), {0: 1}, now=1000.0)
+   offset = writer.receiver_offset(0, 0, 0)
+   sequence = live_status.SEQUENCE.unpack_from(writer.mapping, offset)[0]
+   assert sequence % 2 == 0
+   live_status.SEQUENCE.pack_into(writer.mapping, offset, sequence + 1) # writer stopped half way through
+   reader = live_status.Segment.open(path)
+   assert reader.receiver("/dev/ttyUSB0", 0, 0) is None
+   live_status.SEQUENCE.pack_into(writer.mapping, offset, sequence + 2)
+   assert reader.receiver("/dev/ttyUSB0", 0, 0)["temperature"] == 30.0
+   reader.close()
+   writer.close()
+
+def test_reads_during_writes_are_never_torn(tmp_path):
+   path = str(tmp_path / live_status.SEGMENT_FILE)
+   writer = live_status.Segment.create(1, receivers=1, path=path)
+   writer.publish("/dev/ttyUSB0", sender_status([0.0]), {0: 1}, now=0.0)
+   reader = live_status.Segment.open(path)
+   stop = threading.Event()
+   def write():
+      count = 0
+      while not stop.is_set():
+         count += 1
+         writer.publish("/dev/ttyUSB0", sender_status([float(count % 100)]), {0: 1}, now=float(count % 100))
+   thread = threading.Thread(target=write)
+   thread.start()
+   try:
+      for attempt in range(2000):
+         record = reader.receiver("/dev/ttyUSB0", 0, 0)
+         if record is not None:
+            assert record["temperature"] == record["time"] # both written by the same publish()
+   finally:
+      stop.set()
+      thread.join()
+   reader.close()
+   writer.close()
+
+def test_a_new_layout_replaces_the_segment(tmp_path):
+   path = str(tmp_path / live_status.SEGMENT_FILE)
+   writer = live_status.Segment.create(1, receivers=2, path=path)
+   reader = live_status.Segment.open(path)
+   assert not reader.replaced()
+   writer.close()
+   writer = live_status.Segment.create(1, receivers=8, path=path)
+   assert reader.replaced()
+   reader.close()
+   reader = live_status.Segment.open(path)
+   assert reader.receivers == 8
+   reader.close()
+   writer.close()
@@ -0,0 +1,49 @@
+import pytest
+import novastar_simulator
+import transport
+
+serial = pytest.importorskip("serial")
+
+START_ADDRESS = 0x01000074 # register written by start_check_module_flash
+
+@pytest.fixture
+def flash_check(simulator, tmp_path, monkeypatch):
+   # display_status with the port of a sender card open: receiver cards 0 and 2 on LAN port 0, 1 missing
+   # from the chain (it does not answer), and the modules of receiver card 2 without module flash
+   import display_status
+   monkeypatch.chdir(tmp_path) # log files
+   (path, card), = simulator([3])
+   del card.receivers[(0, 1)]
+   card.receivers[(0, 2)].write(novastar_simulator.MODULE_FLASH, b"\x03\x03")
+   def start(broadcast, window=4):
+      display_status.init_scan_worker({"baudrate": 115200, "sleep_time": 0.2, "flash_wait_time": 0, "module_flash_broadcast": broadcast}, "17/10/2026 12:00")
+      display_status.ser.port = path
+      display_status.ser.open()
+      display_status.link = transport.Pipeline(display_status.ser, window, 0.2, display_status.LOGGER_NAME)
+      display_status.status[path] = {"sender_card_rx_port": {0: {"receiverCard": {receiver: {} for receiver in range(3)}}}}
+      return display_status, path, card
+   yield start
+   display_status.ser.close()
+
+@pytest.mark.parametrize("broadcast", [True, False], ids=["broadcast", "addressed"])
+def test_flash_check_with_one_absent_receiver_card(flash_check, broadcast):
+   display_status, path, card = flash_check(broadcast)
+   before = card.requests
+   results = display_status.get_module_flash(path, [(0, 0), (0, 1), (0, 2)])
+   receivers = display_status.status[path]["sender_card_rx_port"][0]["receiverCard"]
+   assert card.requests - before == (1 if broadcast else 3) + 3 # start, then read back every receiver card
+   for receiver in (0, 2):
+      assert card.receivers[(0, receiver)].read(START_ADDRESS, 1) == b"\x04" # the check was started
+   assert results[(0, 0)] == (4, True)
+   assert receivers[0]["moduleFlash"] == {module: "OK" for module in range(4)}
+   assert results[(0, 1)] == (0, False) # no reply but a time out
+   assert receivers[1]["moduleFlash"] == "N/A"
+   assert results[(0, 2)] == (4, False)
+   assert receivers[2]["moduleFlash"][0] == "Error or no module flash available"
+   assert display_status.link.window == 4 # an absent card's time out reply is not a dropped request
+
+def test_no_receiver_cards_no_requests(flash_check):
+   display_status, path, card = flash_check(True)
+   before = card.requests
+   assert display_status.get_module_flash(path, []) == {}
+   assert card.requests == before
@@ -0,0 +1,81 @@
+import pytest
+import command
+import frame_builder
+import monitoring_block
+import novastar_simulator
+import transport
+
+FRAMES = frame_builder.FrameBuilder({name: getattr(command, name) for name in ("check_monitoring", "ribbon_cable", "check_module_status", "kill_mode")})
+
+def block_reply(data, ack=0):
+   # check_monitoring reply frame carrying `data`
+   reply = bytearray(transport.REPLY_HEADER + bytes([ack, 1]) + b"\x00\xFE")
+   reply += bytes(command.check_monitoring[6:transport.LENGTH_OFFSET]) + transport.CHECKSUM.pack(len(data)) + bytes(data) + b"\x00\x00"
+   transport.CHECKSUM.pack_into(reply, len(reply) - 2, transport.frame_checksum(reply))
+   return bytes(reply)
+
+def block(**fields):
+   # 100H bytes of monitoring block data with the given fields set ({offset: bytes})
+   data = bytearray(0x100)
+   for offset, value in fields.values():
+      data[offset:offset + len(value)] = value
+   return data
+
+def test_temperature_and_voltage():
+   monitoring = monitoring_block.decode(block_reply(block(temperature=(0, b"\x80\x55\x00\xB2"))))
+   assert (monitoring.temperature_valid, monitoring.temperature) == (True, 42.0) # bit 0 of the value ignored
+   assert (monitoring.voltage_valid, monitoring.voltage) == (True, 5.0)
+   below_zero = monitoring_block.decode(block_reply(block(temperature=(0, b"\x81\x14\x00\x32"))))
+   assert below_zero.temperature == -10.0
+   assert (below_zero.voltage_valid, below_zero.voltage) == (False, None)
+   invalid = monitoring_block.decode(block_reply(block(temperature=(0, b"\x00\x50\x00\x00"))))
+   assert (invalid.temperature_valid, invalid.temperature) == (False, None)
+
+def test_monitoring_card_ribbon_cable_and_module_status():
+   ribbon = bytes(range(16))
+   element = bytes([0xFF]) + bytes(23)
+   data = block(modules=(monitoring_block.MODULE_STATUS, element * 2), card=(monitoring_block.MONITORING_CARD, b"\xFF"),
+                ribbon=(monitoring_block.RIBBON_CABLE, ribbon)) # the module elements overlap the card flag, as on a real card
+   monitoring = monitoring_block.decode(block_reply(data), number_of_modules=2, data_groups=1)
+   assert monitoring.monitoring_card
+   assert monitoring.ribbon_cable == list(ribbon)
+   assert monitoring.module_status == [list(data[0x0A:0x22]), list(data[0x22:0x3A])]
+   assert monitoring.module_status[0][0] == 0xFF
+   without_card = monitoring_block.decode(block_reply(block(ribbon=(monitoring_block.RIBBON_CABLE, ribbon))))
+   assert not without_card.monitoring_card and without_card.ribbon_cable is None # flags only mean something with a MON300
+
+def test_a_short_reply_reads_as_invalid():
+   absent = monitoring_block.decode(block_reply(b"", ack=1), number_of_modules=4, data_groups=4) # time out, no data
+   assert absent == monitoring_block.Monitoring(False, None, False, None, False, [], None)
+   truncated = monitoring_block.decode(block_reply(b"\x80\x50"), number_of_modules=4, data_groups=4)
+   assert (truncated.temperature, truncated.voltage_valid, truncated.module_status) == (40.0, False, [])
+
+def test_contains():
+   block_frame = FRAMES.build("check_monitoring", 1, 5)
+   assert monitoring_block.contains(block_frame, FRAMES.build("ribbon_cable", 1, 5))
+   assert monitoring_block.contains(block_frame, FRAMES.build("check_module_status", 1, 5))
+   assert not monitoring_block.contains(block_frame, FRAMES.build("ribbon_cable", 1, 6)) # another receiver card
+   assert not monitoring_block.contains(block_frame, FRAMES.build("ribbon_cable", 0, 5)) # another LAN port
+   assert not monitoring_block.contains(block_frame, FRAMES.build("kill_mode", 1, 5)) # another register
+   write = bytearray(FRAMES.build("ribbon_cable", 1, 5))
+   write[transport.DIRECTION_OFFSET] = transport.WRITE
+   assert not monitoring_block.contains(block_frame, write)
+
+def test_slices_match_direct_reads_from_the_simulator(simulator):
+   serial = pytest.importorskip("serial")
+   (path, card), = simulator([2], data_groups=1)
+   registers = card.receivers[(0, 1)]
+   registers.write(novastar_simulator.MONITORING + monitoring_block.MONITORING_CARD, b"\xFF")
+   registers.write(novastar_simulator.MONITORING + monitoring_block.RIBBON_CABLE, bytes([0, 0x10] + [0] * 14)) # one signal line fault
+   with serial.Serial(path, timeout=0) as ser:
+      block_frame = FRAMES.build("check_monitoring", 0, 1)
+      reply = transport.transact(ser, block_frame, 1)
+      for name in ("ribbon_cable", "check_module_status"):
+         frame = FRAMES.build(name, 0, 1)
+         sliced = monitoring_block.slice_reply(block_frame, reply, frame)
+         direct = transport.transact(ser, frame, 1)
+         assert transport.checksum_ok(sliced)
+         assert sliced[:3] + sliced[4:-2] == direct[:3] + direct[4:-2] # all but the serial number (and so the checksum)
+   monitoring = monitoring_block.decode(reply, number_of_modules=4, data_groups=1)
+   assert monitoring.monitoring_card and monitoring.ribbon_cable[1] == 0x10
+   assert len(monitoring.module_status) == 4
@@ -0,0 +1,49 @@
+import pytest
+import command
+import pipeline_cache
+import transport
+
+HWID = "USB VID:PID=10C4:EA60 SER=0001A2B3 LOCATION=1-1.2:1.0"
+KEY = "0001A2B3"
+
+def test_cache_key_is_the_usb_serial_number():
+   assert pipeline_cache.cache_key(HWID) == KEY
+   assert pipeline_cache.cache_key("n/a") is None
+
+def test_a_fallback_is_held_then_the_configured_window_retried():
+   cache = {}
+   assert pipeline_cache.remember(cache, KEY, 4, 4, 1, now=1000)
+   assert pipeline_cache.window(cache, KEY, 4, now=1000 + pipeline_cache.HOLD - 1) == 1
+   assert pipeline_cache.window(cache, "other", 4, now=1000) == 4
+   assert pipeline_cache.window(cache, KEY, 4, now=1000 + pipeline_cache.HOLD) == 4 # held time over
+   assert not pipeline_cache.remember(cache, KEY, 4, 1, 1, now=1100) # a scan at the held window changes nothing
+   assert pipeline_cache.remember(cache, KEY, 4, 4, 4, now=5000) # the configured window worked again
+   assert cache == {}
+
+def test_repeated_fallbacks_are_held_longer():
+   cache = {}
+   now = 0
+   holds = []
+   for failure in range(10):
+      pipeline_cache.remember(cache, KEY, 4, 4, 1, now=now)
+      holds.append(cache[KEY]["until"] - now)
+      now = cache[KEY]["until"]
+   assert holds[:3] == [pipeline_cache.HOLD, 2 * pipeline_cache.HOLD, 4 * pipeline_cache.HOLD]
+   assert max(holds) == pipeline_cache.MAX_HOLD
+   assert cache[KEY]["failures"] == 10
+
+def test_sender_cards_without_a_usb_serial_number_are_not_remembered():
+   cache = {}
+   assert not pipeline_cache.remember(cache, None, 4, 4, 1)
+   assert pipeline_cache.window(cache, None, 4) == 4
+
+def test_a_pipeline_fallback_is_held_for_the_next_scan(simulator):
+   serial = pytest.importorskip("serial")
+   (path, card), = simulator([2], drop=0.5)
+   cache = {}
+   with serial.Serial(path, timeout=0) as ser:
+      link = transport.Pipeline(ser, pipeline_cache.window(cache, KEY, 4), 0.05, "test")
+      link.transact_many([command.check_DVI_signal] * 8)
+   assert link.window == 1
+   assert pipeline_cache.remember(cache, KEY, 4, 4, link.window)
+   assert pipeline_cache.window(cache, KEY, 4) == 1
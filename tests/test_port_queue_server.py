@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import os
+import sys
+import pytest
+import broker_client
+import methods
+import port_queue_server
+
+pytestmark = pytest.mark.skipif(sys.platform == "linux" and not os.path.isdir("/data/opt/LEDMonitoring"),
+                                reason="base_monitoring.py runs from /data/opt/LEDMonitoring")
+
+def check(name, ports):
+   # A monitoring check (base) whose sender card ports are already known
+   import base_monitoring
+   script = base_monitoring.base()
+   script._logger_name = name
+   script.valid_ports = ports
+   return script
+
+def test_checks_on_different_ports_hold_leases_at_the_same_time(monkeypatch):
+   monkeypatch.setattr(methods, "get_logger", lambda name, *args: logging.getLogger(name))
+   queue = port_queue_server.PortQueueServer(30, "test_port_queue_server")
+   held = []
+   async def run():
+      server = await asyncio.start_server(queue.handle_client, broker_client.HOST, 0)
+      monkeypatch.setattr(broker_client, "PORT", server.sockets[0].getsockname()[1])
+      both = asyncio.Event()
+      async def session(reader, writer):
+         held.append(sorted(port for lease in queue.held for port in lease.ports))
+         if len(held) == 2:
+            both.set()
+         await asyncio.wait_for(both.wait(), 5) # returns only if the other check got its lease meanwhile
+         writer.write(b"Done")
+         await writer.drain()
+         await reader.read(1024)
+      first, second = check("check_dvi", ["/dev/ttyUSB0"]), check("check_cabinet", ["/dev/ttyUSB1"])
+      await asyncio.gather(first.communicate_with_server(session), second.communicate_with_server(session))
+      server.close()
+      return first, second
+   first, second = asyncio.run(run())
+   assert first.leased_ports == ["/dev/ttyUSB0"] and second.leased_ports == ["/dev/ttyUSB1"]
+   assert held[-1] == ["/dev/ttyUSB0", "/dev/ttyUSB1"]
+   assert queue.stats["check_dvi"].sessions == queue.stats["check_cabinet"].sessions == 1
+
+def test_a_check_with_no_known_port_leases_every_port(monkeypatch):
+   import topology_cache
+   monkeypatch.setattr(topology_cache, "load", lambda logger_name: {})
+   script = check("check_dvi", 0)
+   assert script.lease_ports() == []
+   monkeypatch.setattr(topology_cache, "load", lambda logger_name: {"/dev/ttyUSB1": {"0": 4}, "/dev/ttyUSB0": {"0": 2}})
+   assert script.lease_ports() == ["/dev/ttyUSB0", "/dev/ttyUSB1"] # sender cards found last time
+
+def test_a_queue_server_without_leases_gets_the_bare_name(monkeypatch):
+   monkeypatch.setattr(methods, "get_logger", lambda name, *args: logging.getLogger(name))
+   received = []
+   async def legacy_server(reader, writer): # the in-house queue server: START for a known script name only
+      name = (await reader.read(1024)).decode()
+      received.append(name)
+      writer.write(b"START" if name == "check_dvi" else b"UNKNOWN")
+      await writer.drain()
+      if name == "check_dvi":
+         await reader.read(1024)
+      writer.close()
+   async def session(reader, writer):
+      writer.write(b"Done")
+      await writer.drain()
+   async def run():
+      server = await asyncio.start_server(legacy_server, broker_client.HOST, 0)
+      monkeypatch.setattr(broker_client, "PORT", server.sockets[0].getsockname()[1])
+      script = check("check_dvi", ["/dev/ttyUSB0"])
+      await script.communicate_with_server(session)
+      server.close()
+      return script
+   script = asyncio.run(run())
+   assert received == ["PORTS check_dvi /dev/ttyUSB0\n", "check_dvi"]
+   assert script.leased_ports is None and script.broker is None
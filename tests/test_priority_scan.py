@@ -0,0 +1,62 @@
+import json
+import sys
+import pytest
+import methods
+import novastar_simulator
+
+serial = pytest.importorskip("serial")
+
+def run_display_status(path, tmp_path, monkeypatch, **settings):
+   # Runs display_status.main() on the simulated sender card at path, with its files in tmp_path; returns
+   # [(verdict, status.json, monitor_log.log)] as written by each write_verdict() and the exit code
+   import display_status
+   import scan_benchmark
+   config = scan_benchmark.benchmark_config("display_status", path, 3, 1)
+   config.update(settings)
+   config = {key: value for key, value in config.items() if value is not None}
+   monkeypatch.chdir(tmp_path)
+   monkeypatch.setattr(methods, "loadConfig", lambda logger_name: dict(config))
+   monkeypatch.setattr(display_status, "loadConfig", lambda logger_name: dict(config))
+   write_file_atomic = methods.write_file_atomic
+   monkeypatch.setattr(methods, "write_file_atomic", lambda file_path, text: write_file_atomic(str(tmp_path / "status.json"), text))
+   for module in list(sys.modules.values()): # caches go to tmp_path
+      if getattr(module, "write_data", None) is methods.write_data:
+         monkeypatch.setattr(module, "write_data", lambda filename, json_data, logger_name: methods.write_data(str(tmp_path / filename), json_data, logger_name))
+   verdicts = []
+   write_verdict = display_status.write_verdict
+   def recorded(exit_code, message, provisional):
+      write_verdict(exit_code, message, provisional)
+      verdicts.append((json.loads((tmp_path / "status.json").read_text()), (tmp_path / "monitor_log.log").read_text()))
+   monkeypatch.setattr(display_status, "write_verdict", recorded)
+   with pytest.raises(SystemExit) as exit:
+      display_status.main()
+   return verdicts, exit.value.code
+
+def test_provisional_and_final_verdicts_agree_on_a_cabinet_off(simulator, tmp_path, monkeypatch):
+   (path, card), = simulator([3])
+   card.receivers[(0, 0)].write(novastar_simulator.KILL_MODE, b"\xFF") # first cabinet off, the last one on
+   verdicts, exit_code = run_display_status(path, tmp_path, monkeypatch, priority_scan=True)
+   (provisional, provisional_log), (final, final_log) = verdicts
+   assert provisional["verdict"] == "provisional"
+   assert provisional["2"] == "ONE OR MORE CABINETS OFF"
+   assert provisional_log == "display_status=2\n"
+   assert final["verdict"] == "final"
+   assert "ONE OR MORE CABINETS OFF" in final["2"]
+   assert final_log == "display_status=2\n"
+   assert exit_code == 2
+
+def test_a_display_without_a_receiver_card_count(simulator, tmp_path, monkeypatch):
+   (path, card), = simulator([3])
+   verdicts, exit_code = run_display_status(path, tmp_path, monkeypatch, priority_scan=True, receiver_cards=None)
+   (final, final_log), = verdicts # nothing critical, so no provisional verdict
+   assert final["verdict"] == "final"
+   assert "RECEIVER CARD(S) MISSING" not in json.dumps(final)
+   assert final_log == "display_status={}\n".format(exit_code)
+
+def test_missing_receiver_cards_are_reported_in_both_verdicts(simulator, tmp_path, monkeypatch):
+   (path, card), = simulator([3])
+   verdicts, exit_code = run_display_status(path, tmp_path, monkeypatch, priority_scan=True, receiver_cards=5)
+   (provisional, provisional_log), (final, final_log) = verdicts
+   assert provisional["2"] == "RECEIVER CARD(S) MISSING - 5 EXPECTED, 3 FOUND"
+   assert "RECEIVER CARD(S) MISSING - 5 EXPECTED, 3 FOUND" in final["2"]
+   assert (provisional_log, final_log) == ("display_status=2\n", "display_status=2\n")
@@ -0,0 +1,59 @@
+import pytest
+import read_planner
+import transport
+
+def reads():
+   import display_status
+   return {name: display_status.FRAMES.build(name, 1, 2) for name in display_status.RECEIVER_COMMANDS}
+
+def reply_to(frame, memory):
+   # Reply of a sender card whose registers hold memory[address] (the low byte of the address if missing)
+   address, length = read_planner.register_address(frame), transport.data_length(frame)
+   data = bytes(memory.get(address + offset, (address + offset) & 0xFF) for offset in range(length))
+   reply = bytearray(transport.REPLY_HEADER + bytes(frame[2:transport.HEADER_LENGTH]) + data + b"\x00\x00")
+   transport.CHECKSUM.pack_into(reply, len(reply) - 2, transport.frame_checksum(reply))
+   return bytes(reply)
+
+def test_neighbouring_reads_are_merged_within_the_gap():
+   frames = reads()
+   blocks = read_planner.plan_reads(frames, 256)
+   assert sorted(name for block in blocks for name in block.members) == sorted(frames)
+   assert len(blocks) < len(frames)
+   assert len(read_planner.plan_reads(frames, 0)) >= len(blocks) # a smaller gap never merges more
+   for block in blocks:
+      assert block.length <= read_planner.MAX_BLOCK_LENGTH
+      for name, offset in block.members.items():
+         assert read_planner.register_address(frames[name]) == block.address + offset
+         assert offset + transport.data_length(frames[name]) <= block.length
+      assert transport.checksum_ok(block.frame())
+
+def test_reads_of_other_receiver_cards_and_writes_are_not_merged():
+   import display_status
+   frames = {"first": display_status.FRAMES.build("kill_mode", 0, 0), "second": display_status.FRAMES.build("kill_mode", 0, 1),
+             "other lan": display_status.FRAMES.build("kill_mode", 1, 0)}
+   assert len(read_planner.plan_reads(frames, 256)) == 3
+   write = bytearray(frames["first"])
+   write[transport.DIRECTION_OFFSET] = transport.WRITE
+   assert len(read_planner.plan_reads({"read": frames["first"], "write": bytes(write)}, 256)) == 2
+
+@pytest.mark.parametrize("gap", [0, 16, 256])
+def test_sliced_replies_are_the_replies_of_each_read(gap):
+   frames = reads()
+   memory = {0x0A000000 + offset: (offset * 7) & 0xFF for offset in range(0x100)} # monitoring block
+   for block in read_planner.plan_reads(frames, gap):
+      reply = reply_to(block.frame(), memory)
+      for name in block.members:
+         sliced = read_planner.slice_reply(block, reply, name, frames[name])
+         expected = reply_to(frames[name], memory)
+         assert transport.checksum_ok(sliced)
+         number = transport.SERIAL_NUMBER_OFFSET # echoes the block read's, the checksum follows it
+         assert sliced[:number] + sliced[number + 1:-2] == expected[:number] + expected[number + 1:-2]
+
+def test_a_failed_block_read_fails_every_read_in_it():
+   frames = reads()
+   block = read_planner.plan_reads(frames, 256)[0]
+   reply = bytearray(reply_to(block.frame(), {}))
+   reply[2] = 1 # acknowledge: time out
+   for name in block.members:
+      assert read_planner.slice_reply(block, bytes(reply), name, frames[name])[2] == 1
+   assert read_planner.slice_reply(block, b"", name, frames[name]) == b""
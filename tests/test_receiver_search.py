@@ -0,0 +1,69 @@
+import math
+import pytest
+import command
+import frame_builder
+import receiver_search
+import transport
+
+FRAMES = frame_builder.FrameBuilder({"check_receiver_model": command.check_receiver_model})
+COUNTS = [0, 1, 8, 9, 64, 65] # 0, 1, 2^k and 2^k+1
+
+def counting(count):
+   # probe() of a chain of `count` receiver cards, and the indexes it was asked for
+   probed = []
+   def probe(index):
+      probed.append(index)
+      return index < count
+   return probe, probed
+
+def simulator_probe(ser, lan_port, probed):
+   # Receiver card present: it answers a model read (an absent one times out, acknowledge code 1)
+   def probe(index):
+      probed.append(index)
+      reply = transport.transact(ser, FRAMES.build("check_receiver_model", lan_port, index), 1)
+      return bool(reply) and reply[2] == 0
+   return probe
+
+def test_search_finds_every_chain_length():
+   for count in range(300):
+      probe, probed = counting(count)
+      assert receiver_search.count_receivers(probe) == count
+      assert len(probed) == len(set(probed)) # no index probed twice
+      assert len(probed) <= 2 * math.log2(count + 2) + 1
+
+@pytest.mark.parametrize("count", [0, 1, 8, 9, 255, 256])
+def test_linear_probes_one_by_one(count):
+   probe, probed = counting(count)
+   assert receiver_search.count_receivers(probe, mode=receiver_search.LINEAR) == count
+   assert probed == list(range(count + 1))
+
+def test_limit_caps_the_search():
+   probe, probed = counting(1000)
+   assert receiver_search.count_receivers(probe, limit=100) == 100
+   assert max(probed) < 100
+
+def test_search_against_the_simulator(simulator):
+   serial = pytest.importorskip("serial")
+   (path, card), = simulator(COUNTS[:4])
+   (other, other_card), = simulator(COUNTS[4:])
+   for port, counts in ((path, COUNTS[:4]), (other, COUNTS[4:])):
+      with serial.Serial(port, timeout=0) as ser:
+         for lan_port, count in enumerate(counts):
+            probed = []
+            assert receiver_search.count_receivers(simulator_probe(ser, lan_port, probed)) == count
+            linear = []
+            assert receiver_search.count_receivers(simulator_probe(ser, lan_port, linear), mode=receiver_search.LINEAR) == count
+            assert len(probed) <= 2 * math.log2(count + 2) + 1 and len(linear) == count + 1
+
+@pytest.mark.parametrize("count", COUNTS)
+def test_boundary_check_with_the_count_of_the_last_scan(simulator, count):
+   serial = pytest.importorskip("serial")
+   (path, card), = simulator([count])
+   with serial.Serial(path, timeout=0) as ser:
+      probed = []
+      assert receiver_search.count_receivers(simulator_probe(ser, 0, probed), expected=count) == count
+      assert probed == ([count - 1, count] if count else [0]) # last card present, the next one absent
+      for stale in {0, count // 2, count + 1, count + 7}: # cards added or removed since: searched again
+         probed = []
+         assert receiver_search.count_receivers(simulator_probe(ser, 0, probed), expected=stale) == count
+         assert len(probed) == len(set(probed))
@@ -0,0 +1,38 @@
+import copy
+import pytest
+import scan_cursor
+
+serial = pytest.importorskip("serial")
+
+def test_position_orders_the_walk():
+   checks = ["kill_mode", "get_brightness", "check_monitoring"]
+   walk = [scan_cursor.cursor_at(lan_port, receiver, check) for lan_port in range(2) for receiver in range(3) for check in checks]
+   assert sorted(walk, key=lambda cursor: scan_cursor.position(cursor, checks)) == walk
+   assert scan_cursor.position(scan_cursor.cursor_at(1, 2, "gone"), checks) == (1, 2, 0) # a check no longer listed starts the receiver card
+
+def test_a_budgeted_scan_resumes_from_its_cursor(simulator, tmp_path, monkeypatch):
+   import display_status
+   monkeypatch.chdir(tmp_path) # log files
+   (path, card), = simulator([3])
+   display_status.init_scan_worker({"baudrate": 115200, "sleep_time": 0.05, "flash_wait_time": 0}, "17/10/2026 12:00")
+   checks = display_status.RECEIVER_COMMANDS
+   calls = []
+   def out_of_time(deadline): # asked before each receiver card: the budget runs out after the first one
+      calls.append(deadline)
+      return deadline is not None and len(calls) > 1
+   monkeypatch.setattr(display_status, "out_of_time", out_of_time)
+   first = display_status.scan_sender_card(0, path, 115200, 1, {}, {}, None, deadline=0)
+   cursor = first["cursor"]
+   assert cursor is not None and (cursor["lan_port"], cursor["receiver"]) == (0, 1)
+   stopped = scan_cursor.position(cursor, checks)
+   runs = copy.deepcopy(first["check_schedule"])
+   second = display_status.scan_sender_card(0, path, 115200, 1, {}, first["check_schedule"], None, cursor=cursor)
+   assert second["cursor"] is None # walk completed
+   for receiver in range(3):
+      entry = second["check_schedule"]["0"][str(receiver)]
+      assert sorted(entry) == sorted(checks)
+      for index, check in enumerate(checks):
+         if (0, receiver, index) < stopped: # run by the first scan, not again
+            assert entry[check] == runs["0"][str(receiver)][check]
+         else:
+            assert check not in runs.get("0", {}).get(str(receiver), {})
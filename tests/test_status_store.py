@@ -0,0 +1,41 @@
+import json
+import status_store
+
+def document():
+   receivers = {receiver: {"temperature": 30 + receiver, "voltage": 4.9, "moduleFlash": {"0": "OK"}} for receiver in range(3)}
+   return {"/dev/ttyUSB0": {"DVISignal": "Valid", "sender_card_rx_port": {0: {"receiverCard": receivers}}},
+           "/dev/ttyUSB1": {"DVISignal": "Not valid", "sender_card_rx_port": {}},
+           "devices": 2, 0: "DISPLAY OK", "verdict": "final", "empty": {}}
+
+def written(store):
+   with open(store.file_path) as status:
+      return status.read()
+
+def test_output_is_the_same_as_json_dumps(tmp_path):
+   status = document()
+   for compact, expected in ((False, lambda: json.dumps(status, indent=4)), (True, lambda: json.dumps(status, separators=(",", ":")))):
+      store = status_store.StatusStore("status.json", status, "test", compact)
+      store.file_path = str(tmp_path / "status.json")
+      store.write()
+      assert written(store) == expected()
+      status["/dev/ttyUSB0"]["sender_card_rx_port"][0]["receiverCard"][1]["temperature"] = 55.5
+      status["devices"] = 3
+      store.changed("/dev/ttyUSB0")
+      store.write()
+      assert written(store) == expected()
+      assert json.loads(written(store))["/dev/ttyUSB0"]["sender_card_rx_port"]["0"]["receiverCard"]["1"]["temperature"] == 55.5
+
+def test_only_changed_entries_are_encoded_again(tmp_path):
+   status = document()
+   store = status_store.StatusStore("status.json", status, "test")
+   store.file_path = str(tmp_path / "status.json")
+   store.write()
+   status["/dev/ttyUSB0"]["DVISignal"] = "Not valid"
+   status["/dev/ttyUSB1"]["DVISignal"] = "Valid" # not marked: the text written before is reused
+   store.changed("/dev/ttyUSB0")
+   store.write()
+   result = json.loads(written(store))
+   assert (result["/dev/ttyUSB0"]["DVISignal"], result["/dev/ttyUSB1"]["DVISignal"]) == ("Not valid", "Not valid")
+   store.changed("/dev/ttyUSB1")
+   store.write()
+   assert written(store) == json.dumps(status, indent=4)
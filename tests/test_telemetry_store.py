@@ -0,0 +1,54 @@
+import pytest
+import telemetry_store
+
+RETENTION = {"raw_days": 1, "rollup_minutes": 5, "rollup_days": 3}
+NOW = 100 * 86400 + 130.0 # not on a rollup boundary
+CUTOFF = (NOW - 86400) // 300 * 300
+
+@pytest.fixture
+def connection(tmp_path):
+   connection = telemetry_store.connect(str(tmp_path / telemetry_store.DATABASE))
+   yield connection
+   connection.close()
+
+def row(time, temperature, cabinet_on=1, receiver=0):
+   return ["host", "/dev/ttyUSB0", 0, receiver, time, temperature, 5.0, 80, 255, 255, 255, cabinet_on, 0, 0]
+
+def history(connection, start=0, end=NOW + 1):
+   return telemetry_store.history(connection, "/dev/ttyUSB0", 0, 0, start, end, host="host")
+
+def test_raw_rows_are_cut_at_a_rollup_boundary(connection):
+   rows = [row(CUTOFF - 300, 30.0), row(CUTOFF - 200, 34.0, cabinet_on=0), row(CUTOFF - 1, 41.0), # one period, folded
+           row(CUTOFF, 50.0), row(NOW - 10, 51.0)] # kept as they are
+   telemetry_store.append(connection, rows)
+   telemetry_store.downsample(connection, RETENTION, now=NOW)
+   result = history(connection)
+   assert [(entry["time"], entry["samples"]) for entry in result] == [(CUTOFF - 300, 3), (CUTOFF, 1), (NOW - 10, 1)]
+   rollup = result[0]
+   assert (rollup["temperature_min"], rollup["temperature"], rollup["temperature_max"]) == (30.0, 35.0, 41.0)
+   assert rollup["cabinet_off"] == 1
+   assert [entry["temperature"] for entry in result[1:]] == [50.0, 51.0]
+
+def test_rows_stored_late_are_merged_into_their_rollup(connection):
+   telemetry_store.append(connection, [row(CUTOFF - 300, 30.0), row(CUTOFF - 250, 40.0)])
+   telemetry_store.downsample(connection, RETENTION, now=NOW)
+   telemetry_store.append(connection, [row(CUTOFF - 100, 20.0)])
+   telemetry_store.downsample(connection, RETENTION, now=NOW)
+   rollup, = history(connection)
+   assert rollup["samples"] == 3
+   assert (rollup["temperature_min"], rollup["temperature"], rollup["temperature_max"]) == (20.0, 30.0, 40.0)
+
+def test_rollups_past_their_retention_are_deleted(connection):
+   old = NOW - 3 * 86400 - 600
+   telemetry_store.append(connection, [row(old, 30.0), row(CUTOFF - 300, 31.0)])
+   telemetry_store.downsample(connection, RETENTION, now=NOW)
+   assert [entry["time"] for entry in history(connection)] == [CUTOFF - 300]
+
+def test_only_values_read_by_the_scan_are_stored():
+   status = {"sender_card_rx_port": {0: {"receiverCard": {
+      0: {"temperature": 33.0, "voltage": 5.1, "brightnessLevelPC": 80, "kill": "On"},
+      1: {"temperature": 35.0, "kill": "Off"}}}}}
+   schedule = {"0": {"0": {"check_monitoring": {"last_run": 200.0}, "kill_mode": {"last_run": 50.0}},
+                     "1": {"check_monitoring": {"last_run": 50.0}, "kill_mode": {"last_run": 50.0}}}}
+   rows = telemetry_store.receiver_rows("/dev/ttyUSB0", status, schedule, since=100.0, now=300.0, host="host")
+   assert rows == [["host", "/dev/ttyUSB0", 0, 0, 300.0, 33.0, 5.1, None, None, None, None, None, None, None]]
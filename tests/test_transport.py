@@ -0,0 +1,96 @@
+import importlib
+import importlib.util
+import logging
+import os
+import pytest
+import command
+import transport
+import replay_harness
+from conftest import ROOT
+
+COMMAND_MODULES = ["display_status", "module_functions", "config_writer", "automatic_brightness_adjustment"]
+
+def is_request(value):
+   return isinstance(value, (list, bytes, bytearray)) and len(value) >= 2 and bytes(value[:2]) == transport.REQUEST_HEADER
+
+def templates():
+   # (source, name, frame) of every request template the scripts send
+   found = [("command.py", name, value) for name, value in vars(command).items() if is_request(value)]
+   modules = [importlib.import_module(name) for name in COMMAND_MODULES]
+   spec = importlib.util.spec_from_file_location("automatic_brightness_adjustment_hy", os.path.join(ROOT, "automatic_brightness_adjustment-UK-HY-pCzEG1DWR.py"))
+   modules.append(importlib.util.module_from_spec(spec))
+   spec.loader.exec_module(modules[-1])
+   for module in modules:
+      found += [(module.__name__, name, value) for name, value in module.COMMANDS.items() if is_request(value)]
+   return found
+
+TEMPLATES = templates()
+
+@pytest.mark.parametrize("source, name, frame", TEMPLATES, ids=[f"{source}:{name}" for source, name, frame in TEMPLATES])
+def test_every_template_has_the_protocol_length(source, name, frame):
+   assert len(frame) == transport.request_length(frame)
+
+@pytest.mark.parametrize("source, name, frame", TEMPLATES, ids=[f"{source}:{name}" for source, name, frame in TEMPLATES])
+def test_tag_sets_serial_number_and_checksum(source, name, frame):
+   tagged = transport.tag(frame, 0x42)
+   assert len(tagged) == transport.request_length(frame)
+   assert tagged[transport.SERIAL_NUMBER_OFFSET] == 0x42
+   assert transport.checksum_ok(tagged)
+   assert tagged[:-2] == bytearray(frame[:len(tagged) - 2])[:3] + b"\x42" + bytearray(frame[4:len(tagged) - 2])
+
+def test_tag_cuts_bytes_past_the_request():
+   frame = bytes(command.sender_model) + b" "
+   tagged = transport.tag(frame, 1)
+   assert len(tagged) == transport.FRAME_OVERHEAD
+   assert transport.checksum_ok(tagged)
+
+def test_tag_rejects_a_truncated_frame():
+   with pytest.raises(ValueError):
+      transport.tag(command.sender_model[:-1], 1)
+   write = bytearray(command.start_check_module_flash) # write request: its data field belongs to the frame
+   with pytest.raises(ValueError):
+      transport.tag(write[:transport.FRAME_OVERHEAD], 1)
+
+def test_frame_decoder_splits_joined_and_noisy_replies():
+   replies = []
+   for number in (1, 2):
+      request = transport.tag(command.sender_model, number)
+      reply = transport.REPLY_HEADER + bytes(request[2:transport.HEADER_LENGTH]) + b"\x01\x11" + b"\x00\x00" # 2 data bytes
+      replies.append(reply[:-2] + transport.CHECKSUM.pack(transport.frame_checksum(reply)))
+   decoder = transport.FrameDecoder()
+   stream = b"\x00\xAA" + replies[0] + replies[1]
+   decoder.feed(stream[:7])
+   assert list(decoder.frames()) == []
+   decoder.feed(stream[7:])
+   assert list(decoder.frames()) == replies
+
+def test_transact_against_the_simulator(simulator):
+   serial = pytest.importorskip("serial")
+   (path, card), = simulator([2])
+   with serial.Serial(path, timeout=0) as ser:
+      reply = transport.transact(ser, command.check_DVI_signal, 1)
+   assert reply and reply[2] == 0 # acknowledged: the request checksum was right
+   assert reply[transport.HEADER_LENGTH] == 1 # DVI signal valid
+
+def test_transact_logs_the_frame_as_written(simulator, caplog):
+   serial = pytest.importorskip("serial")
+   (path, card), = simulator([2])
+   with caplog.at_level("DEBUG", logger="display_status"), serial.Serial(path, timeout=0) as ser:
+      reply = transport.transact(ser, command.check_DVI_signal, 1, "display_status")
+   sent = [replay_harness.SENT.search(record.getMessage()) for record in caplog.records]
+   logged = [replay_harness.parse_hex(match.group(2)) for match in sent if match]
+   assert logged == [bytes(transport.tag(command.check_DVI_signal, reply[transport.SERIAL_NUMBER_OFFSET]))]
+
+def test_pipelined_requests_are_paired_with_their_replies(simulator, caplog):
+   serial = pytest.importorskip("serial")
+   (path, card), = simulator([2])
+   frames = [command.check_DVI_signal] * 4
+   with caplog.at_level("DEBUG", logger="display_status"), serial.Serial(path, timeout=0) as ser:
+      link = transport.Pipeline(ser, 4, 1, "display_status")
+      for reply in link.transact_many(frames): # logged by the caller once all have arrived, as display_status.py does
+         logging.getLogger("display_status").debug("Received data: "+' '.join('{:02X}'.format(a) for a in reply))
+   lines = ["17/10/2026 10:00:00 " + record.getMessage() for record in caplog.records]
+   exchanges = replay_harness.parse_log(lines)
+   assert len(exchanges) == len(frames)
+   for exchange in exchanges:
+      assert exchange.reply and exchange.reply[transport.SERIAL_NUMBER_OFFSET] == exchange.request[transport.SERIAL_NUMBER_OFFSET]
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# TOPOLOGY CACHE
+# Remembers the number of receiver cards found on each LAN port of each sender card.
+#
+# DESCRIPTION
+# - The receiver cards of a display rarely change between scans. The count found on each (serial port, LAN port)
+#   is stored in topology_cache.json, next to status.json, as {"<serial port>": {"<LAN port>": count}}.
+# - On the next scan receiver_search.count_receivers() is given the cached count n and only checks the boundary
+#   of the chain: receiver card n-1 present and receiver card n absent, two round trips per LAN port. The full
+#   search only runs when that check fails, and its result replaces the cached count.
+#------------------------------------------------------------------------------------------------------------
+from methods import read_cache, write_data
+
+CACHE_FILE = "topology_cache.json"
+
+def load(logger_name):
+   return read_cache(CACHE_FILE, logger_name)
+
+def save(cache, logger_name):
+   write_data(CACHE_FILE, cache, logger_name)
+
+def counts(cache, port):
+   # Cached receiver card count of each LAN port of a sender card, as {LAN port: count}
+   return {int(lan_port): count for lan_port, count in cache.get(port, {}).items()}
+
+def expected(cache, port, lan_port):
+   return cache.get(port, {}).get(str(lan_port))
+
+def remember(cache, port, lan_port, count):
+   # Record the receiver card count found on a LAN port; returns True if the cache changed
+   if expected(cache, port, lan_port) == count:
+      return False
+   cache.setdefault(port, {})[str(lan_port)] = count
+   return True
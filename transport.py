@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+#------------------------------------------------------------------------------------------------------------
+# SERIAL TRANSPORT
+# Shared request/response layer for the Novastar serial protocol (v1.9.3).
+#
+# DESCRIPTION
+# - Every query helper used to write a frame, sleep a fixed amount of time (sleep_time) and then read whatever
+#   was waiting at the input buffer. Most replies arrive within a few milliseconds, so nearly all of the scan
+#   time was spent asleep.
+# - transact() writes the request and returns as soon as its reply has been received. The timeout is now a
+#   deadline rather than a fixed wait.
+# - Replies are carved out of the received byte stream by a FrameDecoder (one per port), which checks the
+#   checksum and resynchronises on the next AA 55 header after noise, so split or back to back replies are
+#   handled and a late reply is never taken for the answer to the next request.
+#
+# FRAME LAYOUT (request 55 AA / reply AA 55)
+# - [0:2]   header
+# - [2]     acknowledge code (reply only, 0 = OK)
+# - [3]     serial number (echoed back in the reply)
+# - [4:6]   source / destination
+# - [6]     device type (0 = sender card, 1 = receiver card, 2 = function card)
+# - [7]     sender card output (LAN) port
+# - [8:10]  receiver card index (little endian)
+# - [10]    direction (0 = read, 1 = write)
+# - [11]    reserved
+# - [12:16] register address (little endian)
+# - [16:18] data length (little endian)
+# - [18:-2] data (write requests and read replies only)
+# - [-2:]   checksum (little endian)
+#
+# PIPELINING
+# - The serial number byte is echoed back in every reply, so a Pipeline can keep several requests in flight on
+#   one link and match the replies to their requests as they arrive (see Pipeline below).
+#
+# ASYNCIO
+# - AsyncLink offers the same request/response exchange as a coroutine (await link.transact(frame)) for the
+#   asyncio based monitoring checks, so waiting for a reply no longer blocks the event loop.
+#------------------------------------------------------------------------------------------------------------
+import time
+import struct
+import logging
+import asyncio
+import weakref
+
+REQUEST_HEADER = b"\x55\xAA"
+REPLY_HEADER = b"\xAA\x55"
+HEADER_LENGTH = 18 # bytes before the data field
+FRAME_OVERHEAD = 20 # header fields plus the two checksum bytes
+SERIAL_NUMBER_OFFSET = 3
+DIRECTION_OFFSET = 10
+LENGTH_OFFSET = 16
+READ = 0
+WRITE = 1
+MAX_DATA_LENGTH = 0x400 # longest data field ever requested; larger length fields are treated as noise
+CHECKSUM_BASE = 0x5555
+CHECKSUM = struct.Struct("<H")
+POLL_INTERVAL = 0.002 # seconds between checks of the input buffer while a reply is outstanding
+
+serial_number = 0 # last serial number (byte 3) used
+decoders = weakref.WeakKeyDictionary() # serial port -> FrameDecoder
+
+def data_length(frame):
+   # Data length field (bytes 16-17) of a request or reply frame
+   return frame[LENGTH_OFFSET] | (frame[LENGTH_OFFSET + 1] << 8)
+
+def transact(ser, frame, timeout, logger_name=None):
+# ---------------------------------------------------------------------------------------
+# Send a request frame and collect its reply.
+# The request is tagged with a fresh serial number and only a reply echoing it is
+# accepted, so a late reply to an earlier request is never mistaken for this one.
+# The frame is logged as written, after tagging, so debug.log shows what went on the wire.
+# Returns as soon as the reply has arrived, or b"" once the timeout has expired.
+# ---------------------------------------------------------------------------------------
+   logger = logging.getLogger(logger_name)
+   decoder = decoder_for(ser)
+   number = next_serial_number()
+   send(ser, tag(frame, number), logger)
+   deadline = time.monotonic() + float(timeout)
+   while True:
+      waiting = ser.inWaiting()
+      if waiting > 0:
+         decoder.feed(ser.read(size=waiting))
+         for reply in decoder.frames():
+            if reply[SERIAL_NUMBER_OFFSET] == number:
+               return reply
+            logger.debug("Discarding late reply: "+' '.join('{:02X}'.format(a) for a in reply))
+      if time.monotonic() >= deadline:
+         return b""
+      time.sleep(POLL_INTERVAL)
+
+def send(ser, frame, logger):
+   # Write a tagged request frame, logged the way replay_harness.py reads it back
+   logger.debug("Sending command: "+' '.join('{:02X}'.format(a) for a in frame))
+   ser.write(frame)
+
+def frame_checksum(frame):
+   # Sum of bytes [2:-2] plus 5555H, stored little endian in the last two bytes
+   return (sum(frame[2:-2]) + CHECKSUM_BASE) & 0xFFFF
+
+def checksum_ok(frame):
+   return len(frame) >= FRAME_OVERHEAD and frame_checksum(frame) == frame[-2] | (frame[-1] << 8)
+
+def next_serial_number(in_flight=()):
+   # Serial numbers 1..255 shared by every request sent from this process
+   global serial_number
+   while True:
+      serial_number = serial_number % 0xFF + 1
+      if serial_number not in in_flight:
+         return serial_number
+
+def request_length(frame):
+   # Length of a request frame: header fields, data (write requests only) and checksum
+   return FRAME_OVERHEAD + (data_length(frame) if frame[DIRECTION_OFFSET] == WRITE else 0)
+
+def tag(frame, number):
+   # Copy of a request frame carrying the given serial number, checksum updated.
+   # Bytes past the request length (e.g. a stray trailing space in a template) are cut off
+   # so the checksum lands where the sender card reads it; a frame too short is rejected.
+   length = request_length(frame)
+   if len(frame) < length:
+      raise ValueError("Request frame of {} bytes, {} expected: ".format(len(frame), length)+' '.join('{:02X}'.format(a) for a in frame))
+   tagged = bytearray(frame[:length])
+   tagged[SERIAL_NUMBER_OFFSET] = number
+   CHECKSUM.pack_into(tagged, len(tagged) - 2, frame_checksum(tagged))
+   return tagged
+
+class FrameDecoder:
+# ---------------------------------------------------------------------------------------
+# Streaming decoder for reply frames.
+# Received bytes are fed in as they arrive, in chunks of any size. frames() yields every
+# complete frame whose checksum is correct. A frame split across reads stays buffered
+# until the rest arrives, and several frames received together are yielded one by one.
+# Noise in front of an AA 55 header is dropped. A header whose length field is
+# implausible, or whose frame fails the checksum, is skipped and the decoder
+# resynchronises on the next AA 55.
+# Consumed bytes are deleted from the front of the bytearray. CPython does this by moving
+# the buffer start rather than copying, so the buffer behaves as a ring buffer.
+# ---------------------------------------------------------------------------------------
+   def __init__(self, logger_name=None):
+      self.buffer = bytearray()
+      self.logger = logging.getLogger(logger_name)
+
+   def feed(self, data):
+      self.buffer += data
+
+   def reset(self):
+      self.buffer.clear()
+
+   def frames(self):
+      buffer = self.buffer
+      while True:
+         start = buffer.find(REPLY_HEADER)
+         if start < 0:
+            # keep a trailing AA, it may be the first half of the next header
+            del buffer[:-1 if buffer[-1:] == REPLY_HEADER[:1] else len(buffer)]
+            return
+         if start > 0:
+            self.logger.debug("Discarding {} byte(s) in front of reply header".format(start))
+            del buffer[:start]
+         if len(buffer) < HEADER_LENGTH:
+            return
+         length = data_length(buffer)
+         if length > MAX_DATA_LENGTH:
+            del buffer[:len(REPLY_HEADER)] # not a real header, look for the next one
+            continue
+         end = FRAME_OVERHEAD + length
+         if len(buffer) < end:
+            return
+         frame = bytes(buffer[:end])
+         if not checksum_ok(frame):
+            self.logger.debug("Discarding reply with bad checksum: "+' '.join('{:02X}'.format(a) for a in frame))
+            del buffer[:len(REPLY_HEADER)]
+            continue
+         del buffer[:end]
+         yield frame
+
+def decoder_for(ser):
+   # One decoder per serial port object, so bytes left over by one request are still seen by the next
+   decoder = decoders.get(ser)
+   if decoder is None:
+      decoder = decoders[ser] = FrameDecoder()
+   return decoder
+
+class Pipeline:
+# ---------------------------------------------------------------------------------------
+# Keeps up to `window` requests in flight on one sender card link.
+# Each request is tagged with a unique serial number (byte 3) and the replies, which echo
+# it back, are matched to their callers as they arrive. A window of 1 is the strict
+# one-at-a-time behaviour of transact().
+# If a request goes unanswered while others are in flight the firmware is assumed to drop
+# frames: the link falls back to a window of 1 and the unanswered requests are sent again.
+# display_status.py keeps the fallback for the next scans (pipeline_cache.py).
+# ---------------------------------------------------------------------------------------
+   def __init__(self, ser, window, timeout, logger_name):
+      self.ser = ser
+      self.window = max(1, int(window))
+      self.timeout = float(timeout)
+      self.logger = logging.getLogger(logger_name)
+      self.decoder = decoder_for(ser)
+
+   def transact(self, frame):
+      return self.transact_many([frame])[0]
+
+   def transact_many(self, frames):
+      # Returns the reply to each request in order; b"" for requests that got no reply
+      replies = [b""] * len(frames)
+      pending = list(range(len(frames)))
+      in_flight = {} # serial number -> (request index, deadline)
+      retried = set()
+      while pending or in_flight:
+         while pending and len(in_flight) < self.window:
+            index = pending.pop(0)
+            serial_number = next_serial_number(in_flight)
+            send(self.ser, tag(frames[index], serial_number), self.logger)
+            in_flight[serial_number] = (index, time.monotonic() + self.timeout)
+         waiting = self.ser.inWaiting()
+         if waiting > 0:
+            self.decoder.feed(self.ser.read(size=waiting))
+            for reply in self.decoder.frames():
+               entry = in_flight.pop(reply[SERIAL_NUMBER_OFFSET], None)
+               if entry is None:
+                  self.logger.debug("Discarding unexpected reply: "+' '.join('{:02X}'.format(a) for a in reply))
+               else:
+                  replies[entry[0]] = reply
+            continue
+         now = time.monotonic()
+         expired = [serial_number for serial_number, (index, deadline) in in_flight.items() if now >= deadline]
+         for serial_number in expired:
+            index, deadline = in_flight.pop(serial_number)
+            if self.window > 1 and index not in retried:
+               retried.add(index)
+               pending.append(index)
+         if expired and self.window > 1:
+            self.logger.warning("No reply to {} pipelined request(s) - falling back to one request at a time".format(len(expired)))
+            self.window = 1
+            pending.sort()
+         if not expired:
+            time.sleep(POLL_INTERVAL)
+      return replies
+
+class AsyncLink:
+# ---------------------------------------------------------------------------------------
+# asyncio front end for one serial port.
+# While replies are outstanding the port's file descriptor is registered with
+# loop.add_reader(), so received bytes are collected by the event loop and other
+# coroutines (checks on other sender cards, the local queue server connection) keep
+# running. Requests are tagged with a serial number like Pipeline, so several coroutines
+# may await replies on the same link.
+# The port is only watched while a request is in flight because the checks close and
+# reopen it between queries. Where the loop cannot watch a serial port (no fileno() on
+# Windows, proactor event loop) the input buffer is polled every POLL_INTERVAL instead.
+# ---------------------------------------------------------------------------------------
+   def __init__(self, ser, timeout, logger_name):
+      self.ser = ser
+      self.timeout = float(timeout)
+      self.logger = logging.getLogger(logger_name)
+      self.waiting = {} # serial number -> future
+      self.decoder = decoder_for(ser)
+      self.loop = None
+      self.fd = None
+      self.poller = None
+
+   def _watch(self):
+      self.loop = asyncio.get_running_loop()
+      try:
+         self.fd = self.ser.fileno()
+         self.loop.add_reader(self.fd, self._receive)
+         return
+      except (AttributeError, NotImplementedError):
+         self.fd = None
+      self.poller = self.loop.create_task(self._poll())
+
+   def _unwatch(self):
+      if self.fd is not None:
+         self.loop.remove_reader(self.fd)
+         self.fd = None
+      if self.poller is not None:
+         self.poller.cancel()
+         self.poller = None
+
+   async def _poll(self):
+      while True:
+         self._receive()
+         await asyncio.sleep(POLL_INTERVAL)
+
+   def _receive(self):
+      try:
+         waiting = self.ser.inWaiting()
+         if waiting > 0:
+            self.decoder.feed(self.ser.read(size=waiting))
+      except Exception as e:
+         self.logger.error("Error reading from serial port: " + str(e))
+         return
+      for reply in self.decoder.frames():
+         future = self.waiting.pop(reply[SERIAL_NUMBER_OFFSET], None)
+         if future is None or future.done():
+            self.logger.debug("Discarding unexpected reply: "+' '.join('{:02X}'.format(a) for a in reply))
+         else:
+            future.set_result(reply)
+
+   async def transact(self, frame, timeout=None):
+      # Returns the reply frame, or b"" if none arrived before the timeout
+      if not self.waiting:
+         self._watch()
+      serial_number = next_serial_number(self.waiting)
+      future = self.loop.create_future()
+      self.waiting[serial_number] = future
+      try:
+         send(self.ser, tag(frame, serial_number), self.logger)
+         return await asyncio.wait_for(future, self.timeout if timeout is None else float(timeout))
+      except asyncio.TimeoutError:
+         return b""
+      finally:
+         self.waiting.pop(serial_number, None)
+         if not self.waiting:
+            self._unwatch()